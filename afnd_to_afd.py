@@ -1,13 +1,55 @@
 """
 Implementação da determinização de Autômatos Finitos Não-Determinísticos.
 """
-from automaton import Automaton
+import heapq
+import os
+from automaton import Automaton, EPSILON
+from compact_automaton import CompactDFA, CompactNFA
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-def determinize(afnd):
+# Estimativa de memória da construção: bytes por estado do AFND guardado nos
+# subconjuntos (entrada de frozenset) e por transição do AFD
+SUBSET_ENTRY_BYTES = 32
+TRANSITION_BYTES = 200
+
+# Quantidade de subconjuntos (os maiores) anexados ao erro de limite excedido
+REPORTED_SUBSETS = 5
+
+# Tamanho mínimo da fronteira para distribuí-la entre os processos em determinize_parallel
+PARALLEL_MIN_FRONTIER = 64
+
+
+class DeterminizationError(RuntimeError):
+    """
+    Limite da construção de subconjuntos excedido. subsets contém os maiores
+    conjuntos de estados do AFND construídos até a interrupção.
+    """
+    def __init__(self, message, subsets):
+        super().__init__(message)
+        self.subsets = subsets
+
+
+def determinize(afnd, compact=None, max_states=None, max_transitions=None, max_memory=None):
+    """
+    Determiniza o AFND pela construção de subconjuntos. Com compact=True (padrão
+    quando a entrada é um CompactNFA), o AFD resultante é um CompactDFA.
+    
+    max_states, max_transitions e max_memory (bytes, estimados) limitam a
+    construção; ao exceder um deles, a construção é interrompida com
+    DeterminizationError em vez de crescer até esgotar a memória.
+    """
     print("Iniciando determinização...")
     
-    afd = Automaton()
+    symbols = sorted(afnd.alphabet - {EPSILON})
+    if compact is None:
+        compact = isinstance(afnd, CompactNFA)
+    afd = CompactDFA(symbols) if compact else Automaton()
+    
+    # Padrão de cada estado final do AFND (consultado a cada novo conjunto)
+    final_patterns = {}
+    for final_state, pattern in afnd.final_states:
+        final_patterns.setdefault(final_state, pattern)
     
     # Calcular o ε-fechamento do estado inicial
     initial_closure = frozenset(afnd.get_epsilon_closure(afnd.initial_state))
@@ -25,28 +67,32 @@ def determinize(afnd):
     
     # Processar estados finais no conjunto inicial
     for state in initial_closure:
-        for final_state, pattern in afnd.final_states:
-            if state == final_state:
-                afd.final_states.add((0, pattern))
-                break
+        if state in final_patterns:
+            afd.add_final_state(0, final_patterns[state])
     
     # Conjunto de estados processados para evitar duplicações
     processed = set([initial_closure])
     
+    # Contadores para os limites da construção
+    num_transitions = 0
+    subset_entries = len(initial_closure)
+    
+    def overflow(reason):
+        largest = heapq.nlargest(REPORTED_SUBSETS, state_mapping, key=len)
+        return DeterminizationError(f"Determinização interrompida: {reason} "
+                                    f"({len(state_mapping)} estados, {num_transitions} transições)", largest)
+    
     # Processamento principal
     while queue:
         current_states = queue.popleft()
         current_afd_state = state_mapping[current_states]
         
-        # Para cada símbolo no alfabeto (exceto ε)
-        for symbol in sorted(afnd.alphabet - {'&'}):
-            # Calcular o movimento seguido pelo ε-fechamento
-            next_states = set()
-            for state in current_states:
-                next_states.update(afnd.get_move({state}, symbol))
-            
-            if not next_states:
-                continue  # Não há transições para este símbolo
+        # Movimentos de todos os estados do conjunto, agrupados por símbolo (exceto ε)
+        moves = afnd.get_moves(current_states)
+        
+        # Para cada símbolo com transição, em ordem, seguido pelo ε-fechamento
+        for symbol in sorted(moves):
+            next_states = moves[symbol]
             
             epsilon_closure = set()
             for state in next_states:
@@ -63,12 +109,14 @@ def determinize(afnd):
                 state_mapping[epsilon_closure] = new_state
                 afd.add_state(new_state)
                 
+                subset_entries += len(epsilon_closure)
+                if max_states is not None and len(state_mapping) > max_states:
+                    raise overflow(f"limite de {max_states} estados excedido")
+                
                 # Verificar se contém estados finais
                 for state in epsilon_closure:
-                    for final_state, pattern in afnd.final_states:
-                        if state == final_state:
-                            afd.final_states.add((new_state, pattern))
-                            break
+                    if state in final_patterns:
+                        afd.add_final_state(new_state, final_patterns[state])
                 
                 # Adicionar à fila se ainda não foi processado
                 if epsilon_closure not in processed:
@@ -78,6 +126,178 @@ def determinize(afnd):
             # Adicionar a transição no AFD
             next_afd_state = state_mapping[epsilon_closure]
             afd.add_transition(current_afd_state, symbol, next_afd_state)
+            
+            num_transitions += 1
+            if max_transitions is not None and num_transitions > max_transitions:
+                raise overflow(f"limite de {max_transitions} transições excedido")
+            if (max_memory is not None and
+                    subset_entries * SUBSET_ENTRY_BYTES + num_transitions * TRANSITION_BYTES > max_memory):
+                raise overflow(f"limite estimado de {max_memory} bytes de memória excedido")
+    
+    print(f"Determinização concluída. AFD resultante tem {len(afd.states)} estados.")
+    return afd
+
+
+def renumber_states(afd, layout):
+    """
+    Retorna uma cópia do AFD com os estados renumerados: layout lista os
+    estados atuais na nova ordem (o estado layout[i] passa a ser o estado i).
+    Usado para agrupar no início da tabela de transições os estados mais
+    visitados (ver LexicalAnalyzer.profile_layout).
+    """
+    new_id = {state: i for i, state in enumerate(layout)}
+    if len(new_id) != len(layout) or set(new_id) != set(afd.states):
+        raise ValueError("O layout deve listar cada estado do AFD exatamente uma vez")
+    
+    renumbered = CompactDFA(afd.alphabet) if isinstance(afd, CompactDFA) else Automaton()
+    for state in range(len(layout)):
+        renumbered.add_state(state)
+    renumbered.set_initial_state(new_id[afd.initial_state])
+    for symbol in afd.alphabet:
+        renumbered.add_symbol(symbol)
+    
+    for from_state, transitions in afd.transitions.items():
+        for symbol, to_states in transitions.items():
+            for to_state in to_states:
+                renumbered.add_transition(new_id[from_state], symbol, new_id[to_state])
+    
+    for final in afd.final_states:
+        if isinstance(final, tuple):
+            renumbered.add_final_state(new_id[final[0]], final[1])
+        else:
+            renumbered.add_final_state(new_id[final])
+    renumbered.pattern = afd.pattern
+    return renumbered
+
+
+# AFND dos processos de trabalho (enviado uma única vez, na inicialização)
+_worker_afnd = None
+
+
+def _init_worker(afnd):
+    global _worker_afnd
+    _worker_afnd = afnd
+
+
+def _expand_subsets(afnd, subsets):
+    """
+    Calcula, para cada conjunto, a lista de pares (símbolo, ε-fechamento do
+    movimento) em ordem de símbolo, como no laço principal de determinize.
+    Conjuntos iguais são devolvidos como o mesmo objeto, o que os serializa
+    uma única vez entre processos.
+    """
+    interned = {}
+    expanded = []
+    for subset in subsets:
+        moves = afnd.get_moves(subset)
+        successors = []
+        for symbol in sorted(moves):
+            closure = set()
+            for state in moves[symbol]:
+                closure.update(afnd.get_epsilon_closure(state))
+            if closure:
+                closure = frozenset(closure)
+                successors.append((symbol, interned.setdefault(closure, closure)))
+        expanded.append(successors)
+    return expanded
+
+
+def _expand_in_worker(subsets):
+    return _expand_subsets(_worker_afnd, subsets)
+
+
+def determinize_parallel(afnd, workers=None, compact=None, max_states=None, max_transitions=None,
+                         max_memory=None):
+    """
+    Variante de determinize que processa a construção de subconjuntos nível
+    a nível: os movimentos e ε-fechamentos de todos os conjuntos da fronteira
+    são calculados em lotes em um conjunto de processos, e os conjuntos
+    descobertos são deduplicados e numerados no processo principal, na ordem
+    da fronteira e dos símbolos. Como a fila de determinize também percorre
+    os estados nessa ordem, o AFD resultante (numeração, transições e estados
+    finais) é idêntico ao da versão sequencial. Fronteiras com menos de
+    PARALLEL_MIN_FRONTIER conjuntos são expandidas no próprio processo.
+    """
+    print("Iniciando determinização paralela...")
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    symbols = sorted(afnd.alphabet - {EPSILON})
+    if compact is None:
+        compact = isinstance(afnd, CompactNFA)
+    afd = CompactDFA(symbols) if compact else Automaton()
+    
+    final_patterns = {}
+    for final_state, pattern in afnd.final_states:
+        final_patterns.setdefault(final_state, pattern)
+    
+    initial_closure = frozenset(afnd.get_epsilon_closure(afnd.initial_state))
+    state_mapping = {initial_closure: 0}
+    afd.add_state(0)
+    afd.set_initial_state(0)
+    for state in initial_closure:
+        if state in final_patterns:
+            afd.add_final_state(0, final_patterns[state])
+    
+    num_transitions = 0
+    subset_entries = len(initial_closure)
+    
+    def overflow(reason):
+        largest = heapq.nlargest(REPORTED_SUBSETS, state_mapping, key=len)
+        return DeterminizationError(f"Determinização interrompida: {reason} "
+                                    f"({len(state_mapping)} estados, {num_transitions} transições)", largest)
+    
+    pool = None
+    if workers > 1:
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(afnd,))
+        except OSError as e:
+            print(f"Aviso: determinização paralela indisponível ({e}); usando um único processo.")
+    
+    try:
+        frontier = [initial_closure]
+        while frontier:
+            if pool is not None and len(frontier) >= PARALLEL_MIN_FRONTIER:
+                # Lotes contíguos da fronteira: pool.map devolve os resultados na ordem
+                size = -(-len(frontier) // (workers * 4))
+                batches = [frontier[i:i + size] for i in range(0, len(frontier), size)]
+                expanded = [successors for batch in pool.map(_expand_in_worker, batches)
+                            for successors in batch]
+            else:
+                expanded = _expand_subsets(afnd, frontier)
+            
+            # Numeração dos conjuntos novos na mesma ordem da fila de determinize
+            next_frontier = []
+            for current_states, successors in zip(frontier, expanded):
+                current_afd_state = state_mapping[current_states]
+                for symbol, epsilon_closure in successors:
+                    next_afd_state = state_mapping.get(epsilon_closure)
+                    if next_afd_state is None:
+                        next_afd_state = state_mapping[epsilon_closure] = len(state_mapping)
+                        afd.add_state(next_afd_state)
+                        
+                        subset_entries += len(epsilon_closure)
+                        if max_states is not None and len(state_mapping) > max_states:
+                            raise overflow(f"limite de {max_states} estados excedido")
+                        
+                        for state in epsilon_closure:
+                            if state in final_patterns:
+                                afd.add_final_state(next_afd_state, final_patterns[state])
+                        next_frontier.append(epsilon_closure)
+                    
+                    afd.add_transition(current_afd_state, symbol, next_afd_state)
+                    
+                    num_transitions += 1
+                    if max_transitions is not None and num_transitions > max_transitions:
+                        raise overflow(f"limite de {max_transitions} transições excedido")
+                    if (max_memory is not None and
+                            subset_entries * SUBSET_ENTRY_BYTES + num_transitions * TRANSITION_BYTES > max_memory):
+                        raise overflow(f"limite estimado de {max_memory} bytes de memória excedido")
+            frontier = next_frontier
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
     
     print(f"Determinização concluída. AFD resultante tem {len(afd.states)} estados.")
-    return afd
\ No newline at end of file
+    return afd
@@ -3,6 +3,10 @@ Implementação da classe Automaton para representar um Autômato Finito.
 """
 from collections import defaultdict
 
+# Rótulo das ε-transições. A string vazia nunca coincide com um caractere da
+# entrada (ao contrário de '&', que pode aparecer em padrões como "&&" ou [^"])
+EPSILON = ''
+
 class Automaton:
     def __init__(self):
         self.states = set()          # Conjunto de estados
@@ -28,9 +32,40 @@ class Automaton:
         self.add_state(state)
         self.initial_state = state
     
-    def add_final_state(self, state):
+    def add_final_state(self, state, pattern=None):
+        """Marca state como final; com pattern, registra o par (estado, padrão)."""
         self.add_state(state)
-        self.final_states.add(state)
+        self.final_states.add(state if pattern is None else (state, pattern))
+    
+    def __getstate__(self):
+        # O defaultdict com lambda não é serializável: as transições viajam
+        # como dicionários comuns (por exemplo, entre processos)
+        state = self.__dict__.copy()
+        state['transitions'] = {from_state: dict(transitions)
+                                for from_state, transitions in self.transitions.items()}
+        return state
+    
+    def __setstate__(self, state):
+        transitions = state.pop('transitions')
+        self.__dict__.update(state)
+        self.transitions = defaultdict(lambda: defaultdict(set))
+        for from_state, symbol_transitions in transitions.items():
+            self.transitions[from_state].update(symbol_transitions)
+    
+    def shallow_copy(self):
+        """
+        Retorna uma cópia que compartilha estados, alfabeto e transições com o
+        original (que devem ser tratados como somente leitura); apenas os
+        estados finais e o padrão são próprios da cópia.
+        """
+        copy = Automaton()
+        copy.states = self.states
+        copy.alphabet = self.alphabet
+        copy.transitions = self.transitions
+        copy.initial_state = self.initial_state
+        copy.final_states = set(self.final_states)
+        copy.pattern = self.pattern
+        return copy
     
     def get_epsilon_closure(self, state_or_states):
         """
@@ -46,7 +81,7 @@ class Automaton:
         
         while stack:
             state = stack.pop()
-            for next_state in self.transitions[state].get('&', set()):
+            for next_state in self.transitions[state].get(EPSILON, set()):
                 if next_state not in closure:
                     closure.add(next_state)
                     stack.append(next_state)
@@ -63,6 +98,39 @@ class Automaton:
             result.update(self.transitions[state].get(symbol, set()))
         return result
     
+    def get_moves(self, states):
+        """
+        Retorna um dicionário símbolo -> estados alcançáveis a partir de states,
+        para todos os símbolos de uma vez (exceto ε).
+        """
+        moves = defaultdict(set)
+        for state in states:
+            for symbol, to_states in self.transitions.get(state, {}).items():
+                if symbol != EPSILON:
+                    moves[symbol].update(to_states)
+        return moves
+    
+    def get_accepting_patterns(self, priority=None):
+        """
+        Retorna um dicionário estado -> padrão para os estados finais.
+        Quando um estado aceita mais de um padrão, vence o que aparece primeiro
+        em priority (a ordem das definições); sem priority, a ordem alfabética.
+        """
+        rank = {pattern: i for i, pattern in enumerate(priority or [])}
+        accepting = {}
+        
+        for final in self.final_states:
+            if isinstance(final, tuple):
+                state, pattern = final
+            else:
+                state, pattern = final, self.pattern
+            
+            current = accepting.get(state)
+            if current is None or (rank.get(pattern, len(rank)), pattern) < (rank.get(current, len(rank)), current):
+                accepting[state] = pattern
+        
+        return accepting
+    
     def __str__(self):
         result = []
         result.append(f"Estados: {self.states}")
@@ -73,7 +141,8 @@ class Automaton:
         
         for from_state, transitions in sorted(self.transitions.items()):
             for symbol, to_states in sorted(transitions.items()):
+                label = symbol if symbol != EPSILON else 'ε'
                 for to_state in sorted(to_states):
-                    result.append(f"  {from_state} --{symbol}--> {to_state}")
+                    result.append(f"  {from_state} --{label}--> {to_state}")
         
         return "\n".join(result)
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Medições de desempenho do analisador léxico.
+
+Uso: python benchmark.py [tamanho_inicial] [repeticoes]
+
+Casos adversariais de recuo (backtracking): com os padrões a e a*b, a entrada
+"aaaa...a" faz o modo padrão reler todo o restante do texto a cada token
+(tempo quadrático), enquanto o modo de tempo linear memoriza os pares
+(estado, posição) que já falharam.
+
+Memória dos autômatos: compara Automaton (dicionários de conjuntos) com
+CompactNFA/CompactDFA (vetores de inteiros) em uma gramática com muitos padrões.
+"""
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+from lexical_analyzer import LexicalAnalyzer
+from afnd_to_afd import determinize
+
+
+def build_analyzer(definitions, **options):
+    """Constrói um analisador a partir de uma lista de (nome, regex), sem mensagens de progresso."""
+    analyzer = LexicalAnalyzer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for pattern_name, regex in definitions:
+            analyzer.add_pattern(pattern_name, regex)
+        analyzer.generate_lexical_analyzer(**options)
+    return analyzer
+
+
+def time_analysis(analyzer, text):
+    start = time.perf_counter()
+    analyzer.token_analyzer.analyze(text)
+    return time.perf_counter() - start
+
+
+def backtracking_benchmark(initial_size=1000, steps=5):
+    """Compara o modo padrão e o de tempo linear em entradas que forçam recuos longos."""
+    definitions = [("a", "a"), ("ab", "a*b")]
+    default = build_analyzer(definitions)
+    linear = build_analyzer(definitions, linear_time=True)
+
+    print("Recuo adversarial: padrões a | a*b, entrada 'a' * n")
+    print(f"{'n':>10} {'padrão (s)':>12} {'linear (s)':>12} {'linear/n (µs)':>15}")
+
+    size = initial_size
+    for _ in range(steps):
+        text = "a" * size
+        default_time = time_analysis(default, text)
+        linear_time = time_analysis(linear, text)
+        print(f"{size:>10} {default_time:>12.4f} {linear_time:>12.4f} {linear_time / size * 1e6:>15.3f}")
+        size *= 2
+
+
+def traced_memory(build):
+    """Executa build() e retorna (resultado, bytes alocados que permanecem em uso)."""
+    tracemalloc.start()
+    try:
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def automaton_memory_benchmark(num_patterns=150):
+    """Compara a memória do AFND combinado e do AFD nas duas representações."""
+    definitions = [(f"kw{i}", f"k{i}x[a-z]*y{i}") for i in range(num_patterns)]
+    definitions += [("id", "[a-zA-Z_][a-zA-Z0-9_]*"), ("num", "[0-9]+")]
+
+    print(f"\nMemória dos autômatos: {len(definitions)} padrões")
+    print(f"{'representação':>15} {'AFND (KiB)':>12} {'AFD (KiB)':>12} {'estados AFD':>12}")
+    for compact in (False, True):
+        analyzer = LexicalAnalyzer(compact=compact)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for pattern_name, regex in definitions:
+                analyzer.add_pattern(pattern_name, regex)
+            nfa, nfa_bytes = traced_memory(analyzer.combine_automata)
+            dfa, dfa_bytes = traced_memory(lambda: determinize(nfa))
+        name = "compacta" if compact else "Automaton"
+        print(f"{name:>15} {nfa_bytes / 1024:>12.1f} {dfa_bytes / 1024:>12.1f} {len(dfa.states):>12}")
+
+
+def main():
+    initial_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    backtracking_benchmark(initial_size, steps)
+    automaton_memory_benchmark()
+
+
+if __name__ == "__main__":
+    main()
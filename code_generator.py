@@ -0,0 +1,249 @@
+"""
+Geração de código Python especializado a partir do AFD determinizado.
+
+Assim como o lex/flex, o gerador emite um módulo independente, sem dependência
+da classe Automaton: cada estado vira um trecho de código com os testes de
+caractere compilados em comparações de intervalos e as ações de aceitação
+embutidas. O módulo gerado pode ser importado normalmente (e é cacheado em
+.pyc como qualquer outro módulo).
+"""
+import importlib.util
+import os
+import re
+from automaton import EPSILON
+from transition_table import TransitionTable
+
+# Número máximo de intervalos testados em sequência antes de dividir a busca
+LINEAR_RANGE_LIMIT = 3
+
+# Com um layout por frequência de visita, quantos dos estados mais visitados
+# são testados um a um antes da busca binária pelos demais
+HOT_DISPATCH_STATES = 4
+
+
+def _char_ranges(transitions):
+    """
+    Agrupa as transições de um estado em intervalos de códigos de caractere.
+    Retorna uma lista ordenada de tuplas (início, fim, destino).
+    """
+    codes = []
+    for symbol, to_states in transitions.items():
+        if symbol == EPSILON or not to_states or len(symbol) != 1:
+            continue
+        codes.append((ord(symbol), next(iter(to_states))))
+    codes.sort()
+
+    ranges = []
+    for code, target in codes:
+        if ranges and ranges[-1][1] == code - 1 and ranges[-1][2] == target:
+            ranges[-1] = (ranges[-1][0], code, target)
+        else:
+            ranges.append((code, code, target))
+    return ranges
+
+
+def _range_test(low, high):
+    if low == high:
+        return f"c == {low}"
+    return f"{low} <= c <= {high}"
+
+
+def _skip_runs(automaton, patterns, skip_patterns):
+    """
+    Retorna estado -> símbolos do laço para os estados que só levam a padrões
+    descartados; o código gerado consome essas repetições em bloco.
+    """
+    if not skip_patterns:
+        return {}
+
+    table = TransitionTable(automaton, patterns)
+    runs = {}
+    for index, live in enumerate(table.live_patterns()):
+        if live and live <= set(skip_patterns):
+            loop = table.self_loop_symbols(index)
+            if loop:
+                runs[table.state_ids[index]] = "".join(sorted(loop))
+    return runs
+
+
+def _emit_transition(lines, indent, target, accepting, runs):
+    pad = "    " * indent
+    lines.append(f"{pad}state = {target}")
+    if target in runs:
+        lines.append(f"{pad}pos = _RUN_{target}(text, pos + 1).end() - 1")
+    if target in accepting:
+        lines.append(f"{pad}last_end = pos + 1")
+        lines.append(f"{pad}last_pattern = {accepting[target]!r}")
+
+
+def _emit_ranges(lines, indent, ranges, accepting, runs):
+    """Emite uma árvore de decisão binária sobre os intervalos de caracteres."""
+    pad = "    " * indent
+
+    if not ranges:
+        lines.append(f"{pad}break")
+        return
+
+    if len(ranges) <= LINEAR_RANGE_LIMIT:
+        for i, (low, high, target) in enumerate(ranges):
+            keyword = "if" if i == 0 else "elif"
+            lines.append(f"{pad}{keyword} {_range_test(low, high)}:")
+            _emit_transition(lines, indent + 1, target, accepting, runs)
+        lines.append(f"{pad}else:")
+        lines.append(f"{pad}    break")
+        return
+
+    middle = len(ranges) // 2
+    lines.append(f"{pad}if c < {ranges[middle][0]}:")
+    _emit_ranges(lines, indent + 1, ranges[:middle], accepting, runs)
+    lines.append(f"{pad}else:")
+    _emit_ranges(lines, indent + 1, ranges[middle:], accepting, runs)
+
+
+def _emit_states(lines, indent, states, automaton, accepting, runs):
+    """Emite o despacho por estado como uma busca binária sobre os números dos estados."""
+    pad = "    " * indent
+
+    if len(states) == 1:
+        state = states[0]
+        lines.append(f"{pad}# estado {state}")
+        _emit_ranges(lines, indent, _char_ranges(automaton.transitions.get(state, {})), accepting, runs)
+        return
+
+    middle = len(states) // 2
+    lines.append(f"{pad}if state < {states[middle]}:")
+    _emit_states(lines, indent + 1, states[:middle], automaton, accepting, runs)
+    lines.append(f"{pad}else:")
+    _emit_states(lines, indent + 1, states[middle:], automaton, accepting, runs)
+
+
+def _emit_dispatch(lines, indent, states, automaton, accepting, runs, hot):
+    """Testa um a um os hot primeiros estados e despacha os demais por busca binária."""
+    pad = "    " * indent
+    for i, state in enumerate(states[:hot]):
+        lines.append(f"{pad}{'if' if i == 0 else 'elif'} state == {state}:")
+        _emit_ranges(lines, indent + 1, _char_ranges(automaton.transitions.get(state, {})), accepting, runs)
+
+    cold = states[hot:]
+    if not hot:
+        _emit_states(lines, indent, cold, automaton, accepting, runs)
+    elif cold:
+        lines.append(f"{pad}else:")
+        _emit_states(lines, indent + 1, cold, automaton, accepting, runs)
+
+
+def generate_scanner_source(automaton, patterns, reserved_words=(), skip_patterns=(), layout=None):
+    """
+    Gera o código-fonte de um módulo de análise léxica a partir do AFD.
+    O módulo expõe match(text, pos) -> (fim, padrão) | None e analyze(text),
+    que reproduz a saída de TokenAnalyzer.analyze.
+
+    layout, se dado, é o layout por frequência de visita do AFD (ver
+    LexicalAnalyzer.profile_layout): fica gravado em STATE_LAYOUT e os
+    estados 0, 1, ... (os mais visitados) são testados primeiro.
+    """
+    accepting = automaton.get_accepting_patterns(patterns)
+    states = sorted(automaton.states)
+    runs = _skip_runs(automaton, patterns, skip_patterns)
+
+    lines = [
+        '"""',
+        "Analisador léxico gerado automaticamente a partir do AFD determinizado.",
+        "Não edite este arquivo manualmente.",
+        '"""',
+        "import re",
+        "",
+        f"PATTERNS = {tuple(patterns)!r}",
+        f"RESERVED_WORDS = frozenset({sorted(reserved_words)!r})",
+        f"SKIP_PATTERNS = frozenset({sorted(skip_patterns)!r})",
+        "",
+        "# Estado original (de determinize) de cada estado, do mais ao menos visitado",
+        f"STATE_LAYOUT = {tuple(layout) if layout else None!r}",
+        "",
+        "# Descarte padrão quando não há padrões %skip",
+        "_DEFAULT_SKIP = re.compile(r'(?:\\s+|//[^\\n]*)+').match",
+    ]
+    for state, loop in sorted(runs.items()):
+        lines.append(f"_RUN_{state} = re.compile({'[' + re.escape(loop) + ']*'!r}).match")
+    lines.extend([
+        "",
+        "",
+        "def match(text, pos):",
+        '    """Retorna (fim, padrão) do maior token iniciado em pos, ou None."""',
+        "    n = len(text)",
+        "    start = pos",
+        f"    state = {automaton.initial_state}",
+        "    last_end = -1",
+        "    last_pattern = None",
+        "    while pos < n:",
+        "        c = ord(text[pos])",
+    ])
+    _emit_dispatch(lines, 2, states, automaton, accepting, runs, HOT_DISPATCH_STATES if layout else 0)
+    lines.extend([
+        "        pos += 1",
+        "    if last_end > start:",
+        "        return last_end, last_pattern",
+        "    return None",
+        "",
+        "",
+        "def analyze(text, symbols=None):",
+        '    """',
+        "    Analisa o texto e retorna a lista de tokens no formato <lexema, padrão>.",
+        "    symbols é a tabela de símbolos (lexema -> padrão), atualizada no lugar.",
+        '    """',
+        "    if symbols is None:",
+        "        symbols = {}",
+        "    for word in RESERVED_WORDS:",
+        "        symbols[word] = 'PR'",
+        "    tokens = []",
+        "    append = tokens.append",
+        "    n = len(text)",
+        "    position = 0",
+        "    while position < n:",
+        "        if not SKIP_PATTERNS:",
+        "            skipped = _DEFAULT_SKIP(text, position)",
+        "            if skipped:",
+        "                position = skipped.end()",
+        "                if position >= n:",
+        "                    break",
+        "        token = match(text, position)",
+        "        if token:",
+        "            end, pattern = token",
+        "            if pattern in SKIP_PATTERNS:",
+        "                position = end",
+        "                continue",
+        "            lexeme = text[position:end]",
+        "            if lexeme in RESERVED_WORDS:",
+        "                symbols[lexeme] = 'PR'",
+        "            elif lexeme not in symbols:",
+        "                symbols[lexeme] = pattern",
+        "            append(f'<{lexeme}, {symbols[lexeme]}>')",
+        "            position = end",
+        "        else:",
+        "            append(f'<{text[position]}, erro!>')",
+        "            position += 1",
+        "    return tokens",
+        "",
+    ])
+    return "\n".join(lines)
+
+
+def write_scanner_module(automaton, patterns, filename, reserved_words=(), skip_patterns=(), layout=None):
+    """Grava o módulo gerado em filename."""
+    directory = os.path.dirname(filename)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(generate_scanner_source(automaton, patterns, reserved_words, skip_patterns, layout))
+
+    print(f"Analisador gerado salvo em {filename}")
+    return filename
+
+
+def load_scanner_module(filename, module_name="generated_scanner"):
+    """Importa um módulo gerado a partir do caminho do arquivo."""
+    spec = importlib.util.spec_from_file_location(module_name, filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
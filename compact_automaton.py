@@ -0,0 +1,329 @@
+"""
+Representação compacta de autômatos finitos.
+
+Automaton guarda as transições em dicionários aninhados de conjuntos (um
+conjunto por transição, mesmo em AFDs) e os estados finais como tuplas
+(estado, padrão). As classes deste módulo numeram os estados de forma contígua
+a partir de 0 e guardam transições e estados finais em vetores de inteiros
+(array), com __slots__ para dispensar o dicionário de atributos:
+
+- CompactDFA: tabela linear estados × símbolos, com -1 indicando ausência de transição.
+- CompactNFA: lista de arestas (origem, símbolo, destino), que admite vários
+  destinos e ε-transições, indexada por estado de origem sob demanda.
+
+Ambas oferecem a interface de Automaton (states, alphabet, transitions,
+final_states, add_transition, get_epsilon_closure, get_move...), de modo que
+funcionam com determinize, combine_automata e as rotinas de exibição. As visões
+states, transitions e final_states são montadas a partir dos vetores quando lidas.
+"""
+from array import array
+from collections import defaultdict
+from collections.abc import Mapping
+from automaton import EPSILON
+
+NO_TRANSITION = -1
+
+
+class _CompactAutomaton:
+    __slots__ = ('num_states', 'initial_state', 'pattern', 'accept_states', 'accept_patterns',
+                 'pattern_names', 'pattern_ids')
+
+    def __init__(self):
+        self.num_states = 0
+        self.initial_state = None
+        self.pattern = None                 # Padrão associado ao autômato
+        # Estados finais: pares paralelos (estado, índice do padrão; -1 = sem padrão)
+        self.accept_states = array('i')
+        self.accept_patterns = array('i')
+        self.pattern_names = []
+        self.pattern_ids = {}
+
+    @property
+    def states(self):
+        return range(self.num_states)
+
+    def add_state(self, state):
+        if state >= self.num_states:
+            self._grow(state + 1)
+
+    def _grow(self, num_states):
+        self.num_states = num_states
+
+    def set_initial_state(self, state):
+        self.add_state(state)
+        self.initial_state = state
+
+    def add_final_state(self, state, pattern=None):
+        self.add_state(state)
+        if pattern is None:
+            pattern_id = -1
+        else:
+            pattern_id = self.pattern_ids.setdefault(pattern, len(self.pattern_names))
+            if pattern_id == len(self.pattern_names):
+                self.pattern_names.append(pattern)
+        self.accept_states.append(state)
+        self.accept_patterns.append(pattern_id)
+
+    @property
+    def final_states(self):
+        names = self.pattern_names
+        return {(state, names[pattern_id]) if pattern_id >= 0 else state
+                for state, pattern_id in zip(self.accept_states, self.accept_patterns)}
+
+    def get_accepting_patterns(self, priority=None):
+        """Mesma semântica de Automaton.get_accepting_patterns."""
+        rank = {pattern: i for i, pattern in enumerate(priority or [])}
+        accepting = {}
+
+        for state, pattern_id in zip(self.accept_states, self.accept_patterns):
+            pattern = self.pattern_names[pattern_id] if pattern_id >= 0 else self.pattern
+            current = accepting.get(state)
+            if current is None or (rank.get(pattern, len(rank)), pattern) < (rank.get(current, len(rank)), current):
+                accepting[state] = pattern
+
+        return accepting
+
+    def _copy_accept_info(self, automaton):
+        """Copia o estado inicial e os estados finais de um Automaton já renumerado."""
+        self.set_initial_state(automaton.initial_state)
+        self.pattern = automaton.pattern
+        for final in sorted(automaton.final_states, key=repr):
+            if isinstance(final, tuple):
+                self.add_final_state(*final)
+            else:
+                self.add_final_state(final)
+
+    def __str__(self):
+        result = [f"Estados: {self.num_states}",
+                  f"Alfabeto: {set(self.alphabet)}",
+                  f"Estado inicial: {self.initial_state}",
+                  f"Estados finais: {self.final_states}",
+                  "Transições:"]
+
+        for from_state, transitions in self.transitions.items():
+            for symbol, to_states in sorted(transitions.items()):
+                label = symbol if symbol != EPSILON else 'ε'
+                for to_state in sorted(to_states):
+                    result.append(f"  {from_state} --{label}--> {to_state}")
+
+        return "\n".join(result)
+
+
+class _TransitionView(Mapping):
+    """Visão somente leitura estado -> {símbolo: {destinos}}, como em Automaton.transitions."""
+    __slots__ = ('automaton',)
+
+    def __init__(self, automaton):
+        self.automaton = automaton
+
+    def __getitem__(self, state):
+        if not isinstance(state, int) or not 0 <= state < self.automaton.num_states:
+            raise KeyError(state)
+        return self.automaton._state_transitions(state)
+
+    def __iter__(self):
+        return iter(range(self.automaton.num_states))
+
+    def __len__(self):
+        return self.automaton.num_states
+
+
+class CompactDFA(_CompactAutomaton):
+    """AFD com alfabeto fixo e tabela linear de transições (estado * len(symbols) + símbolo)."""
+    __slots__ = ('symbols', 'symbol_index', 'alphabet', 'table')
+
+    def __init__(self, alphabet):
+        super().__init__()
+        self.symbols = tuple(sorted(set(alphabet) - {EPSILON}))
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.alphabet = frozenset(self.symbols)
+        self.table = array('i')
+
+    @classmethod
+    def from_automaton(cls, automaton):
+        """Converte um AFD representado por Automaton (estados inteiros a partir de 0)."""
+        dfa = cls(automaton.alphabet)
+        dfa.add_state(max(automaton.states, default=-1))
+        for from_state, transitions in automaton.transitions.items():
+            for symbol, to_states in transitions.items():
+                for to_state in to_states:
+                    dfa.add_transition(from_state, symbol, to_state)
+        dfa._copy_accept_info(automaton)
+        return dfa
+
+    def _grow(self, num_states):
+        self.table.extend([NO_TRANSITION] * ((num_states - self.num_states) * len(self.symbols)))
+        self.num_states = num_states
+
+    def add_symbol(self, symbol):
+        if symbol not in self.symbol_index:
+            raise ValueError(f"Símbolo fora do alfabeto do AFD: {symbol!r}")
+
+    def add_transition(self, from_state, symbol, to_state):
+        index = self.symbol_index.get(symbol)
+        if index is None:
+            raise ValueError(f"Símbolo fora do alfabeto do AFD: {symbol!r}")
+        self.add_state(max(from_state, to_state))
+        self.table[from_state * len(self.symbols) + index] = to_state
+
+    def next_state(self, state, symbol):
+        """Retorna o destino de state com symbol, ou -1 se não houver transição."""
+        index = self.symbol_index.get(symbol)
+        if index is None:
+            return NO_TRANSITION
+        return self.table[state * len(self.symbols) + index]
+
+    @property
+    def transitions(self):
+        return _TransitionView(self)
+
+    def _state_transitions(self, state):
+        width = len(self.symbols)
+        row = self.table[state * width:(state + 1) * width]
+        return {self.symbols[i]: {target} for i, target in enumerate(row) if target != NO_TRANSITION}
+
+    def get_epsilon_closure(self, state_or_states):
+        # Um AFD não tem ε-transições
+        if isinstance(state_or_states, int):
+            return {state_or_states}
+        return set(state_or_states)
+
+    def get_move(self, states, symbol):
+        result = set()
+        for state in states:
+            target = self.next_state(state, symbol)
+            if target != NO_TRANSITION:
+                result.add(target)
+        return result
+
+    def get_moves(self, states):
+        moves = defaultdict(set)
+        width = len(self.symbols)
+        for state in states:
+            row = self.table[state * width:(state + 1) * width]
+            for i, target in enumerate(row):
+                if target != NO_TRANSITION:
+                    moves[self.symbols[i]].add(target)
+        return moves
+
+
+class CompactNFA(_CompactAutomaton):
+    """AFND com ε-transições, guardado como vetores paralelos de arestas."""
+    __slots__ = ('symbols', 'symbol_index', 'edge_from', 'edge_symbol', 'edge_to', '_offsets', '_order')
+
+    def __init__(self):
+        super().__init__()
+        self.symbols = []
+        self.symbol_index = {}
+        self.edge_from = array('i')
+        self.edge_symbol = array('i')
+        self.edge_to = array('i')
+        # Índice por origem (ordenação por contagem), refeito após novas arestas
+        self._offsets = None
+        self._order = None
+
+    @classmethod
+    def from_automaton(cls, automaton):
+        """Converte um Automaton com estados inteiros a partir de 0."""
+        nfa = cls()
+        nfa.add_state(max(automaton.states, default=-1))
+        for symbol in sorted(automaton.alphabet):
+            nfa.add_symbol(symbol)
+        for from_state, transitions in automaton.transitions.items():
+            for symbol, to_states in transitions.items():
+                for to_state in sorted(to_states):
+                    nfa.add_transition(from_state, symbol, to_state)
+        nfa._copy_accept_info(automaton)
+        return nfa
+
+    @property
+    def alphabet(self):
+        return set(self.symbols)
+
+    def add_symbol(self, symbol):
+        index = self.symbol_index.get(symbol)
+        if index is None:
+            index = self.symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return index
+
+    def add_transition(self, from_state, symbol, to_state):
+        self.add_state(max(from_state, to_state))
+        self.edge_from.append(from_state)
+        self.edge_symbol.append(self.add_symbol(symbol))
+        self.edge_to.append(to_state)
+        self._offsets = None
+
+    def _edges(self, state):
+        """Retorna as posições (em edge_*) das arestas que saem de state."""
+        if self._offsets is None:
+            counts = [0] * (self.num_states + 1)
+            for from_state in self.edge_from:
+                counts[from_state + 1] += 1
+            for i in range(self.num_states):
+                counts[i + 1] += counts[i]
+            order = array('i', [0] * len(self.edge_from))
+            cursor = counts[:]
+            for edge, from_state in enumerate(self.edge_from):
+                order[cursor[from_state]] = edge
+                cursor[from_state] += 1
+            self._offsets = array('i', counts)
+            self._order = order
+        return self._order[self._offsets[state]:self._offsets[state + 1]]
+
+    @property
+    def transitions(self):
+        return _TransitionView(self)
+
+    def _state_transitions(self, state):
+        result = {}
+        for edge in self._edges(state):
+            result.setdefault(self.symbols[self.edge_symbol[edge]], set()).add(self.edge_to[edge])
+        return result
+
+    def get_epsilon_closure(self, state_or_states):
+        if isinstance(state_or_states, int):
+            states = {state_or_states}
+        else:
+            states = set(state_or_states)
+
+        epsilon = self.symbol_index.get(EPSILON)
+        closure = set(states)
+        if epsilon is None:
+            return closure
+
+        edges = self._edges
+        edge_symbol = self.edge_symbol
+        edge_to = self.edge_to
+        stack = list(states)
+        while stack:
+            for edge in edges(stack.pop()):
+                if edge_symbol[edge] == epsilon:
+                    next_state = edge_to[edge]
+                    if next_state not in closure:
+                        closure.add(next_state)
+                        stack.append(next_state)
+
+        return closure
+
+    def get_move(self, states, symbol):
+        index = self.symbol_index.get(symbol)
+        if index is None:
+            return set()
+
+        edges = self._edges
+        edge_symbol = self.edge_symbol
+        edge_to = self.edge_to
+        return {edge_to[edge] for state in states for edge in edges(state) if edge_symbol[edge] == index}
+
+    def get_moves(self, states):
+        epsilon = self.symbol_index.get(EPSILON)
+        edge_symbol = self.edge_symbol
+        edge_to = self.edge_to
+        by_index = defaultdict(set)
+        for state in states:
+            for edge in self._edges(state):
+                symbol = edge_symbol[edge]
+                if symbol != epsilon:
+                    by_index[symbol].add(edge_to[edge])
+        return {self.symbols[symbol]: targets for symbol, targets in by_index.items()}
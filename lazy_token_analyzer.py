@@ -0,0 +1,126 @@
+"""
+Analisador de tokens com AFD preguiçoso (construído sob demanda).
+
+Usado quando a determinização completa excede os limites configurados: os
+estados do AFD (conjuntos de estados do AFND combinado) são criados apenas
+quando a varredura os alcança e ficam em um cache limitado. Quando o cache
+enche, ele é esvaziado entre dois tokens e reconstruído a partir do texto
+restante, como no RE2. A memória fica limitada pelo tamanho do cache e o
+tempo por caractere pelo tamanho do AFND, mesmo para gramáticas cujo AFD
+completo teria um número exponencial de estados.
+"""
+from token_analyzer import TokenAnalyzer
+from transition_table import DEAD_STATE
+
+# Quantidade máxima de estados do AFD mantidos em cache
+DEFAULT_CACHE_STATES = 10000
+
+# Marca de transição ainda não calculada
+_MISSING = object()
+
+
+class LazyTokenAnalyzer(TokenAnalyzer):
+    def __init__(self, nfa, symbol_table, patterns=None, skip_patterns=None,
+                 cache_states=DEFAULT_CACHE_STATES, max_errors=None, default_skip=True, **options):
+        if (options.get('linear_time') or options.get('compressed') or options.get('profile')
+                or options.get('error_recovery', 'char') != 'char'):
+            raise ValueError("LazyTokenAnalyzer suporta apenas a recuperação de erros 'char'")
+
+        # TokenAnalyzer.__init__ não é chamado: não há AFD completo para tabular,
+        # e os pré-filtros calculados a partir dele ficam desativados
+        self._init_options(nfa, symbol_table, patterns, skip_patterns,
+                           max_errors=max_errors, default_skip=default_skip)
+        self.cache_states = cache_states
+
+        # Padrão aceito por cada estado final do AFND, com a prioridade das definições
+        rank = {pattern: i for i, pattern in enumerate(self.patterns)}
+        self.final_ranks = {}
+        for state, pattern in nfa.final_states:
+            candidate = (rank.get(pattern, len(rank)), pattern)
+            if state not in self.final_ranks or candidate < self.final_ranks[state]:
+                self.final_ranks[state] = candidate
+
+        self.initial_subset = frozenset(nfa.get_epsilon_closure(nfa.initial_state))
+        self._reset_cache()
+
+    def with_symbol_table(self, symbol_table):
+        # O cache de estados é alterado durante a varredura: cada cópia tem o seu
+        analyzer = super().with_symbol_table(symbol_table)
+        analyzer._reset_cache()
+        return analyzer
+
+    def _reset_cache(self):
+        self.subsets = []        # id do estado -> conjunto de estados do AFND
+        self.subset_ids = {}
+        self.accept = []         # id do estado -> padrão aceito (ou None)
+        self.cache = {}          # (id, caractere) -> id do próximo estado (ou None)
+        self._subset_id(self.initial_subset)
+
+    def _subset_id(self, subset):
+        state = self.subset_ids.get(subset)
+        if state is None:
+            state = self.subset_ids[subset] = len(self.subsets)
+            self.subsets.append(subset)
+            ranks = [self.final_ranks[s] for s in subset if s in self.final_ranks]
+            self.accept.append(min(ranks)[1] if ranks else None)
+        return state
+
+    def _next_subset(self, state, char):
+        """Calcula (e guarda em cache) o próximo estado do AFD, ou None."""
+        targets = self.automaton.get_move(self.subsets[state], char)
+        next_state = None
+        if targets:
+            next_state = self._subset_id(frozenset(self.automaton.get_epsilon_closure(targets)))
+        self.cache[(state, char)] = next_state
+        return next_state
+
+    def _start_state(self):
+        """
+        Estado inicial de um novo token. O cache só é esvaziado aqui, entre
+        tokens, para manter os ids da varredura em andamento (inclusive a
+        retomada pela análise em fluxo).
+        """
+        if len(self.subsets) > self.cache_states:
+            self._reset_cache()
+        return 0
+
+    def _match(self, text, start_pos):
+        """
+        Executa o AFD preguiçoso a partir de start_pos pelo princípio do maior
+        token possível. Retorna (fim, padrão) ou None.
+        """
+        _, _, last_end, last_pattern = self._scan(text, start_pos, self._start_state(), -1, None)
+
+        if last_end > start_pos:
+            return (last_end, last_pattern)
+
+        return None
+
+    def _scan(self, text, pos, state, last_end, last_pattern):
+        """
+        Variante de TokenAnalyzer._scan sobre o AFD preguiçoso: continua a
+        execução a partir de (estado, pos), criando os estados alcançados, e
+        retorna (estado, pos, último_fim, último_padrão), com estado DEAD_STATE
+        quando a varredura parou por falta de transição.
+        """
+        cache = self.cache
+        accept = self.accept
+        length = len(text)
+
+        while pos < length:
+            char = text[pos]
+            next_state = cache.get((state, char), _MISSING)
+            if next_state is _MISSING:
+                next_state = self._next_subset(state, char)
+            if next_state is None:
+                return DEAD_STATE, pos, last_end, last_pattern
+
+            state = next_state
+            pos += 1
+
+            pattern = accept[state]
+            if pattern is not None:
+                last_end = pos
+                last_pattern = pattern
+
+        return state, pos, last_end, last_pattern
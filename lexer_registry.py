@@ -0,0 +1,94 @@
+"""
+Registro de analisadores léxicos com componentes compilados compartilhados.
+
+Gramáticas diferentes costumam repetir as mesmas definições (id, num, op...).
+O registro guarda o AFD de cada expressão regular, indexado pela sua forma
+normalizada, e o reaproveita em todos os analisadores; analisadores com as
+mesmas definições são construídos uma única vez. Memória e tempo de
+construção passam a crescer com o número de padrões distintos, e não com
+gramáticas × padrões.
+
+Cada chamada de get_lexer recebe o seu próprio LexicalAnalyzer (ver
+LexicalAnalyzer.share): os autômatos e a tabela de transições são
+compartilhados, mas a tabela de símbolos e os resultados das análises não.
+"""
+import contextlib
+import io
+from re_to_afd import RegexToAFD, remove_unescaped_spaces, DEFAULT_STATE_BUDGET
+from lexical_analyzer import LexicalAnalyzer, read_regex_definitions
+
+
+def normalize_regex(regex):
+    """Forma canônica da expressão usada como chave do cache (sem espaços não escapados)."""
+    return remove_unescaped_spaces(regex.strip())
+
+
+class LexerRegistry:
+    def __init__(self, verbose=False):
+        self.pattern_cache = {}   # (regex normalizada, utf8) -> AFD (somente leitura)
+        self.lexers = {}          # assinatura das definições -> LexicalAnalyzer (modelo, nunca usado diretamente)
+        self.verbose = verbose
+        self.pattern_hits = 0
+        self.lexer_hits = 0
+
+    def compile_pattern(self, regex, utf8=False, state_budget=DEFAULT_STATE_BUDGET, **limits):
+        """
+        Retorna o AFD da expressão, compilando-o apenas na primeira vez.
+        limits (max_states, max_transitions, max_memory) valem para a
+        compilação; se excedidos, RegexToAFD levanta DeterminizationError.
+        """
+        key = (normalize_regex(regex), utf8)
+        automaton = self.pattern_cache.get(key)
+        if automaton is None:
+            automaton = RegexToAFD(utf8=utf8, state_budget=state_budget, **limits).convert(key[0])
+            self.pattern_cache[key] = automaton
+        else:
+            self.pattern_hits += 1
+        return automaton
+
+    def get_lexer(self, definitions_file, **options):
+        """
+        Retorna um analisador léxico (já gerado) para o arquivo de definições.
+        Arquivos com as mesmas definições compartilham os autômatos e a tabela
+        de transições; cada analisador retornado tem a sua tabela de símbolos.
+        """
+        with open(definitions_file, 'r') as file:
+            definitions = list(read_regex_definitions(file))
+        return self.get_lexer_from_definitions(definitions, **options)
+
+    def get_lexer_from_definitions(self, definitions, **options):
+        """definitions é uma lista de tuplas (nome, regex, skip), na ordem de prioridade."""
+        signature = (tuple((name, normalize_regex(regex), skip) for name, regex, skip in definitions),
+                     tuple(sorted(options.items())))
+
+        analyzer = self.lexers.get(signature)
+        if analyzer is not None:
+            self.lexer_hits += 1
+            return analyzer.share()
+
+        if not definitions:
+            raise ValueError("Nenhum padrão válido nas definições")
+
+        # Os limites da determinização valem também para o AFD de cada expressão
+        limits = {name: options[name] for name in ('max_states', 'max_transitions', 'max_memory')
+                  if name in options}
+        analyzer = LexicalAnalyzer(registry=self, **limits)
+        quiet = contextlib.redirect_stdout(io.StringIO()) if not self.verbose else contextlib.nullcontext()
+        with quiet:
+            for pattern_name, regex, skip in definitions:
+                analyzer.add_definition(pattern_name, regex, skip)
+
+            if not analyzer.generate_lexical_analyzer(**options):
+                raise ValueError("Falha ao gerar o analisador léxico")
+
+        self.lexers[signature] = analyzer
+        return analyzer.share()
+
+    def stats(self):
+        """Resumo do reaproveitamento de componentes."""
+        return {
+            'unique_patterns': len(self.pattern_cache),
+            'pattern_hits': self.pattern_hits,
+            'unique_lexers': len(self.lexers),
+            'lexer_hits': self.lexer_hits,
+        }
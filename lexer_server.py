@@ -0,0 +1,248 @@
+"""
+Servidor de longa duração para análise léxica via socket Unix.
+
+O servidor carrega um ou mais analisadores léxicos uma única vez (ER → AFD →
+união → determinização) e atende pedidos de análise por um socket de domínio
+Unix, evitando pagar a inicialização do interpretador e a reconstrução dos
+autômatos a cada execução. Um laço asyncio recebe os pedidos e as varreduras,
+que são limitadas por CPU, são executadas em um conjunto de processos.
+
+Protocolo (todos os inteiros em big-endian):
+    quadro   = tamanho (u32) + corpo
+    pedido   = operação (u8) + tamanho do nome (u16) + nome (UTF-8) + texto (UTF-8)
+    resposta = situação (u8: 0 = ok, 1 = erro) + conteúdo (UTF-8)
+
+Operações: OP_TOKENIZE devolve os tokens separados por '\\n'; OP_LIST devolve
+os nomes dos analisadores carregados, também separados por '\\n'.
+
+Uso:
+    python lexer_server.py serve <socket> <nome>=<definicoes.txt> [...]
+    python lexer_server.py tokenize <socket> <nome> <arquivo_teste>
+"""
+import asyncio
+import os
+import socket
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from lexer_registry import LexerRegistry
+from symbol_table import SymbolTable
+
+OP_TOKENIZE = 1
+OP_LIST = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+FRAME_HEADER = struct.Struct('>I')
+REQUEST_HEADER = struct.Struct('>BH')
+
+# Maior quadro aceito (protege o servidor de tamanhos corrompidos)
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+# Analisadores carregados em cada processo de trabalho
+_worker_lexers = {}
+
+
+def build_lexers(definitions):
+    """
+    Constrói os analisadores léxicos a partir dos arquivos de definições. Um
+    registro comum compartilha os AFDs de padrões repetidos entre gramáticas.
+    """
+    registry = LexerRegistry()
+    return {name: registry.get_lexer(definitions_file) for name, definitions_file in definitions.items()}
+
+
+def _init_worker(definitions):
+    _worker_lexers.update(build_lexers(definitions))
+
+
+def tokenize_with(analyzer, text):
+    """
+    Analisa o texto com uma tabela de símbolos nova (contendo apenas as palavras
+    reservadas), de modo que cada pedido produza a mesma saída de uma execução
+    isolada de main.py.
+    """
+    symbol_table = SymbolTable()
+    for word in analyzer.symbol_table.reserved_words:
+        symbol_table.add_reserved_word(word)
+
+    token_analyzer = analyzer.token_analyzer
+    token_analyzer.symbol_table = symbol_table
+    return token_analyzer.analyze(text)
+
+
+def _worker_tokenize(name, text):
+    return tokenize_with(_worker_lexers[name], text)
+
+
+def encode_frame(body):
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+def encode_request(operation, name="", text=""):
+    name_bytes = name.encode('utf-8')
+    return encode_frame(REQUEST_HEADER.pack(operation, len(name_bytes)) + name_bytes + text.encode('utf-8'))
+
+
+def decode_request(body):
+    operation, name_length = REQUEST_HEADER.unpack_from(body)
+    offset = REQUEST_HEADER.size
+    name = body[offset:offset + name_length].decode('utf-8')
+    text = body[offset + name_length:].decode('utf-8')
+    return operation, name, text
+
+
+class LexerServer:
+    def __init__(self, socket_path, definitions, workers=None):
+        """
+        definitions mapeia o nome de cada analisador ao seu arquivo de definições.
+        workers é o número de processos de varredura (padrão: número de CPUs).
+        """
+        self.socket_path = socket_path
+        self.definitions = dict(definitions)
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+        self.server = None
+
+    async def start(self):
+        print(f"Carregando {len(self.definitions)} analisador(es) em {self.workers} processo(s)...")
+        # Validar as definições antes de aceitar conexões
+        build_lexers(self.definitions)
+        for name, definitions_file in self.definitions.items():
+            print(f"  {name}: {definitions_file}")
+
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.definitions,))
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        print(f"Servidor escutando em {self.socket_path}")
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                (size,) = FRAME_HEADER.unpack(header)
+                if size > MAX_FRAME_SIZE:
+                    writer.write(encode_frame(bytes([STATUS_ERROR]) + b"Quadro grande demais"))
+                    break
+                body = await reader.readexactly(size)
+                response = await self._dispatch(body)
+                writer.write(encode_frame(response))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass  # Cliente encerrou a conexão
+        finally:
+            writer.close()
+
+    async def _dispatch(self, body):
+        try:
+            operation, name, text = decode_request(body)
+
+            if operation == OP_LIST:
+                return bytes([STATUS_OK]) + "\n".join(sorted(self.definitions)).encode('utf-8')
+
+            if operation == OP_TOKENIZE:
+                if name not in self.definitions:
+                    raise ValueError(f"Analisador desconhecido: {name}")
+                loop = asyncio.get_running_loop()
+                tokens = await loop.run_in_executor(self.pool, _worker_tokenize, name, text)
+                return bytes([STATUS_OK]) + "\n".join(tokens).encode('utf-8')
+
+            raise ValueError(f"Operação desconhecida: {operation}")
+        except Exception as e:
+            return bytes([STATUS_ERROR]) + str(e).encode('utf-8')
+
+
+class LexerClient:
+    """Cliente síncrono para o servidor de análise léxica."""
+
+    def __init__(self, socket_path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+
+    def _request(self, operation, name="", text=""):
+        self.sock.sendall(encode_request(operation, name, text))
+        (size,) = FRAME_HEADER.unpack(self._receive(FRAME_HEADER.size))
+        body = self._receive(size)
+        content = body[1:].decode('utf-8')
+        if body[0] != STATUS_OK:
+            raise RuntimeError(content)
+        return content.split("\n") if content else []
+
+    def _receive(self, size):
+        chunks = []
+        while size:
+            chunk = self.sock.recv(min(size, 1 << 20))
+            if not chunk:
+                raise ConnectionError("Conexão encerrada pelo servidor")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def tokenize(self, name, text):
+        """Retorna a lista de tokens <lexema, padrão> do texto."""
+        return self._request(OP_TOKENIZE, name, text)
+
+    def list_lexers(self):
+        return self._request(OP_LIST)
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    if (len(sys.argv) < 4 or sys.argv[1] not in ('serve', 'tokenize')
+            or (sys.argv[1] == 'tokenize' and len(sys.argv) < 5)):
+        print("Uso: python lexer_server.py serve <socket> <nome>=<definicoes.txt> [...]")
+        print("     python lexer_server.py tokenize <socket> <nome> <arquivo_teste>")
+        return
+
+    command, socket_path = sys.argv[1], sys.argv[2]
+
+    if command == 'serve':
+        definitions = dict(arg.split('=', 1) for arg in sys.argv[3:])
+        try:
+            asyncio.run(LexerServer(socket_path, definitions).serve_forever())
+        except KeyboardInterrupt:
+            print("\nServidor encerrado.")
+        except ValueError as e:
+            # Definições inválidas (por exemplo, com condições de início)
+            print(f"Erro: {e}")
+    else:
+        name, test_file = sys.argv[3], sys.argv[4]
+        with open(test_file, 'r') as file:
+            text = file.read()
+        with LexerClient(socket_path) as client:
+            for token in client.tokenize(name, text):
+                print(token)
+
+
+if __name__ == "__main__":
+    main()
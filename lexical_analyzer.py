@@ -2,60 +2,132 @@
 Arquivo principal do analisador léxico.
 Contém a interface para carregar expressões regulares, gerar AFDs, e analisar textos.
 """
-from re_to_afd import RegexToAFD
-from afnd_to_afd import determinize
-from automaton import Automaton
+from re_to_afd import RegexToAFD, remove_unescaped_spaces, DEFAULT_STATE_BUDGET
+from afnd_to_afd import determinize, determinize_parallel, renumber_states, DeterminizationError
+from automaton import Automaton, EPSILON
+from compact_automaton import CompactDFA, CompactNFA
 from symbol_table import SymbolTable
 from token_analyzer import TokenAnalyzer
+from utf8_token_analyzer import Utf8TokenAnalyzer
+from lazy_token_analyzer import LazyTokenAnalyzer, DEFAULT_CACHE_STATES
+from code_generator import write_scanner_module, load_scanner_module
+from position_index import PositionIndex
+from token_file import write_token_file
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import copy
 import os
 
+def is_condition_declaration(line):
+    """Indica se a linha declara condições de início (%x ou %s; ver start_conditions)."""
+    return line[:2] in ('%x', '%s') and (len(line) == 2 or line[2].isspace())
+
+def is_start_condition_line(line):
+    """
+    Indica se a linha de definição usa a sintaxe de condições de início:
+    declarações %x/%s, lista <condições> ou ação "-> CONDICAO" antes do ':'.
+    """
+    header = line.split(':', 1)[0]
+    return is_condition_declaration(line) or '<' in header or '->' in header
+
+def read_regex_definitions(lines):
+    """
+    Lê as linhas de um arquivo de definições e produz tuplas (nome, regex, skip).
+    Linhas vazias e comentários (#) são ignorados. Arquivos com condições de
+    início são rejeitados com ValueError (use StartConditionAnalyzer).
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        
+        if is_start_condition_line(line):
+            raise ValueError("o arquivo usa condições de início (%x, %s, <condição> ou ->); "
+                             f"use start_conditions.StartConditionAnalyzer: {line}")
+        
+        parts = line.split(':', 1)
+        if len(parts) != 2:
+            print(f"Aviso: linha inválida no arquivo de definições: {line}")
+            continue
+        
+        pattern_name = parts[0].strip()
+        regex = parts[1].strip()
+        
+        # "%skip nome: regex" declara um padrão descartado pelo analisador
+        skip = False
+        if pattern_name.startswith('%skip'):
+            skip = True
+            pattern_name = pattern_name[len('%skip'):].strip()
+        
+        if pattern_name and regex:
+            yield pattern_name, regex, skip
+
+def _convert_regex(job):
+    """Executada nos processos de trabalho: retorna (AFD, None) ou (None, mensagem de erro)."""
+    regex, utf8, state_budget, limits = job
+    try:
+        return RegexToAFD(utf8=utf8, state_budget=state_budget, **limits).convert(regex), None
+    except DeterminizationError:
+        # Limite excedido: add_pattern refaz a conversão e usa o AFND de posições
+        return None, None
+    except Exception as e:
+        return None, str(e)
+
 class LexicalAnalyzer:
-    def __init__(self):
+    def __init__(self, registry=None, compact=False, utf8=False, state_budget=DEFAULT_STATE_BUDGET,
+                 symbol_store=None, max_states=None, max_transitions=None, max_memory=None):
         self.automata = []
         self.patterns = []
+        self.regexes = []            # Expressão de cada padrão (paralela a patterns)
+        self.skip_patterns = set()   # Padrões reconhecidos e descartados (%skip)
         self.combined_automaton = None
         self.determinized_automaton = None
-        self.symbol_table = SymbolTable()
+        self.state_patterns = {}     # Estado do AFND combinado -> padrão de origem
+        self.state_layout = None     # Estado original (de determinize) de cada estado do AFD, após profile_layout
+        self.analyzer_options = {}   # Classe e opções do último analisador de tokens gerado
+        # Fábrica do armazenamento da tabela de símbolos (por exemplo, SpillingSymbolStore); None = dict
+        self.symbol_store = symbol_store
+        self.symbol_table = self._new_symbol_table()
         self.token_analyzer = None
+        self._indexed_text = None    # Último texto analisado (ver position_index)
+        self._position_index = None
+        self.registry = registry     # LexerRegistry opcional para reaproveitar AFDs já compilados
+        self.compact = compact       # Usar CompactDFA/CompactNFA (vetores de inteiros) nos autômatos
+        self.utf8 = utf8             # AFD sobre os bytes UTF-8 do texto (RegexToAFD(utf8=True))
+        self.state_budget = state_budget  # Estados por padrão acima dos quais a compilação avisa
+        # Limites do AFD de cada expressão e, por padrão, da determinização (ver _compile_pattern)
+        self.limits = dict(max_states=max_states, max_transitions=max_transitions, max_memory=max_memory)
         
-    def load_regex_definitions(self, filename):
-        """Carrega as definições de expressões regulares do arquivo."""
+    def load_regex_definitions(self, filename, workers=None):
+        """
+        Carrega as definições de expressões regulares do arquivo.
+        workers é o número de processos usados para converter as expressões
+        (padrão None ou 1: no próprio processo). A conversão paralela só
+        compensa em gramáticas cujas expressões são caras de compilar.
+        """
         try:
             with open(filename, 'r') as file:
-                for line in file:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    parts = line.split(':', 1)
-                    if len(parts) != 2:
-                        print(f"Aviso: linha inválida no arquivo de definições: {line}")
-                        continue
-                    
-                    pattern_name = parts[0].strip()
-                    regex = parts[1].strip()
-                    
-                    if pattern_name and regex:
-                        print(f"Adicionando padrão: {pattern_name} com regex: {regex}")
-                        
-                        # Se for o padrão "pr", adicionar palavras reservadas à tabela de símbolos
-                        if pattern_name.lower() == "pr":
-                            reserved_words = [w.strip() for w in regex.split('|')]
-                            for word in reserved_words:
-                                self.symbol_table.add_reserved_word(word)
-                        
-                        try:
-                            self.add_pattern(pattern_name, regex)
-                        except Exception as e:
-                            print(f"Erro ao adicionar padrão {pattern_name}: {str(e)}")
-                            return False
+                definitions = list(read_regex_definitions(file))
+            
+            # Os AFDs são incorporados na ordem das definições, preservando as prioridades
+            converted = self._convert_definitions(definitions, workers)
+            for (pattern_name, regex, skip), (automaton, error) in zip(definitions, converted):
+                print(f"Adicionando padrão: {pattern_name} com regex: {regex}")
                 
-                if not self.patterns:
-                    print("Nenhum padrão válido encontrado no arquivo.")
+                try:
+                    if error is not None:
+                        raise ValueError(error)
+                    self.add_definition(pattern_name, regex, skip, automaton)
+                except Exception as e:
+                    print(f"Erro ao adicionar padrão {pattern_name}: {str(e)}")
                     return False
-                
-                print(f"Definições de expressões regulares carregadas de {filename}")
-                return True
+            
+            if not self.patterns:
+                print("Nenhum padrão válido encontrado no arquivo.")
+                return False
+            
+            print(f"Definições de expressões regulares carregadas de {filename}")
+            return True
         except FileNotFoundError:
             print(f"Erro: Arquivo {filename} não encontrado.")
             return False
@@ -63,10 +135,63 @@ class LexicalAnalyzer:
             print(f"Erro ao carregar definições: {str(e)}")
             return False    
     
-    def add_pattern(self, pattern_name, regex):
-        """Adiciona um padrão e sua expressão regular."""
-        converter = RegexToAFD()
-        automaton = converter.convert(regex)
+    def _convert_definitions(self, definitions, workers=None):
+        """
+        Converte as expressões das definições em AFDs em um conjunto de processos.
+        Retorna uma lista paralela de pares (AFD, erro); (None, None) deixa a
+        conversão para add_pattern, como na execução serial.
+        """
+        # Com um registro, os AFDs vêm do cache compartilhado
+        if workers is None or workers <= 1 or len(definitions) < 2 or self.registry is not None:
+            return [(None, None)] * len(definitions)
+        
+        workers = min(workers, len(definitions))
+        jobs = [(regex, self.utf8, self.state_budget, self.limits) for _, regex, _ in definitions]
+        print(f"Convertendo {len(jobs)} expressões em {workers} processos...")
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(_convert_regex, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+        except OSError as e:
+            print(f"Aviso: conversão paralela indisponível ({e}); convertendo em série.")
+            return [(None, None)] * len(definitions)
+    
+    def add_definition(self, pattern_name, regex, skip=False, automaton=None):
+        """Adiciona uma definição regular lida do arquivo de definições."""
+        # Se for o padrão "pr", adicionar palavras reservadas à tabela de símbolos
+        if pattern_name.lower() == "pr":
+            self._add_reserved_words(regex)
+        
+        return self.add_pattern(pattern_name, regex, skip, automaton)
+    
+    def _add_reserved_words(self, regex):
+        reserved_words = [w.strip() for w in regex.split('|')]
+        for word in reserved_words:
+            self.symbol_table.add_reserved_word(word)
+    
+    def _compile_pattern(self, pattern_name, regex, automaton=None):
+        """
+        Converte a expressão em AFD com os estados finais marcados pelo padrão.
+        automaton, se dado, é o AFD da expressão já convertido por RegexToAFD.
+        
+        Se o AFD da expressão exceder os limites (self.limits), o padrão entra
+        como AFND de posições: a explosão de estados fica para a determinização
+        do autômato combinado, que aplica os mesmos limites e pode recorrer ao
+        AFD preguiçoso (lazy_fallback).
+        """
+        deterministic = True
+        try:
+            if automaton is None and self.registry is not None:
+                # AFD compartilhado: apenas os estados finais são próprios deste padrão
+                automaton = self.registry.compile_pattern(regex, self.utf8, self.state_budget,
+                                                          **self.limits).shallow_copy()
+            elif automaton is None:
+                converter = RegexToAFD(utf8=self.utf8, state_budget=self.state_budget, **self.limits)
+                automaton = converter.convert(regex)
+        except DeterminizationError as e:
+            print(f"Aviso: padrão {pattern_name}: {e}")
+            print(f"O padrão {pattern_name} será incluído como AFND de posições.")
+            automaton = RegexToAFD(utf8=self.utf8, state_budget=self.state_budget).convert_nfa(regex)
+            deterministic = False
         automaton.pattern = pattern_name
         
         # Adicionar informação do padrão aos estados finais do autômato
@@ -75,46 +200,201 @@ class LexicalAnalyzer:
         for final in original_finals:
             automaton.final_states.add((final, pattern_name))
         
+        if self.compact:
+            automaton = (CompactDFA if deterministic else CompactNFA).from_automaton(automaton)
+        return automaton
+    
+    def add_pattern(self, pattern_name, regex, skip=False, automaton=None):
+        """
+        Adiciona um padrão e sua expressão regular. Padrões com skip=True
+        fazem parte do AFD, mas seus lexemas são descartados. automaton é o
+        AFD da expressão, quando já convertido (por exemplo, em paralelo).
+        """
+        automaton = self._compile_pattern(pattern_name, regex, automaton)
+        
         self.patterns.append(pattern_name)
+        self.regexes.append(regex)
         self.automata.append(automaton)
+        if skip:
+            self.skip_patterns.add(pattern_name)
+        self._invalidate()
         return automaton
     
+    def update_pattern(self, pattern_name, regex, skip=None):
+        """
+        Altera a expressão de um padrão existente, mantendo sua prioridade, ou o
+        adiciona ao final se ainda não existir. Apenas este padrão é recompilado;
+        os AFDs dos demais são reaproveitados na próxima geração do analisador.
+        skip=None preserva a marcação %skip atual.
+        Retorna True se a gramática mudou.
+        """
+        if pattern_name not in self.patterns:
+            self.add_definition(pattern_name, regex, bool(skip))
+            return True
+        
+        index = self.patterns.index(pattern_name)
+        changed = False
+        
+        if remove_unescaped_spaces(regex.strip()) != remove_unescaped_spaces(self.regexes[index].strip()):
+            self.automata[index] = self._compile_pattern(pattern_name, regex)
+            self.regexes[index] = regex
+            changed = True
+        
+        if skip is not None and skip != (pattern_name in self.skip_patterns):
+            if skip:
+                self.skip_patterns.add(pattern_name)
+            else:
+                self.skip_patterns.discard(pattern_name)
+            changed = True
+        
+        if changed:
+            self._invalidate(grammar_changed=True)
+        return changed
+    
+    def remove_pattern(self, pattern_name):
+        """Remove todas as definições do padrão. Retorna True se o padrão existia."""
+        if pattern_name not in self.patterns:
+            return False
+        
+        kept = [i for i, name in enumerate(self.patterns) if name != pattern_name]
+        self.patterns = [self.patterns[i] for i in kept]
+        self.regexes = [self.regexes[i] for i in kept]
+        self.automata = [self.automata[i] for i in kept]
+        self.skip_patterns.discard(pattern_name)
+        self._invalidate(grammar_changed=True)
+        return True
+    
+    def sync_definitions(self, definitions):
+        """
+        Ajusta o analisador à lista de definições (nome, regex, skip), na ordem de
+        prioridade, recompilando apenas as expressões novas ou alteradas. Usado
+        pela interface gráfica a cada edição da gramática.
+        Retorna True se a gramática mudou.
+        """
+        definitions = list(definitions)
+        current = [(name, remove_unescaped_spaces(regex.strip()))
+                   for name, regex in zip(self.patterns, self.regexes)]
+        wanted = [(name, remove_unescaped_spaces(regex.strip())) for name, regex, _ in definitions]
+        wanted_skip = {name for name, _, skip in definitions if skip}
+        
+        if current == wanted and wanted_skip == self.skip_patterns:
+            return False
+        
+        # AFDs já compilados, indexados por (nome, regex normalizada)
+        compiled = {}
+        for key, regex, automaton in zip(current, self.regexes, self.automata):
+            compiled.setdefault(key, []).append((regex, automaton))
+        
+        patterns, regexes, automata = [], [], []
+        for key, (pattern_name, regex, _) in zip(wanted, definitions):
+            reusable = compiled.get(key)
+            if reusable:
+                regex, automaton = reusable.pop()
+            else:
+                automaton = self._compile_pattern(pattern_name, regex)
+            patterns.append(pattern_name)
+            regexes.append(regex)
+            automata.append(automaton)
+        
+        self.patterns, self.regexes, self.automata = patterns, regexes, automata
+        self.skip_patterns = wanted_skip
+        self._invalidate(grammar_changed=True)
+        return True
+    
+    def _invalidate(self, grammar_changed=False):
+        """
+        Descarta os autômatos derivados após uma alteração nos padrões. Quando um
+        padrão já existente muda, a tabela de símbolos é refeita a partir das
+        palavras reservadas atuais, pois os lexemas registrados podem estar obsoletos.
+        """
+        self.combined_automaton = None
+        self.determinized_automaton = None
+        self.state_layout = None
+        self.token_analyzer = None
+        
+        if grammar_changed:
+            self.reset_symbol_table()
+    
+    def _new_symbol_table(self):
+        return SymbolTable(self.symbol_store() if self.symbol_store is not None else None)
+    
+    def reset_symbol_table(self):
+        """Recria a tabela de símbolos contendo apenas as palavras reservadas."""
+        self.symbol_table.close()
+        self.symbol_table = self._new_symbol_table()
+        for pattern_name, regex in zip(self.patterns, self.regexes):
+            if pattern_name.lower() == "pr":
+                self._add_reserved_words(regex)
+        if self.token_analyzer:
+            self.token_analyzer.symbol_table = self.symbol_table
+    
+    def share(self):
+        """
+        Retorna um analisador léxico que compartilha os autômatos e a tabela de
+        transições deste, com tabela de símbolos (com as mesmas palavras
+        reservadas) e resultados de análise próprios. Alterações nos padrões
+        de um deles não afetam o outro.
+        """
+        lexer = copy.copy(self)
+        lexer.automata = list(self.automata)
+        lexer.patterns = list(self.patterns)
+        lexer.regexes = list(self.regexes)
+        lexer.skip_patterns = set(self.skip_patterns)
+        lexer.symbol_table = self._new_symbol_table()
+        for word in self.symbol_table.reserved_words:
+            lexer.symbol_table.add_reserved_word(word)
+        lexer._set_indexed_text(None)
+        if self.token_analyzer is not None:
+            lexer.token_analyzer = self.token_analyzer.with_symbol_table(lexer.symbol_table)
+        return lexer
+    
+    def close(self):
+        """Libera o armazenamento da tabela de símbolos (por exemplo, o banco de SpillingSymbolStore)."""
+        self.symbol_table.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
     def combine_automata(self):
         if not self.automata:
             print("Nenhum autômato para combinar.")
             return None
         
         print("Combinando automatos via ε-transições...")
-        combined = Automaton()
-        combined.states = {0}  # Estado inicial do autômato combinado
-        combined.initial_state = 0
-        combined.final_states = set()
+        combined = CompactNFA() if self.compact else Automaton()
+        combined.set_initial_state(0)  # Estado inicial do autômato combinado
         
         # Mapeamento de estados originais para estados no novo autômato
         state_mapping = {}
+        self.state_patterns = {}
         next_state = 1
         
         # Mapear estados de cada autômato para novos estados no automato combinado
         for idx, automaton in enumerate(self.automata):
-            pattern = self.patterns[idx]
+            # Padrão de cada estado final do autômato original
+            final_patterns = {}
+            for final in automaton.final_states:
+                if isinstance(final, tuple):
+                    final_patterns.setdefault(final[0], final[1])
             
             # Mapear os estados
             for state in automaton.states:
                 state_mapping[(idx, state)] = next_state
+                self.state_patterns[next_state] = self.patterns[idx]
                 combined.add_state(next_state)
                 
                 # Se o estado é final no autômato original, também é no combinado
-                if isinstance(automaton.final_states, set) and any(isinstance(fs, tuple) and fs[0] == state for fs in automaton.final_states):
-                    for final_state, pattern in automaton.final_states:
-                        if final_state == state:
-                            combined.final_states.add((next_state, pattern))
-                            break
+                if state in final_patterns:
+                    combined.add_final_state(next_state, final_patterns[state])
                 
                 next_state += 1
             
             # Adicionar ε-transição do estado inicial combinado para o estado inicial do autômato
             mapped_initial = state_mapping[(idx, automaton.initial_state)]
-            combined.add_transition(0, '&', mapped_initial)
+            combined.add_transition(0, EPSILON, mapped_initial)
             
             # Adicionar símbolos do alfabeto
             for symbol in automaton.alphabet:
@@ -131,9 +411,30 @@ class LexicalAnalyzer:
                         combined.add_transition(mapped_from, symbol, mapped_to)
         
         self.combined_automaton = combined
+        self.determinized_automaton = None
+        self.state_layout = None
         return combined
     
-    def generate_lexical_analyzer(self):
+    def generate_lexical_analyzer(self, analyzer_class=None, max_states=None, max_transitions=None,
+                                  max_memory=None, lazy_fallback=False,
+                                  cache_states=DEFAULT_CACHE_STATES, determinize_workers=None, **options):
+        """
+        Combina e determiniza os autômatos e cria o analisador de tokens.
+        options são repassadas ao analisador (por exemplo, linear_time=True).
+        Sem analyzer_class, usa TokenAnalyzer (ou Utf8TokenAnalyzer no modo UTF-8).
+        
+        max_states, max_transitions e max_memory limitam a determinização (padrão:
+        os limites dados ao construtor). Se um limite for excedido, os padrões
+        responsáveis são listados e a geração falha; com lazy_fallback=True,
+        usa-se um AFD construído sob demanda, com no máximo cache_states
+        estados em memória.
+        
+        Com determinize_workers > 1, a determinização é feita nível a nível em
+        um conjunto de processos (determinize_parallel), com o mesmo AFD resultante.
+        """
+        if analyzer_class is None:
+            analyzer_class = Utf8TokenAnalyzer if self.utf8 else TokenAnalyzer
+        
         if not self.combined_automaton:
             self.combine_automata()
         
@@ -141,24 +442,133 @@ class LexicalAnalyzer:
             print("Falha ao gerar o analisador léxico.")
             return False
         
-        print("Determinizando o autômato combinado...")
-        self.determinized_automaton = determinize(self.combined_automaton)
+        # O AFD só é refeito quando algum padrão mudou desde a última geração
+        if not self.determinized_automaton:
+            print("Determinizando o autômato combinado...")
+            limits = dict(max_states=max_states, max_transitions=max_transitions, max_memory=max_memory)
+            limits = {name: self.limits[name] if limit is None else limit for name, limit in limits.items()}
+            try:
+                if determinize_workers is not None and determinize_workers > 1:
+                    self.determinized_automaton = determinize_parallel(self.combined_automaton,
+                                                                       determinize_workers, **limits)
+                else:
+                    self.determinized_automaton = determinize(self.combined_automaton, **limits)
+            except DeterminizationError as e:
+                print(f"Erro: {e}")
+                print("Padrões com mais estados nos maiores subconjuntos do AFD:")
+                for pattern, count in self.blowup_report(e):
+                    print(f"  {pattern}: {count} estados do AFND")
+                
+                if not lazy_fallback or self.utf8:
+                    return False
+                
+                print("Criando analisador de tokens com AFD preguiçoso (construído sob demanda)...")
+                self.token_analyzer = LazyTokenAnalyzer(self.combined_automaton, self.symbol_table,
+                                                        self.patterns, self.skip_patterns,
+                                                        cache_states=cache_states, **options)
+                return True
         
         print("Criando analisador de tokens...")
-        self.token_analyzer = TokenAnalyzer(self.determinized_automaton, self.symbol_table)
+        self.token_analyzer = analyzer_class(self.determinized_automaton, self.symbol_table,
+                                             self.patterns, self.skip_patterns, **options)
+        self.analyzer_options = dict(options, analyzer_class=analyzer_class)
         
         return True
     
+    def profile_layout(self, texts):
+        """
+        Renumera os estados do AFD pela frequência de visita em um corpus de
+        treino (lista de textos): os estados mais visitados, e suas linhas na
+        tabela de transições, passam a ficar juntos no início. O analisador de
+        tokens é recriado com as mesmas opções. Retorna o layout (estados na
+        numeração original de determinize, do mais ao menos visitado), que é
+        gravado nos módulos gerados e pode ser reaplicado com apply_layout.
+        """
+        if not self.determinized_automaton:
+            print("Analisador léxico não foi gerado. Execute generate_lexical_analyzer primeiro.")
+            return None
+        
+        # Contagem sobre o AFD atual, sem alterar a tabela de símbolos do analisador
+        profiler = TokenAnalyzer(self.determinized_automaton, SymbolTable(), self.patterns,
+                                 self.skip_patterns, profile=True)
+        for text in texts:
+            if self.utf8:
+                # Os símbolos do AFD UTF-8 são chr(byte): cada byte vira um caractere latin-1
+                if isinstance(text, str):
+                    text = text.encode('utf-8')
+                text = text.decode('latin-1')
+            profiler.count(text)
+        
+        hot_states = profiler.hot_state_layout()
+        layout = [self.state_layout[state] for state in hot_states] if self.state_layout else hot_states
+        self.apply_layout(layout)
+        return layout
+    
+    def apply_layout(self, layout):
+        """
+        Renumera o AFD segundo layout (estados na numeração original de
+        determinize, na nova ordem), por exemplo o STATE_LAYOUT de um módulo
+        gerado para a mesma gramática, e recria o analisador de tokens.
+        """
+        if not self.determinized_automaton:
+            print("Analisador léxico não foi gerado. Execute generate_lexical_analyzer primeiro.")
+            return False
+        
+        # Posição atual de cada estado original (o AFD pode já ter sido renumerado)
+        current = self.state_layout or sorted(self.determinized_automaton.states)
+        position = {original: state for state, original in enumerate(current)}
+        if sorted(layout) != sorted(position):
+            print("Erro: o layout não corresponde aos estados do AFD atual.")
+            return False
+        
+        self.determinized_automaton = renumber_states(self.determinized_automaton,
+                                                      [position[state] for state in layout])
+        self.state_layout = list(layout)
+        
+        options = dict(self.analyzer_options)
+        analyzer_class = options.pop('analyzer_class', None) or (Utf8TokenAnalyzer if self.utf8 else TokenAnalyzer)
+        self.token_analyzer = analyzer_class(self.determinized_automaton, self.symbol_table,
+                                             self.patterns, self.skip_patterns, **options)
+        return True
+    
+    def blowup_report(self, error):
+        """
+        Conta, nos maiores subconjuntos de uma determinização interrompida,
+        quantos estados do AFND vêm de cada padrão. Retorna [(padrão, estados)]
+        em ordem decrescente.
+        """
+        counts = Counter(self.state_patterns[state] for subset in error.subsets
+                         for state in subset if state in self.state_patterns)
+        return counts.most_common()
+    
+    def generate_scanner_module(self, filename):
+        """
+        Gera um módulo Python independente com o analisador léxico especializado
+        para o AFD determinizado e retorna o módulo já importado.
+        """
+        if not self.determinized_automaton:
+            print("Analisador léxico não foi gerado. Execute generate_lexical_analyzer primeiro.")
+            return None
+        
+        if self.utf8:
+            print("O módulo gerado analisa texto decodificado; não suporta o modo UTF-8.")
+            return None
+        
+        write_scanner_module(self.determinized_automaton, self.patterns, filename,
+                             self.symbol_table.reserved_words, self.skip_patterns, self.state_layout)
+        return load_scanner_module(filename)
+    
     def analyze_file(self, input_filename, output_filename=None):
         if not self.token_analyzer:
             print("Analisador léxico não foi gerado. Execute generate_lexical_analyzer primeiro.")
             return False
         
         try:
-            with open(input_filename, 'r') as file:
+            # No modo UTF-8 o arquivo é analisado como bytes, sem decodificação
+            with open(input_filename, 'rb' if self.utf8 else 'r') as file:
                 text = file.read()
-                
-            tokens = self.token_analyzer.analyze(text)
+            
+            tokens = self.analyze_text(text)
             
             if output_filename:
                 with open(output_filename, 'w') as out_file:
@@ -172,6 +582,88 @@ class LexicalAnalyzer:
         except Exception as e:
             print(f"Erro ao analisar arquivo: {str(e)}")
             return []
+
+    def write_token_file(self, input_filename, output_filename, compression=None):
+        """
+        Analisa o arquivo e grava os tokens no formato binário de token_file
+        (.tok), opcionalmente em blocos comprimidos ('zlib' ou 'zstd').
+        Retorna o número de tokens gravados, ou False em caso de erro.
+        """
+        if not self.token_analyzer:
+            print("Analisador léxico não foi gerado. Execute generate_lexical_analyzer primeiro.")
+            return False
+
+        try:
+            with open(input_filename, 'rb' if self.utf8 else 'r') as file:
+                text = file.read()
+
+            self._set_indexed_text(text)
+            return write_token_file(self.token_analyzer, text, output_filename, compression)
+        except FileNotFoundError:
+            print(f"Erro: Arquivo {input_filename} não encontrado.")
+            return False
+        except Exception as e:
+            print(f"Erro ao gravar arquivo de tokens: {str(e)}")
+            return False
+
+    def analyze_text(self, text, wanted=None):
+        """
+        Analisa um texto já em memória e retorna a lista de tokens. wanted
+        restringe os tokens emitidos a um conjunto de padrões (ver TokenAnalyzer.analyze).
+        """
+        if not self.token_analyzer:
+            raise RuntimeError("Analisador léxico não foi gerado. Execute generate_lexical_analyzer primeiro.")
+        
+        self._set_indexed_text(text)
+        if wanted is None:
+            return self.token_analyzer.analyze(text)
+        return self.token_analyzer.analyze(text, wanted)
+    
+    def count_tokens(self, text):
+        """Retorna o histograma padrão -> ocorrências dos tokens do texto (ver TokenAnalyzer.count)."""
+        if not self.token_analyzer:
+            raise RuntimeError("Analisador léxico não foi gerado. Execute generate_lexical_analyzer primeiro.")
+        
+        return self.token_analyzer.count(text)
+    
+    async def atokenize(self, reader, chunk_size=None):
+        """
+        Analisa um fluxo assíncrono (pipe, socket) sem carregá-lo inteiro em memória:
+        async for token in analyzer.atokenize(stream_reader).
+        """
+        if not self.token_analyzer:
+            raise RuntimeError("Analisador léxico não foi gerado. Execute generate_lexical_analyzer primeiro.")
+        
+        options = {'chunk_size': chunk_size} if chunk_size else {}
+        async for token in self.token_analyzer.atokenize(reader, **options):
+            yield token
+    
+    @property
+    def position_index(self):
+        """Índice de linhas do último texto analisado, construído na primeira consulta."""
+        if self._position_index is None and self._indexed_text is not None:
+            self._position_index = PositionIndex(self._indexed_text)
+            self._indexed_text = None
+        return self._position_index
+    
+    def _set_indexed_text(self, text):
+        self._indexed_text = text
+        self._position_index = None
+    
+    def token_position(self, index):
+        """Retorna (linha, coluna) do token de índice index na última análise."""
+        return self.position_index.line_column(self.token_analyzer.token_offsets[index])
+    
+    def error_positions(self):
+        """
+        Retorna uma lista (linha, coluna, início, fim) com a localização de cada
+        erro da última análise, sem reler o arquivo.
+        """
+        positions = []
+        for start, end in self.token_analyzer.error_spans:
+            line, column = self.position_index.line_column(start)
+            positions.append((line, column, start, end))
+        return positions
     
     def print_automaton(self, automaton, title="Autômato"):
         print(f"\n{title}:")
@@ -185,7 +677,7 @@ class LexicalAnalyzer:
         else:
             print(f"Estados finais: {', '.join(map(str, automaton.final_states))}")
         
-        print(f"Alfabeto: {', '.join(sorted(automaton.alphabet - {'&'}))}")
+        print(f"Alfabeto: {', '.join(sorted(automaton.alphabet - {EPSILON}))}")
         
 
     def save_automaton_to_file(self, automaton, filename):
@@ -213,14 +705,16 @@ class LexicalAnalyzer:
                 file.write(f"{','.join(map(str, final_states))}\n")
                 
                 # Alfabeto (excluindo epsilon)
-                alphabet = sorted(automaton.alphabet - {'&'})
+                alphabet = sorted(automaton.alphabet - {EPSILON})
                 file.write(f"{','.join(alphabet)}\n")
                 
                 # Transições
+                symbols = sorted(automaton.alphabet - {EPSILON})
                 for state in sorted(automaton.states):
-                    for symbol in sorted(automaton.alphabet - {'&'}):
-                        if symbol in automaton.transitions.get(state, {}):
-                            targets = automaton.transitions[state][symbol]
+                    state_transitions = automaton.transitions.get(state, {})
+                    for symbol in symbols:
+                        if symbol in state_transitions:
+                            targets = state_transitions[symbol]
                             for target in sorted(targets):
                                 file.write(f"{state},{symbol},{target}\n")
             
@@ -1,13 +1,132 @@
 import sys
-import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QTextEdit, QTabWidget, 
-                             QTableWidget, QTableWidgetItem, QLabel, QSplitter,
+                             QTableView, QLabel, QSplitter, QProgressBar,
                              QFileDialog, QMessageBox)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QThread, pyqtSignal
 from PyQt5.QtGui import QColor, QFont
-from lexical_analyzer import LexicalAnalyzer
-import tempfile
+from lexical_analyzer import LexicalAnalyzer, read_regex_definitions
+from automaton import EPSILON
+
+
+class TransitionTableModel(QAbstractTableModel):
+    """Transition table of an automaton; cells are formatted only when the view displays them"""
+
+    def __init__(self, automaton, parent=None):
+        super().__init__(parent)
+        self.automaton = automaton
+        self.states = sorted(automaton.states)
+        self.symbols = sorted(automaton.alphabet - {EPSILON})
+        
+        # Mark final states with an asterisk and the initial state with an arrow
+        finals = {final[0] if isinstance(final, tuple) else final for final in automaton.final_states}
+        self.state_labels = [("→" if state == automaton.initial_state else "") + f"{state}"
+                             + ("*" if state in finals else "") for state in self.states]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.states)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.symbols)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        
+        state = self.states[index.row()]
+        transitions = self.automaton.transitions.get(state, {}).get(self.symbols[index.column()])
+        if not transitions:
+            return "-"
+        # For AFD: single state
+        if len(transitions) == 1:
+            return str(next(iter(transitions)))
+        # For AFND: multiple states
+        return "{" + ",".join(map(str, sorted(transitions))) + "}"
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.symbols[section]
+        return self.state_labels[section]
+
+
+class SymbolTableModel(QAbstractTableModel):
+    """Symbol table entries (lexeme, pattern); reserved words are highlighted"""
+
+    HEADERS = ("Lexeme", "Pattern")
+
+    def __init__(self, symbols=None, parent=None):
+        super().__init__(parent)
+        self.rows = sorted((symbols or {}).items())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        lexeme, pattern = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return lexeme if index.column() == 0 else pattern
+        
+        # Reserved words (pattern "PR") are shown in bold with a light blue background
+        if pattern == "PR":
+            if role == Qt.FontRole:
+                font = QFont()
+                font.setBold(True)
+                return font
+            if role == Qt.BackgroundRole:
+                return QColor("#d1ecf1")
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+
+class AnalysisWorker(QObject):
+    """Runs the analysis pipeline outside the GUI thread, reporting each stage"""
+
+    progress = pyqtSignal(str, int)
+    finished = pyqtSignal(list)
+    failed = pyqtSignal(str)
+
+    def __init__(self, analyzer, definitions, source_text):
+        super().__init__()
+        self.analyzer = analyzer
+        self.definitions = definitions
+        self.source_text = source_text
+
+    def run(self):
+        try:
+            # Update the analyzer in place: only new or edited definitions are recompiled
+            self.progress.emit("Compiling regular definitions...", 10)
+            self.analyzer.sync_definitions(self.definitions)
+            
+            # Generate lexical analyzer (the DFA is rebuilt only if the grammar changed)
+            self.progress.emit("Generating lexical analyzer...", 40)
+            if not self.analyzer.generate_lexical_analyzer():
+                self.failed.emit("Failed to generate lexical analyzer.")
+                return
+            
+            # Analyze the source text (symbols from previous runs are discarded)
+            self.progress.emit("Analyzing source text...", 70)
+            self.analyzer.reset_symbol_table()
+            tokens = self.analyzer.analyze_text(self.source_text)
+            
+            self.progress.emit("Done", 100)
+            self.finished.emit(tokens)
+        except Exception as e:
+            self.failed.emit(str(e))
+
 
 class LexicalAnalyzerGUI(QMainWindow):
     def __init__(self):
@@ -21,6 +140,9 @@ class LexicalAnalyzerGUI(QMainWindow):
         self.combined_automaton = None
         self.determinized_automaton = None
         self.tokens = []
+        self.source_text = ""
+        self.worker_thread = None
+        self.worker = None
 
     def init_ui(self):
         self.setWindowTitle("Lexical Analyzer")
@@ -84,6 +206,12 @@ class LexicalAnalyzerGUI(QMainWindow):
         button_layout.addWidget(self.analyze_btn)    
         input_layout.addLayout(button_layout)
         
+        # Progress of the analysis running in the background
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        input_layout.addWidget(self.progress_bar)
+        
         # Add the input widget to the splitter
         splitter.addWidget(input_widget)
         
@@ -101,14 +229,14 @@ class LexicalAnalyzerGUI(QMainWindow):
         # Tab for symbol table
         self.symbol_table_tab = QWidget()
         symbol_table_layout = QVBoxLayout(self.symbol_table_tab)
-        self.symbol_table_widget = QTableWidget()
-        self.symbol_table_widget.setColumnCount(2)
-        self.symbol_table_widget.setHorizontalHeaderLabels(["Lexeme", "Pattern"])
+        self.symbol_table_model = SymbolTableModel()
+        self.symbol_table_widget = QTableView()
+        self.symbol_table_widget.setModel(self.symbol_table_model)
+        self.symbol_table_widget.setAlternatingRowColors(True)
         
         # Make columns stretch to fill available space evenly
         header = self.symbol_table_widget.horizontalHeader()
-        header.setSectionResizeMode(0, header.Stretch)
-        header.setSectionResizeMode(1, header.Stretch)
+        header.setSectionResizeMode(header.Stretch)
         
         # Remove grid lines for cleaner look (optional)
         self.symbol_table_widget.setShowGrid(True)
@@ -175,7 +303,7 @@ class LexicalAnalyzerGUI(QMainWindow):
                 background-color: white;
             }
             
-            QTableWidget {
+            QTableView {
                 border: 1px solid #ced4da;
                 background-color: white;
                 alternate-background-color: #f1f3f5;
@@ -208,43 +336,64 @@ class LexicalAnalyzerGUI(QMainWindow):
                 QMessageBox.critical(self, "Error", f"Error loading file: {str(e)}")
     
     def analyze_text(self):
+        if self.worker_thread is not None:
+            return
+        
+        try:
+            definitions = list(read_regex_definitions(self.regex_input.toPlainText().splitlines()))
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", f"Failed to load regular definitions: {str(e)}")
+            return
+        if not definitions:
+            QMessageBox.critical(self, "Error", "Failed to load regular definitions.")
+            return
+        
         # Reset data
         self.automata = []
         self.combined_automaton = None
         self.determinized_automaton = None
         self.tokens = []
+        self.source_text = self.source_input.toPlainText()
         
         # Clear previous results
         self.tokens_output.clear()
-        self.symbol_table_widget.setRowCount(0)
+        self.symbol_table_model = SymbolTableModel()
+        self.symbol_table_widget.setModel(self.symbol_table_model)
         while self.automata_tabs.count() > 0:
             self.automata_tabs.removeTab(0)
         
-        # Create temporary files for regex and source
-        with tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.txt') as regex_file:
-            regex_file.write(self.regex_input.toPlainText())
-            regex_file_name = regex_file.name
-        
-        with tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.txt') as source_file:
-            source_file.write(self.source_input.toPlainText())
-            source_file_name = source_file.name
-        
-        # Initialize analyzer
-        self.analyzer = LexicalAnalyzer()
-        
-        # Load regex definitions
-        if not self.analyzer.load_regex_definitions(regex_file_name):
-            QMessageBox.critical(self, "Error", "Failed to load regular definitions.")
-            os.unlink(regex_file_name)
-            os.unlink(source_file_name)
-            return
-        
-        # Generate lexical analyzer
-        if not self.analyzer.generate_lexical_analyzer():
-            QMessageBox.critical(self, "Error", "Failed to generate lexical analyzer.")
-            os.unlink(regex_file_name)
-            os.unlink(source_file_name)
-            return
+        # Run the pipeline in a worker thread so the window stays responsive
+        self.analyze_btn.setEnabled(False)
+        self.worker_thread = QThread()
+        self.worker = AnalysisWorker(self.analyzer, definitions, self.source_text)
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self.show_progress)
+        self.worker.finished.connect(self.show_results)
+        self.worker.failed.connect(self.show_failure)
+        self.worker.finished.connect(self.worker_thread.quit)
+        self.worker.failed.connect(self.worker_thread.quit)
+        self.worker_thread.finished.connect(self.cleanup_worker)
+        self.worker_thread.start()
+    
+    def show_progress(self, message, value):
+        self.progress_bar.setValue(value)
+        self.statusBar().showMessage(message)
+    
+    def show_failure(self, message):
+        self.progress_bar.setValue(0)
+        self.statusBar().showMessage("Analysis failed")
+        QMessageBox.critical(self, "Error", message)
+    
+    def cleanup_worker(self):
+        self.worker.deleteLater()
+        self.worker_thread.deleteLater()
+        self.worker = None
+        self.worker_thread = None
+        self.analyze_btn.setEnabled(True)
+    
+    def show_results(self, tokens):
+        self.tokens = tokens
         
         # Process each automaton
         for i, automaton in enumerate(self.analyzer.automata):
@@ -260,53 +409,25 @@ class LexicalAnalyzerGUI(QMainWindow):
         self.determinized_automaton = self.analyzer.determinized_automaton
         self.create_automaton_tab(self.determinized_automaton, "AFD Determinized")
         
-        # Analyze the source text
-        self.tokens = self.analyzer.analyze_file(source_file_name)
-        
-        # Show tokens
-        self.tokens_output.setText("\n".join(self.tokens))
+        # Show tokens, followed by the location of each lexical error
+        output = "\n".join(self.tokens)
+        errors = self.analyzer.error_positions()
+        if errors:
+            output += f"\n\nErrors ({len(errors)}):\n"
+            output += "\n".join(f"Line {line}, column {column}: {self.source_text[start:end]!r}"
+                                 for line, column, start, end in errors)
+        self.tokens_output.setPlainText(output)
         
         # Update symbol table
         self.update_symbol_table()
         
-        # Clean up temporary files
-        os.unlink(regex_file_name)
-        os.unlink(source_file_name)
-        
         # Show success message
         QMessageBox.information(self, "Success", "Lexical analysis completed successfully!")
     
     def update_symbol_table(self):
-        """Updates the symbol table widget with the current symbol table data"""
-        # Get the symbol table from the analyzer
-        symbols = self.analyzer.symbol_table.symbols
-        
-        # Set the number of rows
-        self.symbol_table_widget.setRowCount(len(symbols))
-        self.symbol_table_widget.setAlternatingRowColors(True)
-        
-        # Fill the table
-        for row, (lexeme, pattern) in enumerate(sorted(symbols.items())):
-            lexeme_item = QTableWidgetItem(lexeme)
-            pattern_item = QTableWidgetItem(pattern)
-            
-            # Check if this is a reserved word (pattern is "PR")
-            if pattern == "PR":
-                # Apply bold formatting for reserved words
-                font = lexeme_item.font()
-                font.setBold(True)
-                lexeme_item.setFont(font)
-                pattern_item.setFont(font)
-                
-                # Highlight reserved words with a light blue background
-                lexeme_item.setBackground(QColor("#d1ecf1"))
-                pattern_item.setBackground(QColor("#d1ecf1"))
-            
-            self.symbol_table_widget.setItem(row, 0, lexeme_item)
-            self.symbol_table_widget.setItem(row, 1, pattern_item)
-        
-        # Adjust column width to content
-        self.symbol_table_widget.resizeColumnsToContents()
+        """Updates the symbol table view with the current symbol table data"""
+        self.symbol_table_model = SymbolTableModel(self.analyzer.symbol_table.symbols)
+        self.symbol_table_widget.setModel(self.symbol_table_model)
         
     def create_automaton_tab(self, automaton, title):
         """Creates a tab to display an automaton's information"""
@@ -328,65 +449,17 @@ class LexicalAnalyzerGUI(QMainWindow):
         else:
             info += f"Final States: {', '.join(map(str, automaton.final_states))}\n"
         
-        info += f"Alphabet: {', '.join(sorted(automaton.alphabet - {'&'}))}\n"
+        info += f"Alphabet: {', '.join(sorted(automaton.alphabet - {EPSILON}))}\n"
         
-        info_text.setText(info)
+        info_text.setPlainText(info)
         layout.addWidget(info_text)
         
-        # Create transition table
-        table = QTableWidget()
+        # Transition table: the view asks the model only for the visible cells
+        table = QTableView()
         table.setAlternatingRowColors(True)
-        
-        # Get all states and symbols (excluding epsilon '&')
-        states = sorted(automaton.states)
-        symbols = sorted(automaton.alphabet - {'&'})
-        
-        # Set up the table
-        table.setRowCount(len(states))
-        table.setColumnCount(len(symbols))
-        table.setHorizontalHeaderLabels(symbols)
-        
-        # Set vertical headers (states)
-        state_labels = []
-        for state in states:
-            # Mark final states with an asterisk
-            is_final = False
-            if isinstance(automaton.final_states, set):
-                for final_state in automaton.final_states:
-                    if isinstance(final_state, tuple) and final_state[0] == state:
-                        is_final = True
-                        break
-                    elif not isinstance(final_state, tuple) and final_state == state:
-                        is_final = True
-                        break
-            
-            label = f"{state}" + ("*" if is_final else "")
-            if state == automaton.initial_state:
-                label = "→" + label
-            
-            state_labels.append(label)
-        
-        table.setVerticalHeaderLabels(state_labels)
-        
-        # Fill the table with transitions
-        for row, state in enumerate(states):
-            for col, symbol in enumerate(symbols):
-                transitions = automaton.transitions.get(state, {}).get(symbol, set())
-                if transitions:
-                    # For AFD: single state
-                    if len(transitions) == 1:
-                        item_text = str(next(iter(transitions)))
-                    # For AFND: multiple states
-                    else:
-                        item_text = "{" + ",".join(map(str, sorted(transitions))) + "}"
-                    
-                    table.setItem(row, col, QTableWidgetItem(item_text))
-                else:
-                    table.setItem(row, col, QTableWidgetItem("-"))
-        
-        # Adjust table appearance
-        table.resizeColumnsToContents()
-        table.resizeRowsToContents()
+        table.setModel(TransitionTableModel(automaton, table))
+        table.horizontalHeader().setDefaultSectionSize(48)
+        table.verticalHeader().setDefaultSectionSize(22)
         layout.addWidget(table)
         
         # Add the tab
@@ -1,4 +1,6 @@
 from lexical_analyzer import LexicalAnalyzer
+from token_file import read_token_file, TOKEN_FILE_EXTENSION
+from start_conditions import StartConditionAnalyzer, uses_start_conditions
 import sys
 import time
 
@@ -6,20 +8,29 @@ def main():
     print("Analisador Léxico - Trabalho de Linguagens Formais")
     print("=" * 50)
     
-    if len(sys.argv) < 3:
-        print("Uso: python main.py <arquivo_definicoes> <arquivo_teste> [arquivo_saida]")
+    # --tabelas exibe a memória da tabela de transições densa e da compactada
+    args = [arg for arg in sys.argv[1:] if arg != '--tabelas']
+    show_tables = len(args) < len(sys.argv) - 1
+    
+    if len(args) < 2:
+        print("Uso: python main.py <arquivo_definicoes> <arquivo_teste> [arquivo_saida] [--tabelas]")
         print("\nExemplo:")
         print("python main.py definicoes.txt teste.txt tokens.txt")
         return
     
-    regex_file = sys.argv[1]
-    test_file = sys.argv[2]
-    output_file = sys.argv[3] if len(sys.argv) > 3 else "tokens.txt"
+    regex_file = args[0]
+    test_file = args[1]
+    output_file = args[2] if len(args) > 2 else "tokens.txt"
     
     # Iniciar temporizador
     start_time = time.time()
     
-    analyzer = LexicalAnalyzer()
+    # Arquivos com condições de início (%x, <CONDICAO>, ->) geram um AFD por condição
+    modal = uses_start_conditions(regex_file)
+    if modal and output_file.endswith(TOKEN_FILE_EXTENSION):
+        print(f"Erro: a saída binária ({TOKEN_FILE_EXTENSION}) não é suportada com condições de início. Abortando.")
+        return
+    analyzer = StartConditionAnalyzer() if modal else LexicalAnalyzer()
     
     # Carregar definições de expressões regulares
     print(f"\nCarregando definições de expressões regulares de '{regex_file}'...")
@@ -38,22 +49,43 @@ def main():
         print("Falha ao gerar analisador léxico. Abortando.")
         return
     
-    # Exibir e salvar os autômatos
-    print("\nSalvando autômatos gerados...")
-    for i, automaton in enumerate(analyzer.automata):
-        pattern = analyzer.patterns[i]
-        analyzer.print_automaton(automaton, f"AFD para '{pattern}' (via Follow Pos)")
-        analyzer.save_automaton_to_file(automaton, f"afd_{pattern}.txt")
-    
-    analyzer.print_automaton(analyzer.combined_automaton, "Autômato Combinado (AFND via ε-transição)")
-    analyzer.save_automaton_to_file(analyzer.combined_automaton, "afnd_combined.txt")
-    
-    analyzer.print_automaton(analyzer.determinized_automaton, "Autômato Determinizado (AFD)")
-    analyzer.save_automaton_to_file(analyzer.determinized_automaton, "afd_determinized.txt")
+    if modal:
+        # Exibir e salvar o AFD de cada condição de início
+        print("\nSalvando autômatos gerados...")
+        for condition, lexer in analyzer.lexers.items():
+            lexer.print_automaton(lexer.determinized_automaton, f"Autômato Determinizado (AFD) da condição {condition}")
+            lexer.save_automaton_to_file(lexer.determinized_automaton, f"afd_determinized_{condition}.txt")
+    else:
+        if show_tables:
+            # Comparar a memória da tabela densa com a da tabela compactada
+            table = analyzer.token_analyzer.table
+            print(f"\n{table} — {table.memory_usage()} bytes")
+            print(table.compress())
+        
+        # Exibir e salvar os autômatos
+        print("\nSalvando autômatos gerados...")
+        for i, automaton in enumerate(analyzer.automata):
+            pattern = analyzer.patterns[i]
+            analyzer.print_automaton(automaton, f"AFD para '{pattern}' (via Follow Pos)")
+            analyzer.save_automaton_to_file(automaton, f"afd_{pattern}.txt")
+        
+        analyzer.print_automaton(analyzer.combined_automaton, "Autômato Combinado (AFND via ε-transição)")
+        analyzer.save_automaton_to_file(analyzer.combined_automaton, "afnd_combined.txt")
+        
+        analyzer.print_automaton(analyzer.determinized_automaton, "Autômato Determinizado (AFD)")
+        analyzer.save_automaton_to_file(analyzer.determinized_automaton, "afd_determinized.txt")
     
     # Analisar arquivo de teste
     print(f"\nAnalisando arquivo de teste '{test_file}'...")
-    tokens = analyzer.analyze_file(test_file, output_file)
+    if output_file.endswith(TOKEN_FILE_EXTENSION):
+        # Saída binária: os tokens exibidos são lidos de volta do arquivo gravado
+        if analyzer.write_token_file(test_file, output_file) is False:
+            print("Falha ao gravar o arquivo de tokens. Abortando.")
+            return
+        with read_token_file(output_file) as reader:
+            tokens = list(reader.tokens())
+    else:
+        tokens = analyzer.analyze_file(test_file, output_file)
     
     # Calcular tempo de execução
     elapsed_time = time.time() - start_time
@@ -0,0 +1,161 @@
+"""
+Variante do analisador de tokens para entradas ASCII baseada em NumPy.
+
+O texto é carregado em um vetor numpy.uint8 e mapeado para classes de
+equivalência com uma única consulta vetorizada a uma tabela de 256 posições.
+O salto de espaços em branco e de comentários de linha também é calculado de
+forma vetorizada, antes da varredura, e o AFD percorre uma tabela de
+transições 2-D pré-calculada.
+"""
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é uma dependência opcional
+    np = None
+
+from token_analyzer import TokenAnalyzer
+from transition_table import DEAD_STATE
+
+SLASH = ord('/')
+NEWLINE = ord('\n')
+
+
+class NumpyTokenAnalyzer(TokenAnalyzer):
+    def __init__(self, automaton, symbol_table, patterns=None, skip_patterns=None, **options):
+        if np is None:
+            raise ImportError("NumpyTokenAnalyzer requer o pacote numpy (pip install numpy)")
+
+        if options.get('compressed'):
+            raise ValueError("NumpyTokenAnalyzer usa a tabela densa; a opção compressed não é suportada")
+
+        super().__init__(automaton, symbol_table, patterns, skip_patterns, **options)
+
+        # Tabela 2-D estados × classes
+        self.transitions = np.array(self.table.rows, dtype=np.int32).reshape(
+            self.table.num_states, self.table.num_classes)
+        # Cópia linear em inteiros Python: indexar escalares NumPy no laço é mais lento
+        self.flat_transitions = self.transitions.ravel().tolist()
+
+        # Consulta byte -> classe de equivalência
+        self.byte_classes = np.zeros(256, dtype=np.int32)
+        for symbol, class_id in self.table.symbol_class.items():
+            if len(symbol) == 1 and ord(symbol) < 256:
+                self.byte_classes[ord(symbol)] = class_id
+
+        # Bytes considerados espaço em branco por str.isspace()
+        self.byte_is_space = np.array([chr(b).isspace() for b in range(128)] + [False] * 128)
+
+    def analyze(self, text, wanted=None):
+        """
+        Analisa o texto (str ou bytes) e retorna a lista de tokens no formato
+        <lexema, padrão>. Entradas não ASCII, o modo de tempo linear, a
+        recuperação de erros configurável e o filtro wanted usam o analisador genérico.
+        """
+        if (self.linear_time or self.error_recovery != 'char' or self.max_errors is not None
+                or wanted is not None or self.state_visits is not None):
+            if isinstance(text, (bytes, bytearray)):
+                text = text.decode('utf-8')
+            return super().analyze(text, wanted)
+
+        if isinstance(text, (bytes, bytearray)):
+            data = np.frombuffer(text, dtype=np.uint8)
+            if data.size and data.max() >= 128:
+                return super().analyze(text.decode('utf-8'))
+            text = text.decode('ascii')
+        elif text.isascii():
+            data = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+        else:
+            return super().analyze(text)
+
+        return self._analyze_array(text, data)
+
+    def _analyze_array(self, text, data):
+        n = len(data)
+
+        # Mapeamento byte -> classe em um único passo vetorizado
+        classes = self.byte_classes[data].tolist()
+
+        # Com padrões %skip declarados (ou sem descarte padrão), o descarte é feito pelo próprio AFD
+        if not self.default_skip:
+            return self._scan_classes(text, classes, None, None)
+
+        # next_token_start[i]: primeira posição >= i que não é espaço em branco
+        next_token_start = np.full(n + 1, n, dtype=np.int64)
+        non_space = np.flatnonzero(~self.byte_is_space[data])
+        next_token_start[non_space] = non_space
+        next_token_start = np.minimum.accumulate(next_token_start[::-1])[::-1].tolist()
+
+        # line_end[i]: posição do primeiro '\n' >= i (ou n)
+        line_end = np.full(n + 1, n, dtype=np.int64)
+        newlines = np.flatnonzero(data == NEWLINE)
+        line_end[newlines] = newlines
+        line_end = np.minimum.accumulate(line_end[::-1])[::-1].tolist()
+
+        # Posições que iniciam um comentário de linha "//"
+        comment_starts = np.zeros(n + 1, dtype=bool)
+        if n > 1:
+            comment_starts[:n - 1] = (data[:-1] == SLASH) & (data[1:] == SLASH)
+        comment_starts = comment_starts.tolist()
+
+        return self._scan_classes(text, classes, next_token_start, comment_starts, line_end)
+
+    def _scan_classes(self, text, classes, next_token_start, comment_starts, line_end=None):
+        """
+        Percorre o AFD sobre a sequência de classes. next_token_start e
+        comment_starts são os saltos pré-calculados do descarte padrão, ou None
+        quando o descarte é feito pelos padrões %skip.
+        """
+        n = len(classes)
+        table = self.flat_transitions
+        num_classes = self.table.num_classes
+        accept = self.table.accept
+        initial = self.table.initial_state
+        symbol_table = self.symbol_table
+        skip_patterns = self.skip_patterns
+        skip_runs = self.skip_runs
+        error_spans = self.error_spans = []
+        offsets = self.token_offsets = array('q')
+
+        tokens = []
+        append = tokens.append
+        position = next_token_start[0] if next_token_start else 0
+
+        while position < n:
+            if comment_starts and comment_starts[position]:
+                position = next_token_start[line_end[position]]
+                continue
+
+            # Maior token possível a partir de position
+            state = initial
+            pos = position
+            last_end = -1
+            last_pattern = None
+            while pos < n:
+                state = table[state * num_classes + classes[pos]]
+                if state == DEAD_STATE:
+                    break
+                pos += 1
+                if skip_runs:
+                    run = skip_runs.get(state)
+                    if run is not None:
+                        pos = run.match(text, pos).end()
+                pattern = accept[state]
+                if pattern is not None:
+                    last_end = pos
+                    last_pattern = pattern
+
+            if last_end > position:
+                if last_pattern not in skip_patterns:
+                    lexeme = text[position:last_end]
+                    symbol_table.add_symbol(lexeme, last_pattern)
+                    append(f"<{lexeme}, {symbol_table.get_pattern(lexeme)}>")
+                    offsets.append(position)
+                position = next_token_start[last_end] if next_token_start else last_end
+            else:
+                error_spans.append((position, position + 1))
+                append(f"<{text[position]}, erro!>")
+                offsets.append(position)
+                position = next_token_start[position + 1] if next_token_start else position + 1
+
+        return tokens
@@ -0,0 +1,40 @@
+"""
+Índice de posições (linha, coluna) de um texto.
+
+Os deslocamentos de início de cada linha são calculados uma única vez, em uma
+passada sobre o texto (str.find/bytes.find, sem copiar as linhas), e
+armazenados em um array compacto. A linha e a coluna
+de um deslocamento são resolvidas sob demanda por busca binária, sem recontar
+quebras de linha a cada token.
+"""
+from array import array
+from bisect import bisect_right
+
+
+class PositionIndex:
+    def __init__(self, text):
+        # Cada linha começa após uma quebra de linha; find percorre o texto em C.
+        # Para bytes (modo UTF-8), linhas e colunas são contadas em bytes
+        newline = b'\n' if isinstance(text, (bytes, bytearray)) else '\n'
+        find = text.find
+        self.line_starts = array('q', [0])
+        position = find(newline)
+        while position >= 0:
+            self.line_starts.append(position + 1)
+            position = find(newline, position + 1)
+        self.length = len(text)
+
+    def line_count(self):
+        return len(self.line_starts)
+
+    def line_column(self, offset):
+        """Retorna (linha, coluna), ambas a partir de 1, do deslocamento dado."""
+        if offset < 0 or offset > self.length:
+            raise ValueError(f"Deslocamento fora do texto: {offset}")
+
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+    def line_start(self, line):
+        """Retorna o deslocamento do início da linha (a partir de 1)."""
+        return self.line_starts[line - 1]
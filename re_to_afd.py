@@ -1,11 +1,107 @@
 """
 Implementação da conversão direta de Expressão Regular para Autômato Finito Determinístico
 """
+import heapq
+import re
 from automaton import Automaton
+from afnd_to_afd import DeterminizationError, SUBSET_ENTRY_BYTES, TRANSITION_BYTES, REPORTED_SUBSETS
 from collections import defaultdict
 
+# Sequências de escape que representam caracteres de controle
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v'}
+
+# Caracteres cobertos por uma classe negada: ASCII imprimível e espaços de controle
+NEGATED_CLASS_BASE = [chr(c) for c in range(32, 127)] + ['\t', '\n', '\r']
+
+# Repetição limitada: {m}, {m,} ou {m,n}
+QUANTIFIER = re.compile(r'\{(\d+)(,(\d*))?\}')
+
+# Orçamento padrão de posições/estados por expressão; acima dele a expansão
+# de repetições (e o AFD resultante) gera um aviso durante a compilação
+DEFAULT_STATE_BUDGET = 10000
+
+# Maior ponto de código Unicode e faixa reservada aos substitutos (sem codificação UTF-8)
+MAX_CODE_POINT = 0x10FFFF
+SURROGATES = (0xD800, 0xDFFF)
+
+
+def utf8_sequences(start, end):
+    """
+    Decompõe a faixa de pontos de código [start, end] em sequências de faixas
+    de bytes UTF-8 (como as Utf8Sequences do crate regex do Rust): cada
+    sequência é uma lista [(lo, hi), ...] com uma faixa por byte, e a união das
+    sequências reconhece exatamente as codificações dos pontos da faixa.
+    """
+    sequences = []
+    stack = [(start, end)]
+    
+    while stack:
+        start, end = stack.pop()
+        
+        # Substitutos não são codificáveis
+        if start <= SURROGATES[1] and end >= SURROGATES[0]:
+            if end > SURROGATES[1]:
+                stack.append((SURROGATES[1] + 1, end))
+            if start < SURROGATES[0]:
+                stack.append((start, SURROGATES[0] - 1))
+            continue
+        
+        # Separar por tamanho da codificação (1 a 4 bytes)
+        for limit in (0x7F, 0x7FF, 0xFFFF):
+            if start <= limit < end:
+                stack.append((limit + 1, end))
+                stack.append((start, limit))
+                break
+        else:
+            # Alinhar a faixa aos limites dos bytes de continuação (6 bits cada)
+            for i in range(1, 4):
+                mask = (1 << (6 * i)) - 1
+                if start & ~mask != end & ~mask:
+                    if start & mask != 0:
+                        stack.append(((start | mask) + 1, end))
+                        stack.append((start, start | mask))
+                        break
+                    if end & mask != mask:
+                        stack.append((end & ~mask, end))
+                        stack.append((start, (end & ~mask) - 1))
+                        break
+            else:
+                first = chr(start).encode('utf-8')
+                last = chr(end).encode('utf-8')
+                sequences.append(list(zip(first, last)))
+    
+    return sequences
+
+
+def remove_unescaped_spaces(regex):
+    """Remove os espaços da expressão, preservando os escapados (\\ )."""
+    result = []
+    i = 0
+    while i < len(regex):
+        if regex[i] == '\\' and i + 1 < len(regex):
+            result.append(regex[i:i + 2])
+            i += 2
+        elif regex[i] == ' ':
+            i += 1
+        else:
+            result.append(regex[i])
+            i += 1
+    return "".join(result)
+
+
+# Operadores unários como (anulável, repetível): compostos, resultam no operador
+# com a disjunção das propriedades, p. ex. (a*)* = a*, (a?)+ = a*, (a+)? = a*
+QUANTIFIERS = {'star': (True, True), 'plus': (False, True), 'opt': (True, False)}
+QUANTIFIER_TYPES = {properties: type for type, properties in QUANTIFIERS.items()}
+
+# Tipos de nós reescritos por RegexToAFD._optimize
+REWRITTEN = frozenset(('alt', 'star', 'plus', 'opt'))
+
+
 class RegexNode:
     """Classe que representa um nó na árvore sintática da expressão regular."""
+    __slots__ = ('type', 'value', 'left', 'right', 'position', 'nullable', 'firstpos', 'lastpos', 'followpos')
+    
     def __init__(self, type, value=None):
         self.type = type            
         self.value = value       
@@ -18,7 +114,18 @@ class RegexNode:
         self.followpos = None       
 
 class RegexToAFD:
-    def __init__(self):
+    def __init__(self, utf8=False, state_budget=DEFAULT_STATE_BUDGET, max_states=None,
+                 max_transitions=None, max_memory=None):
+        # Com utf8=True, o AFD reconhece os bytes UTF-8 do texto: os símbolos são
+        # os bytes 0-255 (representados por chr(byte)) e classes de caracteres
+        # cobrem todo o Unicode, e não apenas o ASCII
+        self.utf8 = utf8
+        self.state_budget = state_budget
+        # Limites da construção do AFD, como em determinize: ao exceder um deles,
+        # _build_afd é interrompido com DeterminizationError (ver convert_nfa)
+        self.max_states = max_states
+        self.max_transitions = max_transitions
+        self.max_memory = max_memory
         self.position_counter = 0    # Contador para gerar posições únicas
         self.followpos = defaultdict(set)  # Mapeamento de posições para seus followpos
         self.position_symbol = {}    # Mapeamento de posições para símbolos
@@ -28,8 +135,28 @@ class RegexToAFD:
     
     def convert(self, regex):
         """Converte uma expressão regular para um AFD usando o algoritmo follow-pos."""
-        # Remover espaços em branco
-        self.regex_string = regex.replace(" ", "")
+        self._prepare(regex)
+        
+        # Construir o AFD a partir das informações calculadas
+        afd = self._build_afd()
+        if len(afd.states) > self.state_budget:
+            print(f"Aviso: o AFD de {regex!r} tem {len(afd.states)} estados, "
+                  f"acima do orçamento de {self.state_budget}.")
+        return afd
+    
+    def convert_nfa(self, regex):
+        """
+        Converte a expressão no autômato de posições: um AFND sem ε-transições,
+        com um estado por posição, cujo tamanho não depende da construção de
+        subconjuntos. Usado quando o AFD da expressão excede os limites.
+        """
+        self._prepare(regex)
+        return self._build_nfa()
+    
+    def _prepare(self, regex):
+        """Constrói a árvore sintática e calcula nullable, firstpos, lastpos e followpos."""
+        # Remover espaços em branco (um espaço literal é escrito como "\ ")
+        self.regex_string = remove_unescaped_spaces(regex)
         self.current_pos = 0
         self.position_counter = 1
         self.followpos = defaultdict(set)
@@ -43,14 +170,14 @@ class RegexToAFD:
         print(f"Construindo árvore sintática para: {self.regex_string}")
         self.root = self._parse_expression()
         
+        # Simplificar a árvore (fatoração de alternativas, operadores redundantes)
+        self.root = self._optimize(self.root)
+        
         # Calcular firstpos, lastpos e nullable
         self._calculate_sets(self.root)
         
         # Calcular followpos
         self._calculate_followpos(self.root)
-        
-        # Construir o AFD a partir das informações calculadas
-        return self._build_afd()
     
     def _parse_expression(self):
         """Analisa uma expressão regular e constrói a árvore sintática."""
@@ -89,7 +216,7 @@ class RegexToAFD:
         return result
     
     def _parse_factor(self):
-        """Analisa um fator (átomo possivelmente seguido por *, + ou ?) na expressão regular."""
+        """Analisa um fator (átomo possivelmente seguido por *, +, ? ou {m,n}) na expressão regular."""
         # Analisar o átomo
         result = self._parse_atom()
         
@@ -113,9 +240,72 @@ class RegexToAFD:
                 opt_node = RegexNode('opt')
                 opt_node.left = result
                 result = opt_node
+            elif self.regex_string[self.current_pos] == '{':
+                # Repetição limitada; um '{' que não forma um quantificador é literal
+                quantifier = QUANTIFIER.match(self.regex_string, self.current_pos)
+                if quantifier:
+                    self.current_pos = quantifier.end()
+                    minimum = int(quantifier.group(1))
+                    if quantifier.group(2) is None:
+                        maximum = minimum
+                    else:
+                        maximum = int(quantifier.group(3)) if quantifier.group(3) else None
+                    result = self._repeat(result, minimum, maximum, quantifier.group(0))
         
         return result
     
+    def _repeat(self, node, minimum, maximum, quantifier):
+        """
+        Expande node{minimum,maximum} (maximum=None para {m,}) em cópias do nó.
+        As cópias opcionais são aninhadas, x{2,4} = x x (x (x)?)?, de modo que
+        cada posição segue apenas a próxima cópia: os conjuntos de posições dos
+        estados do AFD permanecem pequenos, em vez de crescerem com o número de
+        cópias como em x x x? x?. Em {m,}, a última cópia obrigatória recebe o
+        fechamento positivo (x{2,} = x x+). As folhas copiadas compartilham os
+        conjuntos de símbolos do original. x{0} e x{0,0} reconhecem apenas a
+        cadeia vazia (nó 'empty').
+        """
+        if maximum is not None and maximum < minimum:
+            raise ValueError(f"Repetição inválida {quantifier}: máximo menor que o mínimo")
+        if maximum == 0:
+            return RegexNode('empty')
+        
+        copies = max(minimum, 1) if maximum is None else maximum
+        positions = sum(1 for n in self._postorder(node) if n.type == 'symbol')
+        if positions * copies > self.state_budget:
+            print(f"Aviso: a repetição {quantifier} gera {positions * copies} posições, "
+                  f"acima do orçamento de {self.state_budget} estados.")
+        
+        nodes = [node] + [self._clone(node) for _ in range(copies - 1)]
+        
+        if maximum is None:
+            if minimum == 0:
+                star_node = RegexNode('star')
+                star_node.left = node
+                return star_node
+            plus_node = RegexNode('plus')
+            plus_node.left = nodes[-1]
+            return self._concat_nodes(nodes[:-1] + [plus_node])
+        
+        # Cópias opcionais aninhadas, da última para a primeira
+        tail = None
+        for optional in reversed(nodes[minimum:]):
+            opt_node = RegexNode('opt')
+            opt_node.left = optional if tail is None else self._concat_nodes([optional, tail])
+            tail = opt_node
+        
+        required = nodes[:minimum]
+        return self._concat_nodes(required + [tail] if tail else required)
+    
+    def _clone(self, node):
+        """Copia a subárvore com novas posições para as folhas."""
+        if node.type == 'symbol':
+            return self._symbol_node(node.value)
+        clone = RegexNode(node.type)
+        clone.left = self._clone(node.left) if node.left else None
+        clone.right = self._clone(node.right) if node.right else None
+        return clone
+    
     def _parse_atom(self):
         """Analisa um átomo (caractere, grupo ou subexpressão) na expressão regular."""
         if self.current_pos >= len(self.regex_string):
@@ -144,28 +334,48 @@ class RegexToAFD:
                 raise ValueError("Escape no final da expressão regular")
             
             self.current_pos += 1  # Pular o '\'
-            char = self.regex_string[self.current_pos]
+            char = ESCAPES.get(self.regex_string[self.current_pos], self.regex_string[self.current_pos])
             self.current_pos += 1  # Consumir o caractere escapado
             
-            # Criar nó de símbolo
-            symbol_node = RegexNode('symbol', char)
-            symbol_node.position = self.position_counter
-            self.position_symbol[self.position_counter] = char
-            self.position_counter += 1
-            
-            return symbol_node
+            return self._char_node(char)
         
         else:
             # Caractere simples
             self.current_pos += 1
             
-            # Criar nó de símbolo
-            symbol_node = RegexNode('symbol', char)
-            symbol_node.position = self.position_counter
-            self.position_symbol[self.position_counter] = char
-            self.position_counter += 1
-            
-            return symbol_node
+            return self._char_node(char)
+    
+    def _symbol_node(self, value):
+        """
+        Cria uma folha com uma nova posição. value é um símbolo ou, no modo
+        UTF-8, um frozenset de bytes aceitos na mesma posição.
+        """
+        symbol_node = RegexNode('symbol', value)
+        symbol_node.position = self.position_counter
+        self.position_symbol[self.position_counter] = value
+        self.position_counter += 1
+        return symbol_node
+    
+    def _concat_nodes(self, nodes):
+        """Concatena os nós em uma árvore balanceada (profundidade logarítmica)."""
+        while len(nodes) > 1:
+            # Concatenar pares vizinhos, nível a nível
+            paired = []
+            for i in range(0, len(nodes) - 1, 2):
+                concat_node = RegexNode('concat')
+                concat_node.left = nodes[i]
+                concat_node.right = nodes[i + 1]
+                paired.append(concat_node)
+            if len(nodes) % 2:
+                paired.append(nodes[-1])
+            nodes = paired
+        return nodes[0]
+    
+    def _char_node(self, char):
+        """Cria o nó de um caractere: no modo UTF-8, a sequência dos seus bytes."""
+        if self.utf8 and ord(char) > 0x7F:
+            return self._concat_nodes([self._symbol_node(chr(byte)) for byte in char.encode('utf-8')])
+        return self._symbol_node(char)
     
     def _parse_character_class(self):
         """Analisa uma classe de caracteres [a-z] na expressão regular."""
@@ -173,35 +383,42 @@ class RegexToAFD:
             raise ValueError("Esperava '[' para iniciar classe de caracteres")
         
         self.current_pos += 1  # Consumir o '['
-        start_pos = self.current_pos
         
         # Verificar se é uma classe negada
         is_negated = False
         if self.current_pos < len(self.regex_string) and self.regex_string[self.current_pos] == '^':
             is_negated = True
             self.current_pos += 1  # Consumir o '^'
-            start_pos = self.current_pos  # Ajustar a posição de início para ignorar o '^'
         
-        # Procurar o fechamento do grupo
+        # Procurar o fechamento do grupo, extraindo os itens (com escapes resolvidos)
+        items = []
         while self.current_pos < len(self.regex_string) and self.regex_string[self.current_pos] != ']':
+            char = self.regex_string[self.current_pos]
+            if char == '\\' and self.current_pos + 1 < len(self.regex_string):
+                self.current_pos += 1
+                escaped = self.regex_string[self.current_pos]
+                items.append((ESCAPES.get(escaped, escaped), True))
+            else:
+                items.append((char, False))
             self.current_pos += 1
         
         if self.current_pos >= len(self.regex_string):
             raise ValueError(f"Classe de caracteres não fechada na expressão regular: {self.regex_string}")
         
-        # Extrair o conteúdo do grupo
-        group_content = self.regex_string[start_pos:self.current_pos]
         self.current_pos += 1  # Consumir o ']'
         
+        if self.utf8:
+            return self._utf8_class_node(items, is_negated)
+        
         # Processar o grupo para extrair caracteres
         chars = []
         i = 0
         
-        while i < len(group_content):
-            if i + 2 < len(group_content) and group_content[i+1] == '-':
+        while i < len(items):
+            if i + 2 < len(items) and items[i+1] == ('-', False):
                 # Range de caracteres (e.g., a-z)
-                start_char = group_content[i]
-                end_char = group_content[i+2]
+                start_char = items[i][0]
+                end_char = items[i+2][0]
                 
                 for c in range(ord(start_char), ord(end_char) + 1):
                     chars.append(chr(c))
@@ -209,14 +426,12 @@ class RegexToAFD:
                 i += 3
             else:
                 # Caractere único
-                chars.append(group_content[i])
+                chars.append(items[i][0])
                 i += 1
         
         if is_negated:            
-            # Definir um conjunto base de caracteres ASCII visíveis
-            all_chars = set()
-            for c in range(32, 127):  # Caracteres ASCII imprimíveis
-                all_chars.add(chr(c))
+            # Definir o conjunto base de caracteres (ASCII imprimível, tabulação e quebras de linha)
+            all_chars = set(NEGATED_CLASS_BASE)
             
             # Remover os caracteres especificados na classe negada
             for char in chars:
@@ -251,92 +466,281 @@ class RegexToAFD:
     
         return result
     
-    def _calculate_sets(self, node):
-        """Calcula os conjuntos nullable, firstpos e lastpos para cada nó."""
-        if node is None:
-            return
+    def _utf8_class_node(self, items, is_negated):
+        """
+        Constrói a classe de caracteres no modo UTF-8: as faixas de pontos de
+        código (complementadas em todo o Unicode, se negada) são decompostas em
+        sequências de faixas de bytes, e cada faixa de bytes ocupa uma única
+        posição. Classes com milhares de caracteres geram poucas posições.
+        """
+        ranges = []
+        i = 0
+        while i < len(items):
+            if i + 2 < len(items) and items[i+1] == ('-', False):
+                ranges.append((ord(items[i][0]), ord(items[i+2][0])))
+                i += 3
+            else:
+                ranges.append((ord(items[i][0]), ord(items[i][0])))
+                i += 1
         
-        if node.type == 'symbol':
-            # Nó de símbolo
-            node.nullable = False
-            node.firstpos = {node.position}
-            node.lastpos = {node.position}
-        
-        elif node.type == 'concat':
-            # Nó de concatenação
-            self._calculate_sets(node.left)
-            self._calculate_sets(node.right)
-            
-            node.nullable = node.left.nullable and node.right.nullable
-            
-            if node.left.nullable:
-                node.firstpos = node.left.firstpos | node.right.firstpos
+        # Unir faixas sobrepostas ou adjacentes
+        merged = []
+        for start, end in sorted(r for r in ranges if r[0] <= r[1]):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
             else:
-                node.firstpos = node.left.firstpos
-            
-            if node.right.nullable:
-                node.lastpos = node.left.lastpos | node.right.lastpos
+                merged.append((start, end))
+        
+        if is_negated:
+            complement = []
+            next_start = 0
+            for start, end in merged:
+                if start > next_start:
+                    complement.append((next_start, start - 1))
+                next_start = end + 1
+            if next_start <= MAX_CODE_POINT:
+                complement.append((next_start, MAX_CODE_POINT))
+            merged = complement
+        
+        sequences = [sequence for start, end in merged for sequence in utf8_sequences(start, end)]
+        if not sequences:
+            raise ValueError("Classe de caracteres vazia ou inválida")
+        
+        result = None
+        for sequence in sequences:
+            node = self._concat_nodes([self._symbol_node(frozenset(chr(b) for b in range(lo, hi + 1)))
+                                       for lo, hi in sequence])
+            if result is None:
+                result = node
             else:
-                node.lastpos = node.right.lastpos
+                alt_node = RegexNode('alt')
+                alt_node.left = result
+                alt_node.right = node
+                result = alt_node
         
-        elif node.type == 'alt':
-            # Nó de alternância
-            self._calculate_sets(node.left)
-            self._calculate_sets(node.right)
-            
-            node.nullable = node.left.nullable or node.right.nullable
-            node.firstpos = node.left.firstpos | node.right.firstpos
-            node.lastpos = node.left.lastpos | node.right.lastpos
+        return result
+    
+    def _symbols_at(self, pos):
+        """Símbolos aceitos na posição (um único símbolo ou um conjunto de bytes)."""
+        value = self.position_symbol[pos]
+        return value if isinstance(value, frozenset) else (value,)
+    
+    def _postorder(self, node):
+        """
+        Lista os nós da árvore em pós-ordem, sem recursão (repetições longas
+        geram árvores profundas): é o inverso da pré-ordem nó, direita, esquerda.
+        """
+        order = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            if node.left is not None:
+                stack.append(node.left)
+            if node.right is not None:
+                stack.append(node.right)
+        order.reverse()
+        return order
+    
+    def _optimize(self, root):
+        """
+        Reescreve a árvore antes do cálculo de firstpos/lastpos/followpos:
+        - alternativas de sequências literais são fatoradas em uma trie
+          (if|int|in = i(f|n(t)?)), de modo que prefixos comuns ocupam uma única posição;
+        - alternativas de símbolos isolados (como as classes [a-z]) viram uma
+          única posição com o conjunto de símbolos;
+        - alternativas repetidas são eliminadas;
+        - operadores unários compostos são reduzidos ((a*)* = a*, (a+)? = a*).
+        Ao final, as posições são renumeradas da esquerda para a direita (o
+        marcador de fim # continua sendo a última).
+        """
+        # Em pós-ordem, os filhos de cada nó já têm as subárvores simplificadas.
+        # Cada cadeia de alternâncias é reescrita de uma só vez, a partir do seu
+        # topo (um filho 'alt' de um nó 'alt' faz parte da cadeia)
+        for node in self._postorder(root):
+            left, right = node.left, node.right
+            if left is not None and left.type in REWRITTEN and not (node.type == left.type == 'alt'):
+                node.left = self._simplify(left)
+            if right is not None and right.type in REWRITTEN and not (node.type == right.type == 'alt'):
+                node.right = self._simplify(right)
+        root = self._simplify(root)
         
-        elif node.type == 'star':
-            # Nó de fechamento de Kleene
-            self._calculate_sets(node.left)
-            
-            node.nullable = True
-            node.firstpos = node.left.firstpos
-            node.lastpos = node.left.lastpos
+        self.position_symbol = {}
+        self.position_counter = 1
+        for node in self._postorder(root):
+            if node.type == 'symbol':
+                node.position = self.position_counter
+                self.position_symbol[self.position_counter] = node.value
+                self.position_counter += 1
         
-        elif node.type == 'plus':
-            # Nó de fechamento positivo
-            self._calculate_sets(node.left)
-            
-            node.nullable = node.left.nullable
-            node.firstpos = node.left.firstpos
-            node.lastpos = node.left.lastpos
+        return root
+    
+    def _simplify(self, node):
+        """Simplifica um nó cujas subárvores já foram simplificadas."""
+        if node.type == 'alt':
+            return self._factor(self._chain(node, 'alt'))
         
-        elif node.type == 'opt':
-            # Nó opcional
-            self._calculate_sets(node.left)
-            
-            node.nullable = True
-            node.firstpos = node.left.firstpos
-            node.lastpos = node.left.lastpos
+        if node.type in QUANTIFIERS and node.left.type in QUANTIFIERS:
+            outer, nested = QUANTIFIERS[node.type], QUANTIFIERS[node.left.type]
+            node.type = QUANTIFIER_TYPES[(outer[0] or nested[0], outer[1] or nested[1])]
+            node.left = node.left.left
+        
+        return node
     
-    def _calculate_followpos(self, node):
-        """Calcula o conjunto followpos para cada posição."""
-        if node is None:
-            return
+    def _chain(self, node, type):
+        """Operandos de uma cadeia de nós do tipo dado, da esquerda para a direita."""
+        operands = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.type == type:
+                stack.append(node.right)
+                stack.append(node.left)
+            else:
+                operands.append(node)
+        return operands
+    
+    def _factor(self, branches):
+        """
+        Constrói a alternância dos ramos, eliminando os repetidos e fatorando
+        os prefixos de símbolos comuns às suas sequências de fatores concatenados.
+        """
+        sequences = [self._chain(branch, 'concat') for branch in branches]
+        signatures = self._signatures(node for sequence in sequences for node in sequence)
+        unique = {}
+        for branch, sequence in zip(branches, sequences):
+            unique.setdefault(tuple(signatures[node] for node in sequence), (branch, sequence))
+        return self._trie(list(unique.values()), 0)
+    
+    def _trie(self, entries, depth):
+        """
+        Alternância dos sufixos, a partir do índice depth, das sequências dos
+        pares (ramo, sequência); os prefixos anteriores são comuns a todas. Um
+        sufixo vazio torna a alternância opcional; retorna None se todos os
+        sufixos forem vazios.
+        """
+        # Agrupar pelo próximo símbolo, preservando a ordem de aparição
+        groups = {}
+        others = []
+        accepts_empty = False
+        for entry in entries:
+            sequence = entry[1]
+            if len(sequence) == depth:
+                accepts_empty = True
+            elif sequence[depth].type == 'symbol':
+                groups.setdefault(sequence[depth].value, []).append(entry)
+            else:
+                others.append(entry)
+        
+        branches = []
+        single_symbols = set()
+        for value, group in groups.items():
+            first = group[0][1]
+            if len(group) > 1:
+                suffix = self._trie(group, depth + 1)
+                branches.append(first[depth] if suffix is None else self._concat_nodes([first[depth], suffix]))
+            elif len(first) == depth + 1:
+                single_symbols.update(value if isinstance(value, frozenset) else (value,))
+            else:
+                branches.append(self._suffix(group[0], depth))
         
-        if node.type == 'concat':
-            for pos in node.left.lastpos:
-                self.followpos[pos].update(node.right.firstpos)
-            
-            # Recursivamente calcular followpos para os filhos
-            self._calculate_followpos(node.left)
-            self._calculate_followpos(node.right)
+        if single_symbols:
+            value = next(iter(single_symbols)) if len(single_symbols) == 1 else frozenset(single_symbols)
+            branches.insert(0, RegexNode('symbol', value))
+        branches.extend(self._suffix(entry, depth) for entry in others)
         
-        elif node.type in ('star', 'plus'):
-            for pos in node.lastpos:
-                self.followpos[pos].update(node.firstpos)
+        if not branches:
+            return None
+        
+        result = branches[0]
+        for branch in branches[1:]:
+            alt_node = RegexNode('alt')
+            alt_node.left = result
+            alt_node.right = branch
+            result = alt_node
+        
+        if accepts_empty:
+            opt_node = RegexNode('opt')
+            opt_node.left = result
+            result = self._simplify(opt_node)
+        
+        return result
+    
+    def _suffix(self, entry, depth):
+        """Nó da sequência do par (ramo, sequência) a partir de depth (o próprio ramo se depth for 0)."""
+        branch, sequence = entry
+        return branch if depth == 0 else self._concat_nodes(sequence[depth:])
+    
+    def _signatures(self, nodes):
+        """Assinatura estrutural (tuplas aninhadas) de cada subárvore, para detectar repetições."""
+        signatures = {}
+        for root in nodes:
+            if root.type == 'symbol':
+                signatures[root] = ('symbol', root.value, None, None)
+                continue
+            for node in self._postorder(root):
+                if node not in signatures:
+                    signatures[node] = (node.type, node.value,
+                                        signatures.get(node.left), signatures.get(node.right))
+        return signatures
+    
+    def _calculate_sets(self, root):
+        """Calcula os conjuntos nullable, firstpos e lastpos para cada nó."""
+        for node in self._postorder(root):
+            if node.type == 'symbol':
+                # Nó de símbolo
+                node.nullable = False
+                node.firstpos = {node.position}
+                node.lastpos = {node.position}
+            
+            elif node.type == 'concat':
+                # Nó de concatenação
+                node.nullable = node.left.nullable and node.right.nullable
+                
+                if node.left.nullable:
+                    node.firstpos = node.left.firstpos | node.right.firstpos
+                else:
+                    node.firstpos = node.left.firstpos
+                
+                if node.right.nullable:
+                    node.lastpos = node.left.lastpos | node.right.lastpos
+                else:
+                    node.lastpos = node.right.lastpos
+            
+            elif node.type == 'alt':
+                # Nó de alternância
+                node.nullable = node.left.nullable or node.right.nullable
+                node.firstpos = node.left.firstpos | node.right.firstpos
+                node.lastpos = node.left.lastpos | node.right.lastpos
+            
+            elif node.type in ('star', 'opt'):
+                # Nó de fechamento de Kleene ou opcional
+                node.nullable = True
+                node.firstpos = node.left.firstpos
+                node.lastpos = node.left.lastpos
+            
+            elif node.type == 'plus':
+                # Nó de fechamento positivo
+                node.nullable = node.left.nullable
+                node.firstpos = node.left.firstpos
+                node.lastpos = node.left.lastpos
+            
+            elif node.type == 'empty':
+                # Cadeia vazia (repetição x{0})
+                node.nullable = True
+                node.firstpos = set()
+                node.lastpos = set()
+    
+    def _calculate_followpos(self, root):
+        """Calcula o conjunto followpos para cada posição."""
+        for node in self._postorder(root):
+            if node.type == 'concat':
+                for pos in node.left.lastpos:
+                    self.followpos[pos].update(node.right.firstpos)
             
-            # Recursivamente calcular followpos para o filho
-            self._calculate_followpos(node.left)
-        
-        elif node.type in ('alt', 'opt'):
-            # Recursivamente calcular followpos para os filhos
-            self._calculate_followpos(node.left)
-            if node.right:
-                self._calculate_followpos(node.right)
+            elif node.type in ('star', 'plus'):
+                for pos in node.lastpos:
+                    self.followpos[pos].update(node.firstpos)
     
     def _build_afd(self):
         """Constrói o AFD a partir das informações de followpos."""
@@ -359,6 +763,15 @@ class RegexToAFD:
         if end_marker_pos in initial_state_positions:
             afd.add_final_state(0)
         
+        # Contadores para os limites da construção (mesma estimativa de determinize)
+        num_transitions = 0
+        position_entries = len(initial_state_positions)
+        
+        def overflow(reason):
+            largest = heapq.nlargest(REPORTED_SUBSETS, states_dict, key=len)
+            return DeterminizationError(f"Construção do AFD da expressão interrompida: {reason} "
+                                        f"({len(states_dict)} estados, {num_transitions} transições)", largest)
+        
         # Processar estados não marcados
         while unmarked_states:
             current_positions = unmarked_states.pop(0)
@@ -368,14 +781,13 @@ class RegexToAFD:
             symbols = set()
             for pos in current_positions:
                 if pos != end_marker_pos:
-                    symbol = self.position_symbol[pos]
-                    symbols.add(symbol)
+                    symbols.update(self._symbols_at(pos))
             
             for symbol in symbols:
                 # Determinar as posições alcançáveis a partir do estado atual pelo símbolo
                 next_positions = set()
                 for pos in current_positions:
-                    if self.position_symbol[pos] == symbol:
+                    if symbol in self._symbols_at(pos):
                         next_positions.update(self.followpos[pos])
                 
                 if not next_positions:
@@ -389,6 +801,10 @@ class RegexToAFD:
                     states_dict[next_positions] = next_state
                     unmarked_states.append(next_positions)
                     
+                    position_entries += len(next_positions)
+                    if self.max_states is not None and len(states_dict) > self.max_states:
+                        raise overflow(f"limite de {self.max_states} estados excedido")
+                    
                     # Verificar se o novo estado contém o marcador de fim
                     if end_marker_pos in next_positions:
                         afd.add_final_state(next_state)
@@ -397,9 +813,50 @@ class RegexToAFD:
                 
                 # Adicionar a transição ao AFD
                 afd.add_transition(current_state, symbol, next_state)
+                
+                num_transitions += 1
+                if self.max_transitions is not None and num_transitions > self.max_transitions:
+                    raise overflow(f"limite de {self.max_transitions} transições excedido")
+                if (self.max_memory is not None and position_entries * SUBSET_ENTRY_BYTES
+                        + num_transitions * TRANSITION_BYTES > self.max_memory):
+                    raise overflow(f"limite estimado de {self.max_memory} bytes de memória excedido")
         
         # Adicionar estados ao AFD
         for i in range(len(states_dict)):
             afd.add_state(i)
         
-        return afd
\ No newline at end of file
+        return afd
+    
+    def _build_nfa(self):
+        """
+        Constrói o autômato de posições: o estado inicial leva às posições de
+        firstpos da raiz e cada posição às de seu followpos, pelos símbolos da
+        posição de destino; são finais os estados seguidos pelo marcador de fim.
+        """
+        end_marker_pos = self.position_counter - 1
+        
+        nfa = Automaton()
+        nfa.set_initial_state(0)
+        
+        # Posição -> estado do AFND (a posição 0, não usada pela árvore, é o estado inicial)
+        states_dict = {0: 0}
+        unmarked_positions = [0]
+        
+        while unmarked_positions:
+            position = unmarked_positions.pop()
+            current_state = states_dict[position]
+            following = self.root.firstpos if position == 0 else self.followpos[position]
+            
+            if end_marker_pos in following:
+                nfa.add_final_state(current_state)
+            
+            for next_position in sorted(following):
+                if next_position == end_marker_pos:
+                    continue
+                if next_position not in states_dict:
+                    states_dict[next_position] = len(states_dict)
+                    unmarked_positions.append(next_position)
+                for symbol in self._symbols_at(next_position):
+                    nfa.add_transition(current_state, symbol, states_dict[next_position])
+        
+        return nfa
\ No newline at end of file
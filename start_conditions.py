@@ -0,0 +1,319 @@
+"""
+Condições de início (start conditions) no estilo do flex.
+
+O arquivo de definições pode declarar condições com
+
+    %x NOME ...   condições exclusivas: só as regras marcadas com <NOME> ficam ativas
+    %s NOME ...   condições inclusivas: as regras sem marcação também ficam ativas
+
+e cada regra aceita, antes do ':', a lista de condições em que está ativa e
+uma ação que troca de condição após o token (o BEGIN do flex):
+
+    [%skip] [<C1,C2,...>] nome [-> CONDICAO]: regex
+
+Regras sem <...> pertencem à condição INITIAL (e às inclusivas); <*> marca
+todas as condições. Exemplo (cadeias com escapes e comentários de bloco):
+
+    %x CADEIA COMENTARIO
+    %skip ws: [\\ \\t\\n\\r]+
+    %skip abre_comentario -> COMENTARIO: /\\*
+    id: [a-zA-Z]([a-zA-Z]|[0-9])*
+    aspas -> CADEIA: "
+    <CADEIA>texto: [^"\\\\\\n]+
+    <CADEIA>escape: \\\\[^\\n]
+    <CADEIA>fecha_aspas -> INITIAL: "
+    %skip <COMENTARIO>corpo: [^*]+ | \\*
+    %skip <COMENTARIO>fecha_comentario -> INITIAL: \\*/
+
+Cada condição é compilada em um AFD próprio (um LexicalAnalyzer por condição,
+com os AFDs das expressões compartilhados por um LexerRegistry). A troca de
+condição acontece apenas entre tokens: cadeias, comentários de bloco e
+heredocs são reconhecidos por autômatos dedicados, sem testes especiais por
+caractere no laço de varredura. As palavras reservadas (regra "pr") só são
+promovidas a "PR" nas condições em que essa regra está ativa.
+"""
+from array import array
+from symbol_table import SymbolTable
+from lexical_analyzer import LexicalAnalyzer, is_condition_declaration, is_start_condition_line
+from lexer_registry import LexerRegistry
+from position_index import PositionIndex
+
+INITIAL = 'INITIAL'
+
+# Marca de regra ativa em todas as condições (<*>)
+ALL_CONDITIONS = '*'
+
+
+def parse_rule_header(header):
+    """
+    Interpreta a parte de uma regra antes do ':'. Retorna
+    (nome, skip, condições ou None, condição de destino ou None).
+    """
+    skip = False
+    if header.startswith('%skip'):
+        skip = True
+        header = header[len('%skip'):].strip()
+
+    conditions = None
+    if header.startswith('<'):
+        end = header.find('>')
+        if end < 0:
+            raise ValueError(f"Lista de condições não fechada: {header}")
+        conditions = tuple(name.strip() for name in header[1:end].split(',') if name.strip())
+        header = header[end + 1:].strip()
+
+    begin = None
+    if '->' in header:
+        header, _, begin = header.rpartition('->')
+        header, begin = header.strip(), begin.strip()
+
+    return header, skip, conditions, begin
+
+
+def read_start_conditions(lines):
+    """
+    Lê as linhas de um arquivo de definições com condições de início. Retorna
+    (condições, regras): condições mapeia cada nome para True se a condição é
+    exclusiva (INITIAL é inclusiva) e regras é a lista de tuplas
+    (nome, regex, skip, condições, destino), com condições None nas regras sem <...>.
+    """
+    conditions = {INITIAL: False}
+    rules = []
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        if is_condition_declaration(line):
+            exclusive = line[1] == 'x'
+            for name in line[2:].split():
+                conditions[name] = exclusive
+            continue
+
+        parts = line.split(':', 1)
+        if len(parts) != 2:
+            print(f"Aviso: linha inválida no arquivo de definições: {line}")
+            continue
+
+        pattern_name, skip, rule_conditions, begin = parse_rule_header(parts[0].strip())
+        regex = parts[1].strip()
+        if pattern_name and regex:
+            rules.append((pattern_name, regex, skip, rule_conditions, begin))
+
+    for pattern_name, _, _, rule_conditions, begin in rules:
+        for name in (rule_conditions or ()):
+            if name != ALL_CONDITIONS and name not in conditions:
+                raise ValueError(f"Condição de início não declarada: {name} (regra {pattern_name})")
+        if begin is not None and begin not in conditions:
+            raise ValueError(f"Condição de início não declarada: {begin} (regra {pattern_name})")
+
+    return conditions, rules
+
+
+def uses_start_conditions(filename):
+    """Indica se o arquivo de definições declara condições de início ou ações de troca."""
+    try:
+        with open(filename, 'r') as file:
+            for line in file:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if is_start_condition_line(line):
+                    return True
+    except FileNotFoundError:
+        pass
+    return False
+
+
+class StartConditionAnalyzer:
+    def __init__(self, utf8=False, registry=None):
+        self.utf8 = utf8
+        self.registry = registry or LexerRegistry()   # AFDs das expressões compartilhados entre condições
+        self.conditions = {}        # condição -> exclusiva
+        self.lexers = {}            # condição -> LexicalAnalyzer com as regras ativas nela
+        self.actions = {}           # condição -> {padrão: condição de destino}
+        self.discarded = {}         # condição -> padrões %skip com ação (descartados por este laço)
+        self.promoting = set()      # condições em que a regra "pr" (palavras reservadas) está ativa
+        self.symbol_table = SymbolTable()
+        self.max_errors = None      # Limite de erros do texto inteiro, somando todas as condições
+        self.token_offsets = array('q')
+        self.error_spans = []
+        self._indexed_text = None   # Último texto analisado (ver position_index)
+        self._position_index = None
+
+    def load_regex_definitions(self, filename):
+        """Carrega um arquivo de definições com condições de início."""
+        try:
+            with open(filename, 'r') as file:
+                conditions, rules = read_start_conditions(file)
+            self.add_rules(conditions, rules)
+
+            print(f"Definições com condições de início carregadas de {filename}: "
+                  f"{', '.join(self.conditions)}")
+            return True
+        except FileNotFoundError:
+            print(f"Erro: Arquivo {filename} não encontrado.")
+            return False
+        except Exception as e:
+            print(f"Erro ao carregar definições: {str(e)}")
+            return False
+
+    def add_rules(self, conditions, rules):
+        """Distribui as regras (ver read_start_conditions) entre os analisadores de cada condição."""
+        self.conditions = dict(conditions)
+        self.lexers = {}
+        self.actions = {}
+        self.discarded = {}
+        self.promoting = set()
+
+        for condition, exclusive in self.conditions.items():
+            active = [rule for rule in rules if self._is_active(rule[3], condition, exclusive)]
+            if not active:
+                raise ValueError(f"Nenhuma regra ativa na condição {condition}")
+
+            actions = {}
+            for pattern_name, _, _, _, begin in active:
+                if actions.setdefault(pattern_name, begin) != begin:
+                    raise ValueError(f"Ações diferentes para o padrão {pattern_name} na condição {condition}")
+            actions = {name: begin for name, begin in actions.items() if begin is not None}
+
+            lexer = LexicalAnalyzer(registry=self.registry, utf8=self.utf8)
+            for pattern_name, regex, skip, _, _ in active:
+                print(f"Adicionando padrão: <{condition}>{pattern_name} com regex: {regex}")
+                # Padrões %skip com ação precisam chegar ao laço de condições para trocar de condição
+                lexer.add_definition(pattern_name, regex, skip and pattern_name not in actions)
+                if pattern_name.lower() == "pr":
+                    self.promoting.add(condition)
+
+            self.lexers[condition] = lexer
+            self.actions[condition] = actions
+            self.discarded[condition] = frozenset(name for name, _, skip, _, _ in active
+                                                  if skip and name in actions)
+            self.symbol_table.merge(lexer.symbol_table)
+
+    @staticmethod
+    def _is_active(rule_conditions, condition, exclusive):
+        if rule_conditions is None:
+            return condition == INITIAL or not exclusive
+        return ALL_CONDITIONS in rule_conditions or condition in rule_conditions
+
+    def generate_lexical_analyzer(self, **options):
+        """
+        Gera o AFD e o analisador de tokens de cada condição (options como em
+        LexicalAnalyzer.generate_lexical_analyzer). O descarte padrão de espaços
+        e comentários "//" vale para INITIAL e para as condições inclusivas, e
+        só quando o arquivo não declara padrões %skip.
+        """
+        if not self.lexers:
+            print("Nenhuma definição carregada.")
+            return False
+
+        self.max_errors = options.get('max_errors')
+        any_skip = any(lexer.skip_patterns or self.discarded[condition]
+                       for condition, lexer in self.lexers.items())
+        for condition, lexer in self.lexers.items():
+            print(f"\nCondição {condition}:")
+            lexer.symbol_table = self.symbol_table
+            default_skip = (condition == INITIAL or not self.conditions[condition]) and not any_skip
+            if not lexer.generate_lexical_analyzer(default_skip=default_skip, **options):
+                print(f"Falha ao gerar o analisador da condição {condition}.")
+                return False
+        return True
+
+    def _spans(self, text):
+        """
+        Produz (início, fim, padrão, condição) para cada token e trecho de erro
+        (padrão None). A varredura de cada condição é feita pelo _spans do seu
+        analisador de tokens e recomeçada na condição de destino após cada ação;
+        o limite max_errors vale para o texto inteiro, e não para cada trecho.
+        """
+        condition = INITIAL
+        position = 0
+        length = len(text)
+        max_errors = self.max_errors
+        error_spans = self.error_spans = []
+
+        while position < length:
+            analyzer = self.lexers[condition].token_analyzer
+            actions = self.actions[condition]
+            switched = False
+
+            for start, end, pattern in analyzer._spans(text, position):
+                if pattern is None:
+                    if max_errors is not None and len(error_spans) >= max_errors:
+                        print(f"Aviso: limite de {max_errors} erros atingido; "
+                              f"análise interrompida na posição {start}.")
+                        return
+                    error_spans.append((start, end))
+                yield start, end, pattern, condition
+                position = end
+                if pattern in actions:
+                    condition = actions[pattern]
+                    switched = True
+                    break
+
+            if not switched:
+                break
+
+    def analyze(self, text):
+        """Analisa o texto e retorna a lista de tokens no formato <lexema, padrão>."""
+        tokens = []
+        offsets = self.token_offsets = array('q')
+        reserved = self.symbol_table.reserved_words
+
+        for start, end, pattern, condition in self._spans(text):
+            analyzer = self.lexers[condition].token_analyzer
+            if pattern is None:
+                tokens.append(analyzer._format_error(text, start, end))
+            elif pattern in self.discarded[condition]:
+                continue
+            else:
+                lexeme = analyzer._lexeme(text, start, end)
+                self.symbol_table.add_symbol(lexeme, pattern)
+                # A tabela de símbolos é comum a todas as condições: o token leva o
+                # padrão reconhecido nesta condição, e apenas as palavras reservadas
+                # são promovidas a "PR" (nas condições em que a regra "pr" está ativa)
+                if condition in self.promoting and lexeme in reserved:
+                    pattern = "PR"
+                tokens.append(f"<{lexeme}, {pattern}>")
+            offsets.append(start)
+
+        return tokens
+
+    @property
+    def position_index(self):
+        """Índice de linhas do último texto analisado, construído na primeira consulta."""
+        if self._position_index is None and self._indexed_text is not None:
+            self._position_index = PositionIndex(self._indexed_text)
+            self._indexed_text = None
+        return self._position_index
+
+    def analyze_text(self, text):
+        self._indexed_text = text
+        self._position_index = None
+        return self.analyze(text)
+
+    def analyze_file(self, input_filename, output_filename=None):
+        if not self.lexers or any(lexer.token_analyzer is None for lexer in self.lexers.values()):
+            print("Analisador léxico não foi gerado. Execute generate_lexical_analyzer primeiro.")
+            return False
+
+        try:
+            with open(input_filename, 'rb' if self.utf8 else 'r') as file:
+                text = file.read()
+
+            tokens = self.analyze_text(text)
+
+            if output_filename:
+                with open(output_filename, 'w') as out_file:
+                    for token in tokens:
+                        out_file.write(f"{token}\n")
+
+            return tokens
+        except FileNotFoundError:
+            print(f"Erro: Arquivo {input_filename} não encontrado.")
+            return []
+        except Exception as e:
+            print(f"Erro ao analisar arquivo: {str(e)}")
+            return []
@@ -0,0 +1,180 @@
+"""
+Armazenamento da tabela de símbolos com transbordo para disco.
+
+SymbolTable guarda os lexemas em um dicionário, que cresce sem limite em
+análises longas com muitos lexemas distintos. SpillingSymbolStore oferece a
+mesma interface de dicionário (lexema -> padrão) sobre um banco SQLite local:
+em memória ficam apenas um cache LRU com os lexemas consultados recentemente
+(inclusive os ausentes, para que add_symbol não consulte o banco duas vezes)
+e as inserções pendentes, gravadas em lotes de batch_size. A iteração segue a
+ordem de inserção, como em um dicionário.
+
+O banco temporário (sem path) é removido em close() ou, se close() não for
+chamado, quando o armazenamento é coletado ou o interpretador termina.
+
+Uso:
+    table = SymbolTable(SpillingSymbolStore("simbolos.db"))
+    with LexicalAnalyzer(symbol_store=SpillingSymbolStore) as analyzer:   # arquivo temporário
+        ...
+"""
+import os
+import sqlite3
+import tempfile
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+# Lexemas mantidos no cache LRU em memória
+DEFAULT_CACHE_SIZE = 100000
+
+# Inserções acumuladas antes de cada gravação no banco
+DEFAULT_BATCH_SIZE = 10000
+
+# Marca, no cache, de lexema ausente da tabela
+_ABSENT = object()
+
+
+def _close_database(connection, temporary_path):
+    """Fecha a conexão e remove o banco temporário (também usada como finalizador)."""
+    connection.close()
+    if temporary_path is not None and os.path.exists(temporary_path):
+        os.remove(temporary_path)
+
+
+class SpillingSymbolStore(MutableMapping):
+    def __init__(self, path=None, cache_size=DEFAULT_CACHE_SIZE, batch_size=DEFAULT_BATCH_SIZE):
+        # Sem path, o banco é um arquivo temporário removido em close()
+        self.temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix='simbolos_', suffix='.db')
+            os.close(fd)
+        self.path = path
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+
+        self.connection = sqlite3.connect(path)
+        # O banco é um armazenamento auxiliar: dispensa a sincronização a cada lote
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS symbols ("
+                                "id INTEGER PRIMARY KEY, lexeme TEXT NOT NULL UNIQUE, pattern TEXT)")
+        # Fecha o banco (e remove o temporário) mesmo que close() nunca seja chamado
+        self._finalizer = weakref.finalize(self, _close_database, self.connection,
+                                           path if self.temporary else None)
+
+        self.cache = OrderedDict()   # lexema -> padrão (ou _ABSENT), do menos ao mais recente
+        self.pending = {}            # inserções e alterações ainda não gravadas
+        self.count = self.connection.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+
+    def _lookup(self, lexeme):
+        """Retorna o padrão do lexema ou _ABSENT, consultando cache, pendências e banco."""
+        cache = self.cache
+        pattern = cache.get(lexeme, _ABSENT)
+        if pattern is not _ABSENT or lexeme in cache:
+            cache.move_to_end(lexeme)
+            return pattern
+
+        pattern = self.pending.get(lexeme, _ABSENT)
+        if pattern is _ABSENT:
+            row = self.connection.execute("SELECT pattern FROM symbols WHERE lexeme = ?",
+                                          (lexeme,)).fetchone()
+            if row is not None:
+                pattern = row[0]
+
+        self._remember(lexeme, pattern)
+        return pattern
+
+    def _remember(self, lexeme, pattern):
+        cache = self.cache
+        cache[lexeme] = pattern
+        cache.move_to_end(lexeme)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def __getitem__(self, lexeme):
+        pattern = self._lookup(lexeme)
+        if pattern is _ABSENT:
+            raise KeyError(lexeme)
+        return pattern
+
+    def get(self, lexeme, default=None):
+        pattern = self._lookup(lexeme)
+        return default if pattern is _ABSENT else pattern
+
+    def __contains__(self, lexeme):
+        return self._lookup(lexeme) is not _ABSENT
+
+    def __setitem__(self, lexeme, pattern):
+        if self._lookup(lexeme) is _ABSENT:
+            self.count += 1
+        self._remember(lexeme, pattern)
+        self.pending[lexeme] = pattern
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def __delitem__(self, lexeme):
+        if self._lookup(lexeme) is _ABSENT:
+            raise KeyError(lexeme)
+        self.flush()
+        with self.connection:
+            self.connection.execute("DELETE FROM symbols WHERE lexeme = ?", (lexeme,))
+        self._remember(lexeme, _ABSENT)
+        self.count -= 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        self.flush()
+        for (lexeme,) in self.connection.execute("SELECT lexeme FROM symbols ORDER BY id"):
+            yield lexeme
+
+    def items(self):
+        """Produz os pares (lexema, padrão) na ordem de inserção, lidos diretamente do banco."""
+        self.flush()
+        return iter(self.connection.execute("SELECT lexeme, pattern FROM symbols ORDER BY id"))
+
+    def flush(self):
+        """Grava no banco, em uma única transação, as inserções pendentes."""
+        if not self.pending:
+            return
+        with self.connection:
+            # Lexemas já gravados mantêm o id (e a posição na ordem de inserção)
+            self.connection.executemany(
+                "INSERT INTO symbols (lexeme, pattern) VALUES (?, ?) "
+                "ON CONFLICT(lexeme) DO UPDATE SET pattern = excluded.pattern",
+                self.pending.items())
+        self.pending.clear()
+
+    def merge_missing(self, other):
+        """
+        Insere, com uma única instrução SQL, as entradas de outro
+        SpillingSymbolStore ausentes deste, na ordem de inserção de other.
+        Retorna o número de lexemas inseridos.
+        """
+        self.flush()
+        other.flush()
+        connection = self.connection
+        connection.execute("ATTACH DATABASE ? AS other", (other.path,))
+        try:
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO symbols (lexeme, pattern) "
+                    "SELECT lexeme, pattern FROM other.symbols WHERE true ORDER BY id "
+                    "ON CONFLICT(lexeme) DO NOTHING")
+                added = cursor.rowcount
+        finally:
+            connection.execute("DETACH DATABASE other")
+
+        # Lexemas marcados como ausentes no cache podem ter sido inseridos
+        self.cache.clear()
+        self.count += added
+        return added
+
+    def close(self):
+        """Grava as pendências e fecha o banco (removendo-o se for temporário)."""
+        if self.connection is None:
+            return
+        self.flush()
+        self.connection = None
+        self.cache.clear()
+        self._finalizer()
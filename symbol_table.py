@@ -2,8 +2,10 @@
 Implementação da Tabela de Símbolos para armazenar informações sobre os tokens.
 """
 class SymbolTable:
-    def __init__(self):
-        self.symbols = {}
+    def __init__(self, store=None):
+        # Lexema -> padrão. store substitui o dicionário em memória por outro
+        # armazenamento com a mesma interface (ver symbol_store.SpillingSymbolStore)
+        self.symbols = store if store is not None else {}
         self.reserved_words = set()
     
     def add_symbol(self, lexeme, pattern):
@@ -13,7 +15,8 @@ class SymbolTable:
         """
         if lexeme in self.reserved_words:
             # Palavras reservadas têm prioridade e sempre recebem o padrão "PR"
-            self.symbols[lexeme] = "PR"
+            if self.symbols.get(lexeme) != "PR":
+                self.symbols[lexeme] = "PR"
             return True
         
         if lexeme not in self.symbols:
@@ -33,6 +36,36 @@ class SymbolTable:
         """
         return self.symbols.get(lexeme)
     
+    def merge(self, other):
+        """
+        Incorpora a tabela other (por exemplo, a de um processo que analisou
+        outro trecho da entrada). As palavras reservadas são unidas e, como em
+        add_symbol, o padrão já registrado prevalece: mesclar as tabelas na
+        ordem dos trechos resulta na mesma tabela da análise sequencial.
+        Retorna o número de lexemas novos.
+        """
+        for word in other.reserved_words:
+            if word not in self.reserved_words:
+                self.add_reserved_word(word)
+        
+        before = len(self.symbols)
+        
+        # Dois armazenamentos em disco do mesmo tipo são mesclados sem passar pela memória
+        merge_missing = getattr(self.symbols, 'merge_missing', None)
+        if merge_missing is not None and type(other.symbols) is type(self.symbols):
+            merge_missing(other.symbols)
+        else:
+            for lexeme, pattern in other.symbols.items():
+                self.add_symbol(lexeme, pattern)
+        
+        return len(self.symbols) - before
+    
+    def close(self):
+        """Libera o armazenamento da tabela, se ele tiver recursos próprios (arquivos)."""
+        close = getattr(self.symbols, 'close', None)
+        if close is not None:
+            close()
+    
     def __str__(self):
         """Representação em string da tabela de símbolos."""
         result = ["Tabela de Símbolos:"]
@@ -1,114 +1,741 @@
 """
 Implementação do analisador de tokens que usa o AFD para reconhecer tokens no texto.
 """
+import codecs
+import copy
+import re
+from array import array
+from collections import Counter
+from transition_table import TransitionTable, DEAD_STATE
+
+# Descarte padrão quando o arquivo de definições não declara padrões %skip:
+# espaços em branco (mesma definição de str.isspace) e comentários de linha "//"
+DEFAULT_SKIP = re.compile(r'(?:\s+|//[^\n]*)+')
+
+# Estratégias de recuperação de erros: um token de erro por caractere ou
+# um único token por trecho contíguo de entrada não reconhecida
+ERROR_RECOVERY_MODES = ('char', 'collapse')
+
+# Tamanho máximo do lexema exibido em um token de erro agrupado
+ERROR_PREVIEW_LENGTH = 40
+
+# Padrão dos tokens de erro e das palavras reservadas (para analyze(wanted=...) e count)
+ERROR_PATTERN = 'erro!'
+RESERVED_PATTERN = 'PR'
+
+# Quantidade de bytes lida por vez na análise em fluxo
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Maior prefixo (em caracteres) seguido a partir do estado inicial ao montar
+# a busca que salta trechos descartados (por exemplo, "//" de um comentário)
+SKIP_AHEAD_PREFIX = 3
+
+
 class TokenAnalyzer:
-    def __init__(self, automaton, symbol_table):
+    def __init__(self, automaton, symbol_table, patterns=None, skip_patterns=None, linear_time=False,
+                 error_recovery='char', max_errors=None, compressed=False, profile=False, default_skip=True):
+        self._init_options(automaton, symbol_table, patterns, skip_patterns, linear_time,
+                           error_recovery, max_errors, default_skip)
+        self.table = TransitionTable(automaton, self.patterns)
+        self.skip_runs = self._build_skip_runs()
+        # Caracteres que podem iniciar um token e prefixo literal comum a todos os tokens
+        initial_row = self.table.rows[self.table.initial_state]
+        self.start_symbols = frozenset(symbol for symbol, class_id in self.table.symbol_class.items()
+                                       if initial_row[class_id] != DEAD_STATE)
+        self.required_prefix = self._build_required_prefix()
+        self.skip_ahead = self._build_skip_ahead()
+        self.resync = self._build_resync()
+        # Contadores de visitas por estado (modo de perfil, usado por hot_state_layout)
+        self.state_visits = array('q', [0] * self.table.num_states) if profile else None
+        # Tabela compactada (default/base/next/check): substitui a densa após a construção
+        self.compressed = compressed
+        if compressed:
+            self.table = self.table.compress()
+
+    def _init_options(self, automaton, symbol_table, patterns=None, skip_patterns=None, linear_time=False,
+                      error_recovery='char', max_errors=None, default_skip=True):
+        """
+        Inicializa as opções e os resultados da última análise, comuns a todos
+        os analisadores de tokens, e os pré-filtros desativados (calculados a
+        partir da tabela do AFD em __init__; ver LazyTokenAnalyzer).
+        """
+        if error_recovery not in ERROR_RECOVERY_MODES:
+            raise ValueError(f"Estratégia de recuperação de erros inválida: {error_recovery}")
+
         self.automaton = automaton
         self.symbol_table = symbol_table
-    
-    def analyze(self, text):
+        self.patterns = list(patterns or [])
+        # Padrões reconhecidos pelo AFD mas descartados (espaços, comentários)
+        self.skip_patterns = frozenset(skip_patterns or ())
+        # Descarte padrão (DEFAULT_SKIP) quando não há padrões %skip; desativado,
+        # por exemplo, nas condições de início exclusivas (ver start_conditions)
+        self.default_skip = default_skip and not self.skip_patterns
+        # Modo com tempo linear garantido (memorização dos pares que falham)
+        self.linear_time = linear_time
+        # Recuperação de erros e limite de erros por texto (None = sem limite)
+        self.error_recovery = error_recovery
+        self.max_errors = max_errors
+        self.error_spans = []
+        # Deslocamento de início de cada token da última análise (paralelo à lista de tokens)
+        self.token_offsets = array('q')
+        # Pré-filtros e modos que dependem da tabela do AFD
+        self.skip_runs = {}
+        self.start_symbols = None
+        self.required_prefix = ''
+        self.skip_ahead = None
+        self.resync = None
+        self.state_visits = None
+        self.compressed = False
+
+    def with_symbol_table(self, symbol_table):
         """
-        Analisa o texto e retorna a lista de tokens no formato <lexema, padrão>.
+        Retorna um analisador que compartilha a tabela de transições e os
+        pré-filtros deste (somente leitura), mas usa symbol_table e guarda os
+        resultados das próprias análises.
         """
-        tokens = []
-        position = 0
-        
-        while position < len(text):
-            # Pular espaços em branco
-            while position < len(text) and text[position].isspace():
-                position += 1
-
-            if position >= len(text):
-                break
+        analyzer = copy.copy(self)
+        analyzer.symbol_table = symbol_table
+        analyzer.error_spans = []
+        analyzer.token_offsets = array('q')
+        if self.state_visits is not None:
+            analyzer.state_visits = array('q', [0] * len(self.state_visits))
+        return analyzer
 
-            # Verificar se é um comentário de linha
-            if position + 1 < len(text) and text[position:position+2] == "//":
-                # Encontrar o final do comentário de linha
-                end_of_line = text.find('\n', position)
-                if end_of_line == -1:
-                    end_of_line = len(text)
-
-                # Extrair o lexema do comentário e adicioná-lo como token    
-                # comment_lexeme = text[position:end_of_line]
-                # tokens.append(f"<{comment_lexeme}, comentario>")
-                position = end_of_line
+    def _build_skip_runs(self):
+        """
+        Para os estados que só podem levar a padrões descartados, pré-compila
+        uma busca pelos caracteres que mantêm o AFD no mesmo estado. Sequências
+        longas de espaços ou o corpo de um comentário são então consumidos de
+        uma só vez, em vez de caractere por caractere.
+        """
+        runs = {}
+        if not self.skip_patterns:
+            return runs
+
+        for state, live in enumerate(self.table.live_patterns()):
+            if not live or not live <= self.skip_patterns:
                 continue
+            loop = self.table.self_loop_symbols(state)
+            if loop:
+                runs[state] = re.compile('[' + ''.join(re.escape(c) for c in sorted(loop)) + ']*')
+        return runs
 
-            # Pular espaços em branco
-            while position < len(text) and text[position].isspace():
-                position += 1
-            
-            if position >= len(text):
+    def _build_required_prefix(self):
+        """
+        Retorna o prefixo literal que todo token deve ter: enquanto o estado não
+        é final e só tem transição por um único símbolo, esse símbolo é obrigatório.
+        """
+        table = self.table
+        symbols_of = {}
+        for symbol, class_id in table.symbol_class.items():
+            symbols_of.setdefault(class_id, []).append(symbol)
+
+        prefix = []
+        state = table.initial_state
+        visited = set()
+        while table.accept[state] is None and state not in visited:
+            visited.add(state)
+            moves = [(class_id, target) for class_id, target in enumerate(table.rows[state])
+                     if target != DEAD_STATE]
+            if len(moves) != 1 or len(symbols_of.get(moves[0][0], ())) != 1:
                 break
-            
-            # Tentar reconhecer o próximo token
-            token = self._get_next_token(text, position)
-            
-            if token:
-                lexeme, pattern, length = token
-                
-                # Atualizar a tabela de símbolos
-                self.symbol_table.add_symbol(lexeme, pattern)
-                
-                # Verificar se o lexema é uma palavra reservada
-                final_pattern = self.symbol_table.get_pattern(lexeme)
-                
-                tokens.append(f"<{lexeme}, {final_pattern}>")
-                position += length
+            class_id, state = moves[0]
+            prefix.append(symbols_of[class_id][0])
+        return ''.join(prefix)
+
+    def _build_skip_ahead(self):
+        """
+        Pré-compila uma expressão que reconhece, em uma única busca, uma sequência
+        de tokens descartados. Considera os caminhos de até SKIP_AHEAD_PREFIX
+        caracteres a partir do estado inicial que levam a um estado final de um
+        padrão descartado cujas transições são todas laços (como em [ \t\n]+ ou
+        //[^\n]*): a partir dele, o token só pode estender-se pelos caracteres
+        do laço. Cada caminho vira [c1][c2]...[laço]*, e a expressão repete a
+        alternância desses caminhos. Retorna None se não houver caminho assim.
+        """
+        table = self.table
+        if not self.skip_patterns:
+            return None
+
+        symbols_of = {}
+        for symbol, class_id in table.symbol_class.items():
+            symbols_of.setdefault(class_id, []).append(symbol)
+
+        def char_class(symbols):
+            return '[' + ''.join(re.escape(c) for c in sorted(symbols)) + ']'
+
+        # Estados finais descartados dos quais só se sai pelos laços
+        loops = {}
+        for state, row in enumerate(table.rows):
+            if table.accept[state] in self.skip_patterns and all(t in (DEAD_STATE, state) for t in row):
+                loops[state] = [symbol for class_id, target in enumerate(row) if target == state
+                                for symbol in symbols_of.get(class_id, ())]
+        if not loops:
+            return None
+
+        # Estados a partir dos quais algum desses estados é alcançável em até k passos
+        reaches = [set(loops)]
+        for _ in range(SKIP_AHEAD_PREFIX):
+            reaches.append(reaches[-1] | {state for state, row in enumerate(table.rows)
+                                          if any(t in reaches[-1] for t in row if t != DEAD_STATE)})
+
+        branches = []
+        paths = [(table.initial_state, '')]
+        for depth in range(SKIP_AHEAD_PREFIX, 0, -1):
+            extended = []
+            for state, prefix in paths:
+                targets = {}
+                for class_id, target in enumerate(table.rows[state]):
+                    if target != DEAD_STATE and target in reaches[depth - 1] and class_id in symbols_of:
+                        targets.setdefault(target, []).extend(symbols_of[class_id])
+                for target, symbols in targets.items():
+                    path = prefix + char_class(symbols)
+                    if target in loops:
+                        branches.append(path + (char_class(loops[target]) + '*' if loops[target] else ''))
+                    else:
+                        extended.append((target, path))
+            paths = extended
+
+        if not branches:
+            return None
+        return re.compile('(?:' + '|'.join(branches) + ')+')
+
+    def _build_resync(self):
+        """
+        Pré-compila a busca pelo próximo caractere que pode iniciar um token
+        (ou um trecho descartado), usada para saltar trechos de erro em bloco.
+        """
+        stops = ''.join(re.escape(c) for c in sorted(self.start_symbols))
+        if self.default_skip:
+            stops += r'\s/'
+        return re.compile(f'[^{stops}]*' if stops else '.*', re.DOTALL)
+
+    def _error_run_end(self, text, start_pos, failed):
+        """
+        Retorna o fim do trecho de erro iniciado em start_pos: os caracteres que
+        não podem iniciar um token são saltados em bloco, e o trecho só termina
+        onde um token (ou um trecho descartado) é de fato reconhecido.
+        """
+        length = len(text)
+        end = start_pos + 1
+        # Sem o descarte padrão, todo token começa pelo prefixo obrigatório
+        prefix = self.required_prefix if not self.default_skip else ''
+
+        while True:
+            if prefix:
+                end = text.find(prefix, end)
+                if end < 0:
+                    return length
             else:
-                # Caractere não reconhecido
-                error_lexeme = text[position]
-                tokens.append(f"<{error_lexeme}, erro!>")
-                position += 1
-        
+                end = self.resync.match(text, end).end()
+            if end >= length:
+                return length
+            if self.default_skip and DEFAULT_SKIP.match(text, end):
+                return end
+            if self._next_match(text, end, failed):
+                return end
+            end += 1
+
+    def _next_match(self, text, position, failed):
+        if failed is None:
+            return self._match(text, position)
+        return self._match_memoized(text, position, failed)
+
+    def analyze(self, text, wanted=None):
+        """
+        Analisa o texto e retorna a lista de tokens no formato <lexema, padrão>.
+
+        wanted, se dado, é o conjunto de padrões a emitir (incluindo "PR" e
+        ERROR_PATTERN para os erros). Todos os tokens continuam sendo
+        reconhecidos, mas apenas os selecionados têm o lexema extraído, a tabela
+        de símbolos atualizada e o token formatado; token_offsets e error_spans
+        cobrem apenas os tokens emitidos e todos os erros, respectivamente.
+        """
+        tokens = []
+        offsets = self.token_offsets = array('q')
+
+        if wanted is None:
+            for start, end, pattern in self._spans(text):
+                if pattern is None:
+                    tokens.append(self._format_error(text, start, end))
+                else:
+                    tokens.append(self._format_token(self._lexeme(text, start, end), pattern))
+                offsets.append(start)
+            return tokens
+
+        wanted = frozenset(wanted)
+        want_errors = ERROR_PATTERN in wanted
+        reserved = self.symbol_table.reserved_words
+        # Padrões que podem reconhecer uma palavra reservada (e tornar-se "PR")
+        promotable = self._reserved_patterns() if RESERVED_PATTERN in wanted else frozenset()
+
+        for start, end, pattern in self._spans(text):
+            if pattern is None:
+                if want_errors:
+                    tokens.append(self._format_error(text, start, end))
+                    offsets.append(start)
+            elif pattern in promotable:
+                lexeme = self._lexeme(text, start, end)
+                if (RESERVED_PATTERN if lexeme in reserved else pattern) in wanted:
+                    tokens.append(self._format_token(lexeme, pattern))
+                    offsets.append(start)
+            elif pattern in wanted:
+                tokens.append(self._format_token(self._lexeme(text, start, end), pattern))
+                offsets.append(start)
+
         return tokens
-    
-    def _get_next_token(self, text, start_pos):
+
+    def count(self, text):
         """
-        Reconhece o próximo token no texto a partir da posição especificada.
-        Retorna uma tupla (lexeme, pattern, length) ou None se nenhum token for reconhecido.
+        Conta os tokens do texto por padrão (com "PR" para palavras reservadas e
+        ERROR_PATTERN para erros), sem montar a lista de tokens nem atualizar a
+        tabela de símbolos. Retorna um Counter padrão -> ocorrências.
         """
-        current_state = self.automaton.initial_state
-        max_final_pos = -1
-        max_final_pattern = None
-        
-        pos = start_pos
-        in_string = text[start_pos] == '"' if start_pos < len(text) else False
-        
-        while pos < len(text):
-            char = text[pos]
-            
-            if char.isspace() and not in_string:
-                break
-                
-            if char == '"' and (pos == start_pos or text[pos-1] != '\\'):
-                if pos > start_pos:  # Não alternar no primeiro caractere
-                    in_string = not in_string
-            
-            # Verificar se há transição para este caractere
-            next_state = None
-            
-            for symbol, to_states in self.automaton.transitions.get(current_state, {}).items():
-                if symbol == char:
-                    next_state = next(iter(to_states))  # AFD tem apenas um próximo estado
-                    break
-            
-            if next_state is not None:
-                current_state = next_state
-                pos += 1
-                
-                # Verificar se este é um estado final
-                for state, pattern in self.automaton.final_states:
-                    if state == current_state:
-                        max_final_pos = pos - 1
-                        max_final_pattern = pattern
+        counts = Counter()
+        reserved = self.symbol_table.reserved_words
+        promotable = self._reserved_patterns()
+
+        for start, end, pattern in self._spans(text):
+            if pattern is None:
+                counts[ERROR_PATTERN] += 1
+            elif pattern in promotable and self._lexeme(text, start, end) in reserved:
+                counts[RESERVED_PATTERN] += 1
+            else:
+                counts[pattern] += 1
+
+        return counts
+
+    def _reserved_patterns(self):
+        """Padrões pelos quais o AFD reconhece alguma palavra reservada como token inteiro."""
+        patterns = set()
+        for word in self.symbol_table.reserved_words:
+            match = self._match(word, 0) if word else None
+            if match is not None and match[0] == len(word):
+                patterns.add(match[1])
+        return frozenset(patterns)
+
+    def _spans(self, text, start=0):
+        """
+        Núcleo da análise: produz (início, fim, padrão) para cada token não
+        descartado e (início, fim, None) para cada trecho de erro, a partir da
+        posição start, registrando os erros em error_spans.
+        """
+        position = start
+        length = len(text)
+        skip_patterns = self.skip_patterns
+        default_skip = self.default_skip
+        skip_ahead = self.skip_ahead
+        start_symbols = self.start_symbols
+        failed = set() if self.linear_time else None
+        error_spans = self.error_spans = []
+
+        while position < length:
+            if default_skip:
+                # Pular espaços em branco e comentários de linha
+                skipped = DEFAULT_SKIP.match(text, position)
+                if skipped:
+                    position = skipped.end()
+                    if position >= length:
                         break
+            elif skip_ahead is not None:
+                # Saltar de uma vez uma sequência de tokens descartados
+                skipped = skip_ahead.match(text, position)
+                if skipped:
+                    position = skipped.end()
+                    if position >= length:
+                        break
+
+            # Tentar reconhecer o próximo token (sem executar o AFD se o
+            # caractere não pode iniciar nenhum)
+            if start_symbols is not None and text[position] not in start_symbols:
+                match = None
+            else:
+                match = self._next_match(text, position, failed)
+
+            if match:
+                end, pattern = match
+
+                # Padrões descartados não geram token
+                if pattern not in skip_patterns:
+                    yield position, end, pattern
+                position = end
             else:
+                if self.max_errors is not None and len(error_spans) >= self.max_errors:
+                    print(f"Aviso: limite de {self.max_errors} erros atingido; "
+                          f"análise interrompida na posição {position}.")
+                    break
+
+                if self.error_recovery == 'collapse':
+                    # Trecho contíguo não reconhecido vira um único token de erro
+                    end = self._error_run_end(text, position, failed)
+                else:
+                    # Caractere não reconhecido
+                    end = position + 1
+
+                error_spans.append((position, end))
+                yield position, end, None
+                position = end
+
+    def _lexeme(self, text, start, end):
+        return text[start:end]
+
+    def _format_error(self, text, start, end):
+        """Retorna o token de erro do trecho, abreviando trechos longos."""
+        error_lexeme = self._lexeme(text, start, end)
+        if len(error_lexeme) > ERROR_PREVIEW_LENGTH:
+            error_lexeme = error_lexeme[:ERROR_PREVIEW_LENGTH] + "..."
+        return f"<{error_lexeme}, {ERROR_PATTERN}>"
+
+    def _format_token(self, lexeme, pattern):
+        """Atualiza a tabela de símbolos e retorna o token no formato <lexema, padrão>."""
+        self.symbol_table.add_symbol(lexeme, pattern)
+
+        # Verificar se o lexema é uma palavra reservada
+        final_pattern = self.symbol_table.get_pattern(lexeme)
+
+        return f"<{lexeme}, {final_pattern}>"
+
+    async def atokenize(self, reader, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Analisa um fluxo assíncrono (por exemplo, asyncio.StreamReader) e produz
+        os tokens um a um: async for token in analyzer.atokenize(reader).
+
+        Apenas o lexema pendente fica em memória: quando a varredura chega ao fim
+        do trecho lido em um estado que ainda pode avançar, o estado do AFD é
+        guardado e retomado após a próxima leitura. Novas leituras só ocorrem
+        quando o consumidor pede o próximo token (contrapressão).
+
+        Os erros seguem error_recovery e max_errors, como em analyze, e são
+        registrados em error_spans com deslocamentos a partir do início do
+        fluxo. O modo linear_time não é suportado (ValueError).
+        """
+        if self.linear_time:
+            raise ValueError("A análise em fluxo não suporta o modo linear_time")
+
+        decode, buffer = self._stream_decoder()
+        skip_patterns = self.skip_patterns
+        default_skip = self.default_skip
+        default_skip_regex = self._stream_default_skip
+        # Literais do descarte padrão no tipo do buffer (str ou bytes)
+        newline, comment = ('\n', '//') if isinstance(buffer, str) else (b'\n', b'//')
+        collapse = self.error_recovery == 'collapse'
+        max_errors = self.max_errors
+        error_spans = self.error_spans = []
+
+        index = 0           # Início do próximo token em buffer
+        consumed = 0        # Deslocamento de buffer[0] desde o início do fluxo
+        eof = False
+        need_more = False
+        pending = None      # Varredura interrompida: (estado, pos, último_fim, último_padrão)
+        error_run = None    # Trecho de erro em curso no modo 'collapse' (apenas o início do lexema)
+        error_start = 0     # Deslocamento do início desse trecho
+
+        def end_error_run():
+            """Encerra o trecho de erro em curso (em index) e retorna o seu token."""
+            nonlocal error_run
+            error_spans.append((error_start, consumed + index))
+            token = self._format_error(error_run, 0, len(error_run))
+            error_run = None
+            return token
+
+        while True:
+            if need_more:
+                # Descartar o que já foi consumido e ler o próximo trecho
+                data = await reader.read(chunk_size)
+                eof = not data
+                chunk = decode(data, eof)
+                if pending is not None:
+                    state, pos, last_end, last_pattern = pending
+                    pending = (state, pos - index, last_end - index if last_end >= 0 else -1, last_pattern)
+                consumed += index
+                buffer = buffer[index:] + chunk
+                index = 0
+                need_more = False
+
+            if index >= len(buffer):
+                if eof:
+                    if error_run is not None:
+                        yield end_error_run()
+                    return
+                need_more = True
+                continue
+
+            if default_skip and pending is None:
+                skipped = default_skip_regex.match(buffer, index)
+                if skipped:
+                    if error_run is not None:
+                        yield end_error_run()
+                    end = skipped.end()
+                    if end >= len(buffer) and not eof:
+                        # Um comentário de linha pode continuar no próximo trecho:
+                        # recomeçar a partir da última quebra de linha descartada
+                        restart = max(index, buffer.rfind(newline, index, end) + 1)
+                        index = restart if buffer.find(comment, restart, end) != -1 else end
+                        need_more = True
+                        continue
+                    index = end
+                    continue
+                if index == len(buffer) - 1 and buffer.startswith(comment[:1], index) and not eof:
+                    # Pode ser o início de "//": aguardar o próximo caractere
+                    need_more = True
+                    continue
+
+            if pending is None:
+                pending = (self._start_state(), index, -1, None)
+            state, pos, last_end, last_pattern = pending
+            state, pos, last_end, last_pattern = self._scan(buffer, pos, state, last_end, last_pattern)
+
+            if state != DEAD_STATE and pos >= len(buffer) and not eof:
+                # O token pode continuar no próximo trecho
+                pending = (state, pos, last_end, last_pattern)
+                need_more = True
+                continue
+
+            pending = None
+            if last_end > index:
+                if error_run is not None:
+                    yield end_error_run()
+                if last_pattern not in skip_patterns:
+                    yield self._format_token(self._lexeme(buffer, index, last_end), last_pattern)
+                index = last_end
+            else:
+                end = self._error_end(buffer, index)
+                if end > len(buffer) and not eof:
+                    # Caractere incompleto no fim do trecho lido
+                    need_more = True
+                    continue
+                end = min(end, len(buffer))
+                if error_run is None:
+                    if max_errors is not None and len(error_spans) >= max_errors:
+                        print(f"Aviso: limite de {max_errors} erros atingido; "
+                              f"análise interrompida na posição {consumed + index}.")
+                        return
+                    if collapse:
+                        # Caracteres não reconhecidos consecutivos viram um único token
+                        error_run = buffer[index:end]
+                        error_start = consumed + index
+                    else:
+                        error_spans.append((consumed + index, consumed + end))
+                        yield self._format_error(buffer, index, end)
+                elif len(error_run) <= ERROR_PREVIEW_LENGTH:
+                    error_run += buffer[index:end]
+                index = end
+
+    # Descarte padrão aplicado ao buffer da análise em fluxo
+    _stream_default_skip = DEFAULT_SKIP
+
+    def _stream_decoder(self):
+        """
+        Retorna (decode, buffer vazio) para a análise em fluxo: decode(dados, fim)
+        converte cada trecho lido no tipo de texto percorrido pelo AFD.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        return (lambda data, final: data if isinstance(data, str) else decoder.decode(data, final=final)), ""
+
+    def _start_state(self):
+        """Estado inicial da varredura de um novo token."""
+        return self.table.initial_state
+
+    def _error_end(self, text, position):
+        """Fim do token de erro iniciado em position (pode passar do fim do texto)."""
+        return position + 1
+
+    def _match(self, text, start_pos):
+        """
+        Executa o AFD a partir de start_pos pelo princípio do maior token possível.
+        Retorna uma tupla (fim, padrão) ou None se nenhum token for reconhecido.
+        """
+        _, _, last_end, last_pattern = self._scan(text, start_pos, self.table.initial_state, -1, None)
+
+        if last_end > start_pos:
+            return (last_end, last_pattern)
+
+        return None
+
+    def _scan(self, text, pos, current_state, last_end, last_pattern):
+        """
+        Núcleo da varredura: continua a execução do AFD a partir de (estado, pos)
+        até não haver transição ou o texto acabar. Retorna
+        (estado, pos, último_fim, último_padrão); o estado é DEAD_STATE quando a
+        varredura parou por falta de transição, e pode ser retomado com mais
+        texto caso contrário (usado pela análise em fluxo).
+        """
+        if self.state_visits is not None:
+            return self._scan_profiled(text, pos, current_state, last_end, last_pattern)
+        if self.compressed:
+            return self._scan_compressed(text, pos, current_state, last_end, last_pattern)
+
+        rows = self.table.rows
+        symbol_class = self.table.symbol_class
+        accept = self.table.accept
+        skip_runs = self.skip_runs
+
+        length = len(text)
+
+        while pos < length:
+            next_state = rows[current_state][symbol_class.get(text[pos], 0)]
+            if next_state == DEAD_STATE:
                 # Não há transição para este caractere
+                return DEAD_STATE, pos, last_end, last_pattern
+
+            current_state = next_state
+            pos += 1
+
+            # Consumir em bloco as repetições dentro de espaços e comentários
+            run = skip_runs.get(current_state)
+            if run is not None:
+                pos = run.match(text, pos).end()
+
+            # Verificar se este é um estado final
+            pattern = accept[current_state]
+            if pattern is not None:
+                last_end = pos
+                last_pattern = pattern
+
+        return current_state, pos, last_end, last_pattern
+
+    def _scan_compressed(self, text, pos, current_state, last_end, last_pattern):
+        """Variante de _scan que consulta diretamente a tabela compactada."""
+        row_of = self.table.row_of
+        base = self.table.base
+        next_states = self.table.next
+        check = self.table.check
+        default = self.table.default
+        symbol_class = self.table.symbol_class
+        accept = self.table.accept
+        skip_runs = self.skip_runs
+
+        length = len(text)
+
+        while pos < length:
+            row_id = row_of[current_state]
+            index = base[row_id] + symbol_class.get(text[pos], 0)
+            next_state = next_states[index] if check[index] == row_id else default[row_id]
+            if next_state == DEAD_STATE:
+                return DEAD_STATE, pos, last_end, last_pattern
+
+            current_state = next_state
+            pos += 1
+
+            run = skip_runs.get(current_state)
+            if run is not None:
+                pos = run.match(text, pos).end()
+
+            pattern = accept[current_state]
+            if pattern is not None:
+                last_end = pos
+                last_pattern = pattern
+
+        return current_state, pos, last_end, last_pattern
+
+    def _scan_profiled(self, text, pos, current_state, last_end, last_pattern):
+        """Variante de _scan que conta as visitas a cada estado em state_visits."""
+        table = self.table
+        accept = table.accept
+        skip_runs = self.skip_runs
+        visits = self.state_visits
+
+        length = len(text)
+        visits[current_state] += 1
+
+        while pos < length:
+            next_state = table.next_state(current_state, text[pos])
+            if next_state == DEAD_STATE:
+                return DEAD_STATE, pos, last_end, last_pattern
+
+            current_state = next_state
+            visits[current_state] += 1
+            pos += 1
+
+            run = skip_runs.get(current_state)
+            if run is not None:
+                # Cada caractere do laço é uma visita ao próprio estado
+                end = run.match(text, pos).end()
+                visits[current_state] += end - pos
+                pos = end
+
+            pattern = accept[current_state]
+            if pattern is not None:
+                last_end = pos
+                last_pattern = pattern
+
+        return current_state, pos, last_end, last_pattern
+
+    def hot_state_layout(self):
+        """
+        Retorna os estados do AFD (numeração do autômato) ordenados pelo número
+        de visitas registrado no modo de perfil, do mais visitado ao menos
+        visitado; estados com o mesmo número mantêm a ordem original.
+        """
+        if self.state_visits is None:
+            raise RuntimeError("Contagem de visitas desativada; crie o analisador com profile=True")
+
+        visits = self.state_visits
+        order = sorted(range(len(visits)), key=lambda state: -visits[state])
+        return [self.table.state_ids[state] for state in order]
+
+    def _match_memoized(self, text, start_pos, failed):
+        """
+        Variante de _match com tempo linear garantido (Reps, 1998).
+        Os pares (estado, posição) visitados depois da última aceitação são
+        registrados em failed; uma varredura futura que chegue a um desses
+        pares para imediatamente, em vez de reler o trecho até falhar de novo.
+        """
+        table = self.table
+        compressed = self.compressed
+        rows = None if compressed else table.rows
+        symbol_class = table.symbol_class
+        accept = table.accept
+        num_states = table.num_states
+
+        current_state = self.table.initial_state
+        last_end = -1
+        last_pattern = None
+
+        pos = start_pos
+        length = len(text)
+        trail = []
+
+        while pos < length:
+            if compressed:
+                next_state = table.next_state(current_state, text[pos])
+            else:
+                next_state = rows[current_state][symbol_class.get(text[pos], 0)]
+            if next_state == DEAD_STATE:
                 break
-        
-        if max_final_pos >= start_pos:
-            lexeme = text[start_pos:max_final_pos + 1]
-            return (lexeme, max_final_pattern, len(lexeme))
-        
-        return None
\ No newline at end of file
+
+            current_state = next_state
+            pos += 1
+
+            key = pos * num_states + current_state
+            if key in failed:
+                break
+            trail.append(key)
+
+            pattern = accept[current_state]
+            if pattern is not None:
+                last_end = pos
+                last_pattern = pattern
+
+        # Pares visitados depois da última aceitação levam apenas a falhas
+        last_key = last_end * num_states if last_end > start_pos else 0
+        for key in trail:
+            if key >= last_key + num_states:
+                failed.add(key)
+
+        if last_end > start_pos:
+            return (last_end, last_pattern)
+
+        return None
+
+    def _get_next_token(self, text, start_pos):
+        """
+        Reconhece o próximo token no texto a partir da posição especificada.
+        Retorna uma tupla (lexeme, pattern, length) ou None se nenhum token for reconhecido.
+        """
+        match = self._match(text, start_pos)
+        if match is None:
+            return None
+
+        end, pattern = match
+        return (text[start_pos:end], pattern, end - start_pos)
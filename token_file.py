@@ -0,0 +1,433 @@
+"""
+Formato binário de arquivos de tokens (.tok).
+
+Em vez de uma linha <lexema, padrão> por token, cada token vira um registro
+de poucos bytes que referencia a tabela de padrões gravada no fim do arquivo.
+Ferramentas que consomem os tokens leem os registros diretamente, sem
+reanalisar nem reinterpretar texto.
+
+Os blocos são gravados à medida que se completam: apenas o bloco atual fica
+em memória durante a gravação. As tabelas, conhecidas só ao final, ficam
+depois dos blocos, e um rodapé de tamanho fixo indica onde começam.
+
+O lexema de um token é gravado por extenso na primeira ocorrência e ocupa
+uma entrada de um cache de tamanho fixo (LRU), mantido da mesma forma pelo
+gravador e pelo leitor; as ocorrências seguintes referenciam a entrada. Nem
+a gravação nem a leitura guardam um índice de todos os lexemas distintos.
+
+Todos os inteiros são varints (LEB128 sem sinal), exceto no rodapé; cadeias
+são gravadas como tamanho (varint) + bytes UTF-8.
+
+    arquivo    = cabeçalho + bloco* + fim (varint 0) + tabelas + rodapé
+    cabeçalho  = "LXTK" + versão (u8) + codec (u8) + flags (u8)
+    bloco      = nº de registros + tamanho do conteúdo + conteúdo (comprimido pelo codec)
+    registro   = id do padrão + lexema + distância do fim do token anterior + tamanho
+    lexema     = 0 + cadeia (por extenso; ocupa uma entrada do cache)
+                 | entrada do cache + 1   (ou apenas a cadeia, nos erros)
+    tabelas    = tamanho do cache de lexemas
+                 + nº de padrões + padrões (cadeias; 0 = erro, 1 = "PR")
+                 + nº de palavras reservadas + palavras (cadeias)
+                 + nº de símbolos + (lexema, id do padrão)*
+    rodapé     = posição das tabelas (u64 little-endian) + "LXTK"
+
+Codecs: nenhum, zlib ou zstd (requer o pacote zstandard). Com a flag
+FLAG_BYTE_OFFSETS, deslocamentos e tamanhos são contados em bytes (modo UTF-8).
+
+Uso:
+    python token_file.py <arquivo.tok>
+"""
+import os
+import struct
+import sys
+import zlib
+from collections import namedtuple, OrderedDict
+
+try:
+    import zstandard
+except ImportError:  # zstandard é uma dependência opcional
+    zstandard = None
+
+from symbol_table import SymbolTable
+from token_analyzer import ERROR_PATTERN, RESERVED_PATTERN, ERROR_PREVIEW_LENGTH
+
+MAGIC = b'LXTK'
+VERSION = 3
+
+# Cabeçalho: "LXTK" + versão + codec + flags
+HEADER_SIZE = len(MAGIC) + 3
+
+# Rodapé: posição das tabelas + "LXTK"
+FOOTER = struct.Struct('<Q4s')
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = {None: CODEC_NONE, 'zlib': CODEC_ZLIB, 'zstd': CODEC_ZSTD}
+
+# Deslocamentos e tamanhos em bytes (e não em caracteres)
+FLAG_BYTE_OFFSETS = 1
+
+# Registros por bloco (unidade de compressão e de leitura)
+BLOCK_RECORDS = 4096
+
+# Bytes da tabela de símbolos acumulados antes de cada escrita
+TABLE_WRITE_SIZE = 64 * 1024
+
+# Entradas do cache de lexemas (LRU) compartilhado por gravador e leitor
+LEXEME_CACHE_SIZE = 65536
+
+TOKEN_FILE_EXTENSION = '.tok'
+
+# Padrões com id fixo
+ERROR_ID = 0
+RESERVED_ID = 1
+
+
+class TokenRecord(namedtuple('TokenRecord', 'pattern lexeme offset length')):
+    """Token lido de um arquivo .tok; str() reproduz o formato <lexema, padrão>."""
+    __slots__ = ()
+
+    def __str__(self):
+        lexeme = self.lexeme
+        if self.pattern == ERROR_PATTERN and len(lexeme) > ERROR_PREVIEW_LENGTH:
+            lexeme = lexeme[:ERROR_PREVIEW_LENGTH] + "..."
+        return f"<{lexeme}, {self.pattern}>"
+
+
+def write_varint(out, value):
+    """Acrescenta value (inteiro >= 0) a out (bytearray) em LEB128."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    """Lê um varint de data a partir de pos. Retorna (valor, próxima posição)."""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_string(out, text):
+    encoded = text.encode('utf-8')
+    write_varint(out, len(encoded))
+    out += encoded
+
+
+def _read_string(data, pos):
+    size, pos = read_varint(data, pos)
+    return data[pos:pos + size].decode('utf-8'), pos + size
+
+
+def _compressor(codec):
+    if codec == CODEC_ZLIB:
+        return zlib.compress
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ImportError("A compressão zstd requer o pacote zstandard (pip install zstandard)")
+        return zstandard.ZstdCompressor().compress
+    return bytes
+
+
+def _decompressor(codec):
+    if codec == CODEC_ZLIB:
+        return zlib.decompress
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ImportError("A leitura de blocos zstd requer o pacote zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress
+    return bytes
+
+
+class LexemeCache:
+    """
+    Cache LRU de lexemas com entradas numeradas de 0 a size - 1. O gravador
+    e o leitor aplicam as mesmas operações na mesma ordem, e por isso
+    atribuem as mesmas entradas aos mesmos lexemas.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()    # chave -> entrada, do menos ao mais recente
+
+    def get(self, key):
+        """Retorna a entrada de key (marcando-a como recente) ou None."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def add(self, key):
+        """Atribui a key uma entrada livre ou a do lexema usado há mais tempo."""
+        if len(self.entries) < self.size:
+            entry = len(self.entries)
+        else:
+            _, entry = self.entries.popitem(last=False)
+        self.entries[key] = entry
+        return entry
+
+
+def write_token_file(token_analyzer, text, filename, compression=None, block_records=BLOCK_RECORDS,
+                     cache_size=LEXEME_CACHE_SIZE):
+    """
+    Analisa text com token_analyzer e grava os tokens em filename no formato
+    binário. A tabela de símbolos é atualizada como em analyze. compression é
+    None, 'zlib' ou 'zstd'; cache_size é o número de lexemas referenciáveis
+    sem regravá-los. Retorna o número de registros gravados.
+    """
+    if compression not in CODECS:
+        raise ValueError(f"Compressão desconhecida: {compression}")
+    codec = CODECS[compression]
+    compress = _compressor(codec)
+
+    with open(filename, 'wb') as file:
+        try:
+            return _write_tokens(file, token_analyzer, text, codec, compress, block_records, cache_size)
+        except BaseException:
+            # Não deixar um arquivo sem tabelas nem rodapé
+            file.close()
+            os.remove(filename)
+            raise
+
+
+def _write_tokens(file, token_analyzer, text, codec, compress, block_records, cache_size):
+    symbol_table = token_analyzer.symbol_table
+    lexeme_of = token_analyzer._lexeme
+    pattern_ids = {ERROR_PATTERN: ERROR_ID, RESERVED_PATTERN: RESERVED_ID}
+    for pattern in token_analyzer.patterns:
+        pattern_ids.setdefault(pattern, len(pattern_ids))
+    cache = LexemeCache(cache_size)
+
+    flags = FLAG_BYTE_OFFSETS if isinstance(text, (bytes, bytearray)) else 0
+    file.write(MAGIC + bytes((VERSION, codec, flags)))
+
+    block = bytearray()
+    block_count = 0
+    total = 0
+    previous_end = 0
+
+    def flush():
+        payload = compress(bytes(block))
+        prefix = bytearray()
+        write_varint(prefix, block_count)
+        write_varint(prefix, len(payload))
+        file.write(prefix)
+        file.write(payload)
+
+    for start, end, pattern in token_analyzer._spans(text):
+        lexeme = lexeme_of(text, start, end)
+        if pattern is None:
+            block.append(ERROR_ID)
+            _write_string(block, lexeme)
+        else:
+            symbol_table.add_symbol(lexeme, pattern)
+            final_pattern = symbol_table.get_pattern(lexeme)
+            pattern_id = pattern_ids.get(final_pattern)
+            if pattern_id is None:
+                pattern_id = pattern_ids[final_pattern] = len(pattern_ids)
+            write_varint(block, pattern_id)
+            entry = cache.get(lexeme)
+            if entry is None:
+                cache.add(lexeme)
+                block.append(0)
+                _write_string(block, lexeme)
+            else:
+                write_varint(block, entry + 1)
+        write_varint(block, start - previous_end)
+        write_varint(block, end - start)
+        previous_end = end
+
+        block_count += 1
+        total += 1
+        if block_count == block_records:
+            flush()
+            block.clear()
+            block_count = 0
+
+    if block_count:
+        flush()
+    file.write(b'\x00')
+
+    # A tabela de símbolos é percorrida sem ser copiada (pode estar em disco)
+    symbols = symbol_table.symbols
+    for pattern in symbols.values():
+        pattern_ids.setdefault(pattern, len(pattern_ids))
+
+    tables_start = file.tell()
+    tables = bytearray()
+    write_varint(tables, cache_size)
+    write_varint(tables, len(pattern_ids))
+    for pattern in pattern_ids:
+        _write_string(tables, pattern)
+    write_varint(tables, len(symbol_table.reserved_words))
+    for word in sorted(symbol_table.reserved_words):
+        _write_string(tables, word)
+    write_varint(tables, len(symbols))
+    file.write(tables)
+    tables.clear()
+    for lexeme, pattern in symbols.items():
+        _write_string(tables, lexeme)
+        write_varint(tables, pattern_ids[pattern])
+        if len(tables) >= TABLE_WRITE_SIZE:
+            file.write(tables)
+            tables.clear()
+    file.write(tables)
+    file.write(FOOTER.pack(tables_start, MAGIC))
+
+    return total
+
+
+class TokenFileReader:
+    """
+    Leitor de arquivos .tok. O cabeçalho, os padrões e as palavras reservadas
+    são lidos na abertura; a tabela de símbolos, apenas quando symbol_table é
+    consultado. Os registros são lidos bloco a bloco, sob demanda, ao iterar
+    sobre o leitor.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        try:
+            self._read_header()
+        except Exception:
+            self.file.close()
+            raise
+
+    def _read_header(self):
+        file = self.file
+        prefix = file.read(HEADER_SIZE)
+        if len(prefix) < HEADER_SIZE or prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.filename} não é um arquivo de tokens")
+        version, self.codec, flags = prefix[len(MAGIC):]
+        if version != VERSION:
+            raise ValueError(f"Versão de arquivo de tokens não suportada: {version}")
+        self.byte_offsets = bool(flags & FLAG_BYTE_OFFSETS)
+        self._decompress = _decompressor(self.codec)
+        self.data_start = HEADER_SIZE
+
+        # O rodapé indica a posição das tabelas, gravadas depois dos blocos
+        file.seek(0, os.SEEK_END)
+        if file.tell() < HEADER_SIZE + FOOTER.size:
+            raise ValueError(f"Arquivo de tokens truncado: {self.filename}")
+        file.seek(-FOOTER.size, os.SEEK_END)
+        tables_start, magic = FOOTER.unpack(file.read(FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError(f"Arquivo de tokens truncado: {self.filename}")
+        file.seek(tables_start)
+
+        self.cache_size = self._read_file_varint()
+        self.patterns = [self._read_file_string() for _ in range(self._read_file_varint())]
+        self.reserved_words = [self._read_file_string() for _ in range(self._read_file_varint())]
+        self.symbols_start = file.tell()
+        self._symbol_table = None
+
+    @property
+    def symbol_table(self):
+        """Tabela de símbolos gravada no arquivo (lida na primeira consulta)."""
+        if self._symbol_table is None:
+            symbol_table = SymbolTable()
+            for word in self.reserved_words:
+                symbol_table.add_reserved_word(word)
+            self.file.seek(self.symbols_start)
+            for _ in range(self._read_file_varint()):
+                lexeme = self._read_file_string()
+                symbol_table.symbols[lexeme] = self.patterns[self._read_file_varint()]
+            self._symbol_table = symbol_table
+        return self._symbol_table
+
+    def _read_file_varint(self):
+        result = 0
+        shift = 0
+        while True:
+            data = self.file.read(1)
+            if not data:
+                raise ValueError(f"Arquivo de tokens truncado: {self.filename}")
+            result |= (data[0] & 0x7F) << shift
+            if data[0] < 0x80:
+                return result
+            shift += 7
+
+    def _read_file_string(self):
+        size = self._read_file_varint()
+        return self.file.read(size).decode('utf-8')
+
+    def blocks(self):
+        """Produz o conteúdo (descomprimido) e o número de registros de cada bloco."""
+        self.file.seek(self.data_start)
+        while True:
+            count = self._read_file_varint()
+            if count == 0:
+                return
+            size = self._read_file_varint()
+            yield self._decompress(self.file.read(size)), count
+
+    def __iter__(self):
+        patterns = self.patterns
+        cache = LexemeCache(self.cache_size)
+        lexemes = []        # entrada do cache -> lexema
+        offset = 0
+
+        for data, count in self.blocks():
+            pos = 0
+            for _ in range(count):
+                pattern_id, pos = read_varint(data, pos)
+                if pattern_id == ERROR_ID:
+                    lexeme, pos = _read_string(data, pos)
+                else:
+                    reference, pos = read_varint(data, pos)
+                    if reference == 0:
+                        lexeme, pos = _read_string(data, pos)
+                        entry = cache.add(lexeme)
+                        if entry == len(lexemes):
+                            lexemes.append(lexeme)
+                        else:
+                            lexemes[entry] = lexeme
+                    else:
+                        lexeme = lexemes[reference - 1]
+                        cache.get(lexeme)
+                gap, pos = read_varint(data, pos)
+                length, pos = read_varint(data, pos)
+                offset += gap
+                yield TokenRecord(patterns[pattern_id], lexeme, offset, length)
+                offset += length
+
+    def tokens(self):
+        """Produz os tokens no formato <lexema, padrão>, como em analyze."""
+        for record in self:
+            yield str(record)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_token_file(filename):
+    """Abre um arquivo .tok; use com with e itere sobre os registros."""
+    return TokenFileReader(filename)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python token_file.py <arquivo.tok>")
+        return
+
+    with read_token_file(sys.argv[1]) as reader:
+        for token in reader.tokens():
+            print(token)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Representação tabular do AFD determinizado.
+
+Os símbolos do alfabeto são agrupados em classes de equivalência (símbolos
+com a mesma coluna em todos os estados) e as transições são armazenadas em uma
+tabela densa estados × classes, com -1 indicando ausência de transição.
+A classe 0 é reservada para os caracteres fora do alfabeto.
+
+Para AFDs com muitos estados, CompressedTable guarda a mesma tabela no formato
+compactado usado por flex e yacc: linhas idênticas são armazenadas uma única
+vez, cada linha tem um destino padrão (default) e apenas as entradas diferentes
+dele são intercaladas nos vetores next/check a partir de um deslocamento (base).
+"""
+import sys
+from array import array
+from collections import Counter
+from automaton import EPSILON
+
+DEAD_STATE = -1
+
+
+class TransitionTable:
+    def __init__(self, automaton, patterns=None):
+        self.patterns = list(patterns or [])
+
+        # Estados numerados de forma contígua a partir de 0
+        self.state_ids = sorted(automaton.states)
+        self.state_index = {state: i for i, state in enumerate(self.state_ids)}
+        self.num_states = len(self.state_ids)
+        self.initial_state = self.state_index[automaton.initial_state]
+
+        symbols = sorted(automaton.alphabet - {EPSILON})
+
+        # Assinatura de cada símbolo: o destino em cada estado
+        columns_by_symbol = {symbol: [] for symbol in symbols}
+        for state in self.state_ids:
+            state_transitions = automaton.transitions.get(state, {})
+            for symbol in symbols:
+                targets = state_transitions.get(symbol)
+                columns_by_symbol[symbol].append(self.state_index[next(iter(targets))] if targets else DEAD_STATE)
+
+        signatures = {}
+        for symbol in symbols:
+            signatures.setdefault(tuple(columns_by_symbol[symbol]), []).append(symbol)
+
+        # Classes de equivalência (a classe 0 agrupa os símbolos sem transição)
+        self.symbol_class = {}
+        self.class_symbols = [[]]
+        columns = [[DEAD_STATE] * self.num_states]
+        for signature, members in signatures.items():
+            class_id = len(self.class_symbols)
+            self.class_symbols.append(members)
+            columns.append(list(signature))
+            for symbol in members:
+                self.symbol_class[symbol] = class_id
+        self.num_classes = len(self.class_symbols)
+
+        # Tabela densa: rows[estado][classe] -> próximo estado
+        self.rows = [[columns[c][s] for c in range(self.num_classes)] for s in range(self.num_states)]
+
+        # Padrão aceito por estado (None para estados não finais)
+        accepting = automaton.get_accepting_patterns(self.patterns)
+        self.accept = [accepting.get(state) for state in self.state_ids]
+
+    def class_of(self, char):
+        """Retorna a classe de equivalência do caractere."""
+        return self.symbol_class.get(char, 0)
+
+    def next_state(self, state, char):
+        """Retorna o próximo estado a partir de state com char, ou DEAD_STATE."""
+        return self.rows[state][self.symbol_class.get(char, 0)]
+
+    def flat_rows(self):
+        """Retorna a tabela densa como uma lista linear (estado * num_classes + classe)."""
+        flat = []
+        for row in self.rows:
+            flat.extend(row)
+        return flat
+
+    def memory_usage(self):
+        """Bytes ocupados pela tabela densa (listas de linhas)."""
+        return sys.getsizeof(self.rows) + sum(sys.getsizeof(row) for row in self.rows)
+
+    def compress(self):
+        """Retorna a tabela no formato compactado default/base/next/check."""
+        return CompressedTable(self)
+
+    def self_loop_symbols(self, state):
+        """Retorna os símbolos que mantêm o AFD no próprio estado."""
+        row = self.rows[state]
+        return [symbol for symbol, class_id in self.symbol_class.items() if row[class_id] == state]
+
+    def live_patterns(self):
+        """
+        Retorna, para cada estado, o conjunto de padrões que ainda podem ser
+        aceitos a partir dele.
+        """
+        live = [{pattern} if pattern is not None else set() for pattern in self.accept]
+
+        changed = True
+        while changed:
+            changed = False
+            for state, row in enumerate(self.rows):
+                for target in row:
+                    if target != DEAD_STATE and not live[target] <= live[state]:
+                        live[state] |= live[target]
+                        changed = True
+        return live
+
+    def __str__(self):
+        return (f"Tabela de transições: {self.num_states} estados × "
+                f"{self.num_classes} classes ({len(self.symbol_class)} símbolos)")
+
+
+class CompressedTable:
+    """
+    Tabela de transições compactada. O próximo estado de (estado, classe) é
+
+        r = row_of[estado]; i = base[r] + classe
+        next[i] if check[i] == r else default[r]
+
+    onde r identifica a linha (estados com linhas idênticas compartilham r).
+    """
+
+    def __init__(self, table):
+        self.num_states = table.num_states
+        self.state_ids = table.state_ids
+        self.num_classes = table.num_classes
+        self.initial_state = table.initial_state
+        self.symbol_class = table.symbol_class
+        self.accept = table.accept
+        self.dense_bytes = table.memory_usage()
+
+        # Deduplicação: estados com a mesma linha apontam para a mesma entrada
+        unique_rows = {}
+        self.row_of = array('i')
+        for row in table.rows:
+            self.row_of.append(unique_rows.setdefault(tuple(row), len(unique_rows)))
+        self.num_rows = len(unique_rows)
+
+        self.default = array('i', [DEAD_STATE] * self.num_rows)
+        self.base = array('i', [0] * self.num_rows)
+        next_states = []
+        check = []
+
+        # Linhas com mais entradas são posicionadas primeiro (primeiro encaixe)
+        entries = []
+        for row, row_id in unique_rows.items():
+            default = Counter(row).most_common(1)[0][0]
+            self.default[row_id] = default
+            entries.append((row_id, [(c, target) for c, target in enumerate(row) if target != default]))
+        entries.sort(key=lambda entry: -len(entry[1]))
+
+        # Índice das posições livres: next_free[i] leva à primeira posição livre
+        # a partir de i, e a busca salta as ocupadas em vez de testar cada base
+        next_free = []
+
+        def find_free(index):
+            """Primeira posição livre de check a partir de index (com compressão de caminhos)."""
+            slot = index
+            while slot < len(next_free) and next_free[slot] != slot:
+                slot = next_free[slot]
+            while index < len(next_free) and next_free[index] != index:
+                following = next_free[index]
+                next_free[index] = slot
+                index = following
+            return slot
+
+        for row_id, cells in entries:
+            # A base é a menor em que a primeira célula (menor classe) cai em uma
+            # posição livre e as demais também
+            base = 0
+            if cells:
+                first = cells[0][0]
+                slot = find_free(first)
+                base = slot - first
+                while any(base + c < len(check) and check[base + c] != -1 for c, _ in cells[1:]):
+                    slot = find_free(slot + 1)
+                    base = slot - first
+            self.base[row_id] = base
+
+            needed = base + self.num_classes - len(check)
+            if needed > 0:
+                next_states.extend([DEAD_STATE] * needed)
+                next_free.extend(range(len(check), len(check) + needed))
+                check.extend([-1] * needed)
+            for c, target in cells:
+                next_states[base + c] = target
+                check[base + c] = row_id
+                next_free[base + c] = base + c + 1
+
+        self.next = array('i', next_states)
+        self.check = array('i', check)
+
+    def next_state(self, state, char):
+        """Retorna o próximo estado a partir de state com char, ou DEAD_STATE."""
+        row_id = self.row_of[state]
+        index = self.base[row_id] + self.symbol_class.get(char, 0)
+        if self.check[index] == row_id:
+            return self.next[index]
+        return self.default[row_id]
+
+    def memory_usage(self):
+        """Bytes ocupados pelos vetores da tabela compactada."""
+        return sum(sys.getsizeof(vector) for vector in (self.row_of, self.default, self.base,
+                                                        self.next, self.check))
+
+    def __str__(self):
+        return (f"Tabela compactada: {self.num_states} estados ({self.num_rows} linhas distintas), "
+                f"{len(self.next)} entradas em next/check; {self.memory_usage()} bytes "
+                f"(densa: {self.dense_bytes} bytes)")
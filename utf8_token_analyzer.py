@@ -0,0 +1,158 @@
+"""
+Variante do analisador de tokens que percorre diretamente os bytes UTF-8.
+
+Usada com AFDs construídos por RegexToAFD(utf8=True), cujos símbolos são os
+bytes 0-255 (representados por chr(byte)). A tabela de transições é expandida
+para 256 colunas, uma por byte, de modo que cada passo da varredura é uma
+indexação de listas pelo próprio byte, sem decodificar o texto nem consultar
+o dicionário de classes. Apenas os lexemas reconhecidos são decodificados.
+
+Os deslocamentos em token_offsets e error_spans são contados em bytes.
+"""
+import re
+from token_analyzer import TokenAnalyzer
+from transition_table import DEAD_STATE
+
+# Descarte padrão (sem padrões %skip) sobre bytes: espaços ASCII e comentários "//"
+DEFAULT_SKIP_BYTES = re.compile(rb'(?:\s+|//[^\n]*)+')
+
+
+def utf8_length(lead_byte):
+    """Tamanho da sequência UTF-8 iniciada por lead_byte (1 para bytes inválidos)."""
+    if lead_byte < 0xC0:
+        return 1
+    if lead_byte < 0xE0:
+        return 2
+    if lead_byte < 0xF0:
+        return 3
+    if lead_byte < 0xF8:
+        return 4
+    return 1
+
+
+class Utf8TokenAnalyzer(TokenAnalyzer):
+    def __init__(self, automaton, symbol_table, patterns=None, skip_patterns=None, **options):
+        if (options.get('compressed') or options.get('linear_time') or options.get('profile')
+                or options.get('error_recovery', 'char') != 'char'):
+            raise ValueError("Utf8TokenAnalyzer suporta apenas a tabela densa e a recuperação 'char'")
+
+        super().__init__(automaton, symbol_table, patterns, skip_patterns, **options)
+
+        # Tabela estados × 256 bytes
+        byte_classes = [self.table.symbol_class.get(chr(byte), 0) for byte in range(256)]
+        self.byte_rows = [[row[class_id] for class_id in byte_classes] for row in self.table.rows]
+
+        # Saltos de espaços e comentários sobre bytes (os símbolos são chr(byte))
+        self.byte_skip_runs = {state: re.compile(run.pattern.encode('latin-1'))
+                               for state, run in self.skip_runs.items()}
+        self.byte_skip_ahead = (re.compile(self.skip_ahead.pattern.encode('latin-1'))
+                                if self.skip_ahead is not None else None)
+
+    def analyze(self, data, wanted=None):
+        """
+        Analisa o texto em bytes UTF-8 (str é codificado antes) e retorna a
+        lista de tokens no formato <lexema, padrão>. Um caractere não reconhecido
+        gera um único token de erro, mesmo que ocupe vários bytes.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return super().analyze(data, wanted)
+
+    def count(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return super().count(data)
+
+    def _reserved_patterns(self):
+        patterns = set()
+        for word in self.symbol_table.reserved_words:
+            encoded = word.encode('utf-8')
+            end, pattern = self._scan_bytes(encoded, 0)
+            if encoded and end == len(encoded):
+                patterns.add(pattern)
+        return frozenset(patterns)
+
+    def _spans(self, data, start=0):
+        position = start
+        length = len(data)
+        skip_patterns = self.skip_patterns
+        default_skip = self.default_skip
+        skip_ahead = self.byte_skip_ahead
+        error_spans = self.error_spans = []
+
+        while position < length:
+            if default_skip:
+                skipped = DEFAULT_SKIP_BYTES.match(data, position)
+            else:
+                skipped = skip_ahead.match(data, position) if skip_ahead is not None else None
+            if skipped:
+                position = skipped.end()
+                if position >= length:
+                    break
+
+            end, pattern = self._scan_bytes(data, position)
+
+            if end > position:
+                if pattern not in skip_patterns:
+                    yield position, end, pattern
+                position = end
+            else:
+                if self.max_errors is not None and len(error_spans) >= self.max_errors:
+                    print(f"Aviso: limite de {self.max_errors} erros atingido; "
+                          f"análise interrompida no byte {position}.")
+                    break
+
+                # Caractere não reconhecido (todos os bytes da sua codificação)
+                end = min(position + utf8_length(data[position]), length)
+                error_spans.append((position, end))
+                yield position, end, None
+                position = end
+
+    def _lexeme(self, data, start, end):
+        return data[start:end].decode('utf-8', 'replace')
+
+    def _scan_bytes(self, data, pos):
+        """
+        Executa o AFD sobre os bytes a partir de pos pelo princípio do maior
+        token possível. Retorna (fim, padrão); fim == pos se nada foi reconhecido.
+        """
+        _, _, last_end, last_pattern = self._scan(data, pos, self.table.initial_state, pos, None)
+        return last_end, last_pattern
+
+    def _scan(self, data, pos, state, last_end, last_pattern):
+        """
+        Variante de TokenAnalyzer._scan sobre bytes: continua a execução do AFD
+        a partir de (estado, pos) e retorna (estado, pos, último_fim, último_padrão),
+        com estado DEAD_STATE quando a varredura parou por falta de transição.
+        """
+        byte_rows = self.byte_rows
+        accept = self.table.accept
+        skip_runs = self.byte_skip_runs
+        length = len(data)
+
+        while pos < length:
+            next_state = byte_rows[state][data[pos]]
+            if next_state == DEAD_STATE:
+                return DEAD_STATE, pos, last_end, last_pattern
+            state = next_state
+            pos += 1
+
+            run = skip_runs.get(state)
+            if run is not None:
+                pos = run.match(data, pos).end()
+
+            pattern = accept[state]
+            if pattern is not None:
+                last_end = pos
+                last_pattern = pattern
+
+        return state, pos, last_end, last_pattern
+
+    # Análise em fluxo (TokenAnalyzer.atokenize) diretamente sobre os bytes lidos
+    _stream_default_skip = DEFAULT_SKIP_BYTES
+
+    def _stream_decoder(self):
+        return (lambda data, final: data.encode('utf-8') if isinstance(data, str) else data), b""
+
+    def _error_end(self, data, position):
+        return position + utf8_length(data[position])